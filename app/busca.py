@@ -0,0 +1,198 @@
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func, or_, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Índices trigram sobre o texto sem acento; exigem as extensões pg_trgm e unaccent
+DDL_POSTGRESQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() não é IMMUTABLE, então não pode ser usada diretamente em um índice
+    """
+    CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS
+    $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_cidadaos_nome_trgm ON cidadaos USING gin (f_unaccent(nome_completo) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_cidadaos_bairro_trgm ON cidadaos USING gin (f_unaccent(bairro) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_cidadaos_endereco_trgm ON cidadaos USING gin (f_unaccent(endereco_completo) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_cidadaos_cpf_trgm ON cidadaos USING gin (cpf gin_trgm_ops)",
+    # Chave normalizada do filtro por bairro da listagem: lower(bairro) LIKE '%termo%'
+    "CREATE INDEX IF NOT EXISTS ix_cidadaos_bairro_lower_trgm ON cidadaos USING gin (lower(bairro) gin_trgm_ops)",
+]
+
+# Tabela FTS5 externa sincronizada com a tabela de cidadãos por triggers
+DDL_SQLITE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS cidadaos_fts USING fts5(
+        nome_completo, cpf, bairro, endereco_completo,
+        content='cidadaos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cidadaos_fts_ai AFTER INSERT ON cidadaos BEGIN
+        INSERT INTO cidadaos_fts(rowid, nome_completo, cpf, bairro, endereco_completo)
+        VALUES (new.id, new.nome_completo, new.cpf, new.bairro, new.endereco_completo);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cidadaos_fts_ad AFTER DELETE ON cidadaos BEGIN
+        INSERT INTO cidadaos_fts(cidadaos_fts, rowid, nome_completo, cpf, bairro, endereco_completo)
+        VALUES ('delete', old.id, old.nome_completo, old.cpf, old.bairro, old.endereco_completo);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cidadaos_fts_au AFTER UPDATE ON cidadaos BEGIN
+        INSERT INTO cidadaos_fts(cidadaos_fts, rowid, nome_completo, cpf, bairro, endereco_completo)
+        VALUES ('delete', old.id, old.nome_completo, old.cpf, old.bairro, old.endereco_completo);
+        INSERT INTO cidadaos_fts(rowid, nome_completo, cpf, bairro, endereco_completo)
+        VALUES (new.id, new.nome_completo, new.cpf, new.bairro, new.endereco_completo);
+    END
+    """,
+    "INSERT INTO cidadaos_fts(cidadaos_fts) VALUES ('rebuild')",
+]
+
+# Segundos em que a verificação dos índices de busca vale; depois disso é refeita,
+# para perceber migrações aplicadas (ou revertidas) por outro processo
+BUSCA_VERIFICAR_SEGUNDOS = float(os.getenv("BUSCA_VERIFICAR_SEGUNDOS", "60"))
+# Termos mais curtos que isto vão direto para o LIKE: o prefixo no FTS5 seria caro e impreciso
+BUSCA_MIN_PREFIXO = 3
+
+# Cache de disponibilidade dos índices por URL de conexão: (disponível, verificado em)
+_disponivel: Dict[str, Tuple[bool, float]] = {}
+
+
+def criar_indices_busca(conn) -> None:
+    """
+    Cria os índices de busca textual do dialeto em uso (PostgreSQL ou SQLite).
+    """
+    dialeto = conn.dialect.name
+    if dialeto == "postgresql":
+        comandos = DDL_POSTGRESQL
+    elif dialeto == "sqlite":
+        comandos = DDL_SQLITE
+    else:
+        return
+    for comando in comandos:
+        conn.execute(text(comando))
+    invalidar_disponibilidade()
+
+
+def invalidar_disponibilidade() -> None:
+    """
+    Descarta o resultado em cache da verificação dos índices de busca.
+    """
+    _disponivel.clear()
+
+
+def busca_indexada_disponivel(db: Session) -> bool:
+    """
+    Verifica se os índices de busca textual foram criados; o resultado vale por BUSCA_VERIFICAR_SEGUNDOS.
+    """
+    bind = db.get_bind()
+    chave = str(bind.url)
+    disponivel, verificado_em = _disponivel.get(chave, (False, None))
+    if verificado_em is not None and time.monotonic() - verificado_em < BUSCA_VERIFICAR_SEGUNDOS:
+        return disponivel
+
+    dialeto = bind.dialect.name
+    if dialeto == "postgresql":
+        sql = "SELECT to_regclass('ix_cidadaos_nome_trgm') IS NOT NULL"
+    elif dialeto == "sqlite":
+        sql = "SELECT EXISTS (SELECT 1 FROM sqlite_master WHERE name = 'cidadaos_fts')"
+    else:
+        sql = None
+    disponivel = bool(db.execute(text(sql)).scalar()) if sql else False
+    _disponivel[chave] = (disponivel, time.monotonic())
+    return disponivel
+
+
+def buscar_por_substring(
+    db: Session, termo: str, limit: int, excluir: Iterable[int] = ()
+) -> List[models.Cidadao]:
+    """
+    Busca sem índice: o termo em qualquer posição do nome, CPF, bairro ou endereço (ILIKE).
+    """
+    padrao = f"%{termo}%"
+    consulta = db.query(models.Cidadao).filter(
+        or_(
+            models.Cidadao.nome_completo.ilike(padrao),
+            models.Cidadao.cpf.ilike(padrao),
+            models.Cidadao.bairro.ilike(padrao),
+            models.Cidadao.endereco_completo.ilike(padrao)
+        )
+    )
+    excluir = list(excluir)
+    if excluir:
+        consulta = consulta.filter(models.Cidadao.id.notin_(excluir))
+    return consulta.order_by(models.Cidadao.id).limit(limit).all()
+
+
+def _buscar_postgresql(db: Session, termo: str, limit: int) -> List[models.Cidadao]:
+    padrao = func.f_unaccent(f"%{termo}%")
+    termo_sem_acento = func.f_unaccent(termo)
+    nome = func.f_unaccent(models.Cidadao.nome_completo)
+    bairro = func.f_unaccent(models.Cidadao.bairro)
+    endereco = func.f_unaccent(models.Cidadao.endereco_completo)
+    relevancia = func.greatest(
+        func.word_similarity(termo_sem_acento, nome),
+        func.word_similarity(termo_sem_acento, bairro) * 0.8,
+        func.word_similarity(termo_sem_acento, endereco) * 0.6,
+    )
+    return db.query(models.Cidadao).filter(
+        or_(
+            nome.ilike(padrao),
+            models.Cidadao.cpf.like(f"%{termo}%"),
+            bairro.ilike(padrao),
+            endereco.ilike(padrao)
+        )
+    ).order_by(relevancia.desc(), models.Cidadao.id).limit(limit).all()
+
+
+def _buscar_sqlite(db: Session, termo: str, limit: int) -> List[models.Cidadao]:
+    # O FTS5 só encontra palavras que começam com o termo. Trechos de CPF e termos curtos
+    # vão direto para o LIKE; os demais completam com o LIKE o que o prefixo não achou
+    # (meio de palavra: "ilva" em "Silva")
+    palavras = re.findall(r"\w+", termo)
+    if not palavras:
+        return []
+    if termo.strip().isdigit() or len(termo.strip()) < BUSCA_MIN_PREFIXO:
+        return buscar_por_substring(db, termo.strip(), limit)
+    consulta = " ".join(f'"{palavra}"*' for palavra in palavras)
+    ids = [
+        id_ for (id_,) in db.execute(
+            text(
+                "SELECT rowid FROM cidadaos_fts WHERE cidadaos_fts MATCH :consulta "
+                "ORDER BY bm25(cidadaos_fts, 10.0, 5.0, 2.0, 1.0) LIMIT :limit"
+            ),
+            {"consulta": consulta, "limit": limit}
+        )
+    ]
+    posicao = {id_: i for i, id_ in enumerate(ids)}
+    cidadaos = db.query(models.Cidadao).filter(models.Cidadao.id.in_(ids)).all() if ids else []
+    cidadaos.sort(key=lambda cidadao: posicao[cidadao.id])
+    if len(cidadaos) < limit:
+        cidadaos += buscar_por_substring(db, termo.strip(), limit - len(cidadaos), excluir=ids)
+    return cidadaos
+
+
+def buscar_cidadaos(db: Session, termo: str, limit: int = 10) -> List[models.Cidadao]:
+    """
+    Busca cidadãos por nome, CPF, bairro ou endereço usando os índices de busca textual,
+    ignorando acentos e ordenando por relevância.
+    """
+    buscar = _buscar_postgresql if db.get_bind().dialect.name == "postgresql" else _buscar_sqlite
+    try:
+        # Savepoint: se os índices sumiram (migração revertida), o erro não invalida a transação
+        with db.begin_nested():
+            return buscar(db, termo, limit)
+    except DBAPIError:
+        invalidar_disponibilidade()
+        return buscar_por_substring(db, termo, limit)
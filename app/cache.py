@@ -0,0 +1,326 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+# Backend do cache de leitura: 'memoria', 'redis' ou 'desativado'
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memoria").lower()
+CACHE_TTL = float(os.getenv("CACHE_TTL", "30"))
+CACHE_MAX_ITENS = int(os.getenv("CACHE_MAX_ITENS", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Validade do cache de usuários autenticados (principal do token JWT)
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+# Por quanto tempo uma chave removida não aceita ser preenchida de novo, em segundos. Cobre
+# a leitura que consultou o banco antes da alteração e só grava no cache depois da remoção
+CACHE_TTL_REMOCAO = float(os.getenv("CACHE_TTL_REMOCAO", "5"))
+
+# Escritas em caches bloqueantes pedidas dentro de `operacoes_fora_do_loop()`
+_operacoes_adiadas: ContextVar[Optional[List[Callable[[], None]]]] = ContextVar(
+    "operacoes_cache_adiadas", default=None
+)
+# Valor gravado no Redis no lugar de uma chave removida, até CACHE_TTL_REMOCAO
+_LAPIDE = b"__removido__"
+
+
+class Cache:
+    """
+    Interface do cache de leitura. Os valores devem ser serializáveis em JSON.
+
+    `definir` é o preenchimento após uma leitura no banco: não sobrescreve uma chave
+    removida há menos de CACHE_TTL_REMOCAO segundos. As marcas (`definir_marca`) ficam
+    fora das chaves que podem ser descartadas pelo limite de itens.
+    """
+    backend = "desativado"
+    # Se True, cada operação faz I/O de rede e não deve rodar no event loop
+    bloqueante = False
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidacoes = 0
+
+    def obter(self, chave: str) -> Optional[Any]:
+        valor = self._obter(chave)
+        if valor is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return valor
+
+    async def obter_async(self, chave: str) -> Optional[Any]:
+        if self.bloqueante:
+            return await run_in_threadpool(self.obter, chave)
+        return self.obter(chave)
+
+    def definir(self, chave: str, valor: Any) -> None:
+        self._executar(self._definir, chave, valor)
+
+    def remover(self, *chaves: str) -> None:
+        self.invalidacoes += len(chaves)
+        if chaves:
+            self._executar(self._remover, chaves)
+
+    def definir_marca(self, chave: str, valor: Any) -> None:
+        self._executar(self._definir_marca, chave, valor)
+
+    def obter_marca(self, chave: str) -> Optional[Any]:
+        return None
+
+    def limpar(self) -> None:
+        pass
+
+    def _executar(self, operacao: Callable, *args) -> None:
+        adiadas = _operacoes_adiadas.get()
+        if self.bloqueante and adiadas is not None:
+            adiadas.append(functools.partial(operacao, *args))
+        else:
+            operacao(*args)
+
+    def _obter(self, chave: str) -> Optional[Any]:
+        return None
+
+    def _definir(self, chave: str, valor: Any) -> None:
+        pass
+
+    def _remover(self, chaves) -> None:
+        pass
+
+    def _definir_marca(self, chave: str, valor: Any) -> None:
+        pass
+
+    def metricas(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "invalidacoes": self.invalidacoes,
+        }
+
+
+class CacheMemoria(Cache):
+    """
+    Cache LRU em memória do processo, com expiração por TTL.
+    """
+    backend = "memoria"
+
+    def __init__(self, ttl: float = CACHE_TTL, max_itens: int = CACHE_MAX_ITENS, ttl_remocao: float = CACHE_TTL_REMOCAO):
+        super().__init__()
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self.ttl_remocao = ttl_remocao
+        self._itens: "OrderedDict[str, tuple]" = OrderedDict()
+        # Chaves removidas recentemente -> até quando não aceitam preenchimento, em ordem de expiração
+        self._removidos: "OrderedDict[str, float]" = OrderedDict()
+        self._marcas: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _obter(self, chave: str) -> Optional[Any]:
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            expira_em, valor = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def _definir(self, chave: str, valor: Any) -> None:
+        agora = time.monotonic()
+        with self._lock:
+            if self._removidos.get(chave, agora) > agora:
+                return
+            self._itens[chave] = (agora + self.ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def _remover(self, chaves) -> None:
+        agora = time.monotonic()
+        with self._lock:
+            while self._removidos and next(iter(self._removidos.values())) <= agora:
+                self._removidos.popitem(last=False)
+            for chave in chaves:
+                self._itens.pop(chave, None)
+                self._removidos.pop(chave, None)
+                self._removidos[chave] = agora + self.ttl_remocao
+
+    def _definir_marca(self, chave: str, valor: Any) -> None:
+        agora = time.monotonic()
+        with self._lock:
+            # As marcas são poucas (uma por usuário alterado); as vencidas saem a cada gravação
+            for vencida in [c for c, (expira_em, _) in self._marcas.items() if expira_em < agora]:
+                del self._marcas[vencida]
+            self._marcas[chave] = (agora + self.ttl, valor)
+
+    def obter_marca(self, chave: str) -> Optional[Any]:
+        with self._lock:
+            item = self._marcas.get(chave)
+        if item is None or item[0] < time.monotonic():
+            return None
+        return item[1]
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+            self._removidos.clear()
+            self._marcas.clear()
+
+    def metricas(self) -> Dict[str, Any]:
+        return {**super().metricas(), "itens": len(self._itens), "max_itens": self.max_itens, "ttl": self.ttl}
+
+
+class CacheRedis(Cache):
+    """
+    Cache compartilhado entre processos em um servidor com protocolo Redis.
+    Aceita qualquer cliente com get/set(ex=, px=, nx=)/pipeline, como redis.Redis ou fakeredis.
+
+    O cliente é síncrono: nas rotas assíncronas as leituras usam `obter_async` e as
+    escritas são adiadas com `operacoes_fora_do_loop`, rodando no threadpool.
+    """
+    backend = "redis"
+    bloqueante = True
+
+    def __init__(
+        self, cliente=None, url: str = REDIS_URL, ttl: float = CACHE_TTL, prefixo: str = "fumapis:",
+        ttl_remocao: float = CACHE_TTL_REMOCAO
+    ):
+        super().__init__()
+        if cliente is None:
+            import redis
+            cliente = redis.Redis.from_url(url)
+        self.cliente = cliente
+        self.ttl = ttl
+        self.ttl_remocao = ttl_remocao
+        self.prefixo = prefixo
+
+    def _obter(self, chave: str) -> Optional[Any]:
+        valor = self.cliente.get(self.prefixo + chave)
+        if valor is None or valor in (_LAPIDE, _LAPIDE.decode()):
+            return None
+        return json.loads(valor)
+
+    def _definir(self, chave: str, valor: Any) -> None:
+        # nx: não sobrescreve a lápide de uma remoção recente nem um valor já preenchido
+        self.cliente.set(self.prefixo + chave, json.dumps(valor), ex=max(int(self.ttl), 1), nx=True)
+
+    def _remover(self, chaves) -> None:
+        pipeline = self.cliente.pipeline(transaction=False)
+        for chave in chaves:
+            pipeline.set(self.prefixo + chave, _LAPIDE, px=max(int(self.ttl_remocao * 1000), 1))
+        pipeline.execute()
+
+    def _definir_marca(self, chave: str, valor: Any) -> None:
+        self.cliente.set(self.prefixo + "marca:" + chave, json.dumps(valor), ex=max(int(self.ttl), 1))
+
+    def obter_marca(self, chave: str) -> Optional[Any]:
+        valor = self.cliente.get(self.prefixo + "marca:" + chave)
+        return json.loads(valor) if valor is not None else None
+
+    def metricas(self) -> Dict[str, Any]:
+        return {**super().metricas(), "ttl": self.ttl}
+
+
+def _aplicar(operacoes: List[Callable[[], None]]) -> None:
+    for operacao in operacoes:
+        operacao()
+
+
+@asynccontextmanager
+async def operacoes_fora_do_loop():
+    """
+    Adia as escritas em caches bloqueantes feitas dentro do bloco e as executa no
+    threadpool ao sair. Usado em volta de `AsyncSession.run_sync`, que roda o código
+    síncrono no próprio thread do event loop; como a saída é depois do commit, as
+    remoções acontecem só quando a alteração já está visível.
+    """
+    adiadas: List[Callable[[], None]] = []
+    token = _operacoes_adiadas.set(adiadas)
+    try:
+        yield
+    finally:
+        _operacoes_adiadas.reset(token)
+        if adiadas:
+            await run_in_threadpool(_aplicar, adiadas)
+
+
+def criar_cache(backend: str = CACHE_BACKEND, ttl: float = CACHE_TTL) -> Cache:
+    if backend == "memoria":
+        return CacheMemoria(ttl=ttl)
+    if backend == "redis":
+        return CacheRedis(ttl=ttl)
+    return Cache()
+
+
+# Cache das consultas de cidadão por ID e por CPF
+cache_cidadaos = criar_cache()
+
+# Cache dos usuários autenticados, por `sub` e `exp` do token
+cache_usuarios = criar_cache(ttl=AUTH_CACHE_TTL)
+
+
+def configurar_cache(novo: Cache, usuarios: Optional[Cache] = None) -> None:
+    """
+    Substitui o cache de cidadãos e, opcionalmente, o de usuários
+    (por exemplo, por um CacheRedis com cliente de teste).
+    """
+    global cache_cidadaos, cache_usuarios
+    cache_cidadaos = novo
+    if usuarios is not None:
+        cache_usuarios = usuarios
+
+
+def chave_id(cidadao_id: int) -> str:
+    return f"cidadao:id:{cidadao_id}"
+
+
+def chave_cpf(cpf: str) -> str:
+    return f"cidadao:cpf:{cpf}"
+
+
+def chave_usuario(sub: str, exp: Any) -> str:
+    return f"usuario:{sub}:{exp}"
+
+
+def chave_usuario_alterado(sub: str) -> str:
+    return f"usuario:{sub}:alterado_em"
+
+
+def obter_principal(sub: str, exp: Any) -> Optional[Dict[str, Any]]:
+    """
+    Retorna o usuário guardado para o token, se ainda for válido.
+    Entradas guardadas antes da última alteração do usuário são descartadas.
+    """
+    dados = cache_usuarios.obter(chave_usuario(sub, exp))
+    if dados is None:
+        return None
+    alterado_em = cache_usuarios.obter_marca(chave_usuario_alterado(sub))
+    if alterado_em is not None and dados["guardado_em"] <= alterado_em:
+        cache_usuarios.remover(chave_usuario(sub, exp))
+        return None
+    return dados
+
+
+def guardar_principal(sub: str, exp: Any, usuario_id: int) -> None:
+    cache_usuarios.definir(
+        chave_usuario(sub, exp), {"id": usuario_id, "name": sub, "guardado_em": time.time()}
+    )
+
+
+def invalidar_principal(sub: str) -> None:
+    """
+    Invalida todos os tokens em cache do usuário. A marca de alteração vive pelo
+    mesmo TTL das entradas, então cobre todas as guardadas antes dela.
+    """
+    cache_usuarios.definir_marca(chave_usuario_alterado(sub), time.time())
+    cache_usuarios.invalidacoes += 1
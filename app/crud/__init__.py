@@ -8,7 +8,9 @@ from .cidadao import (
     delete_cidadao,
     count_cidadaos,
     search_cidadaos,
-    atualizar_votou
+    atualizar_votou,
+    registrar_votos,
+    upsert_cidadaos
 )
 
 __all__ = [
@@ -21,5 +23,7 @@ __all__ = [
     'delete_cidadao',
     'count_cidadaos',
     'search_cidadaos',
-    'atualizar_votou'
+    'atualizar_votou',
+    'registrar_votos',
+    'upsert_cidadaos'
 ]
@@ -0,0 +1,138 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Integer, case, cast, func, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from .dialeto import insert_dialeto
+
+CAMPOS_CONTADOR = ("total", "ativos", "elegiveis", "votaram")
+
+# (bairro, zona, ativo, elegivel, votou) de um cidadão
+Estado = Tuple[str, str, bool, bool, bool]
+
+
+def estado_contagem(cidadao: Optional[models.Cidadao]) -> Optional[Estado]:
+    """
+    Extrai do cidadão os campos que afetam os contadores (None se não existir).
+    Valores ainda não preenchidos assumem o default da coluna.
+    """
+    if cidadao is None:
+        return None
+    return (
+        cidadao.bairro,
+        cidadao.zona or "",
+        cidadao.ativo if cidadao.ativo is not None else True,
+        cidadao.elegivel if cidadao.elegivel is not None else True,
+        bool(cidadao.votou),
+    )
+
+
+def ajustar_contadores(db: Session, transicoes: Iterable[Tuple[Optional[Estado], Optional[Estado]]]) -> None:
+    """
+    Aplica aos contadores as diferenças entre o estado anterior e o novo de cada cidadão.
+    Deve ser chamada na mesma transação da alteração; não faz commit.
+    """
+    deltas: Dict[Tuple[str, str], List[int]] = defaultdict(lambda: [0, 0, 0, 0])
+    for antes, depois in transicoes:
+        if antes == depois:
+            continue
+        for estado, sinal in ((antes, -1), (depois, 1)):
+            if estado is None:
+                continue
+            bairro, zona, ativo, elegivel, votou = estado
+            delta = deltas[(bairro, zona)]
+            delta[0] += sinal
+            delta[1] += sinal * ativo
+            delta[2] += sinal * elegivel
+            delta[3] += sinal * votou
+
+    # Upsert em ordem fixa de chave: transações concorrentes bloqueiam os contadores
+    # na mesma sequência e não entram em deadlock
+    linhas = [
+        {"bairro": bairro, "zona": zona, **dict(zip(CAMPOS_CONTADOR, delta)), "atualizado_em": datetime.utcnow()}
+        for (bairro, zona), delta in sorted(deltas.items())
+        if any(delta)
+    ]
+    if not linhas:
+        return
+
+    tabela = models.ContadorApuracao.__table__
+    stmt = insert_dialeto(db)(tabela)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tabela.c.bairro, tabela.c.zona],
+        set_={
+            **{campo: tabela.c[campo] + stmt.excluded[campo] for campo in CAMPOS_CONTADOR},
+            "atualizado_em": stmt.excluded.atualizado_em,
+        }
+    )
+    db.execute(stmt, linhas)
+
+
+def reconciliar_contadores(db: Session) -> int:
+    """
+    Recalcula todos os contadores a partir da tabela de cidadãos, corrigindo
+    qualquer divergência. Retorna a quantidade de grupos (bairro, zona).
+    """
+    cidadao = models.Cidadao
+    tabela = models.ContadorApuracao.__table__
+
+    def soma(condicao):
+        return func.coalesce(func.sum(case((condicao, 1), else_=0)), 0)
+
+    zona = func.coalesce(cidadao.zona, "")
+    consulta = select(
+        cidadao.bairro,
+        zona,
+        func.count(),
+        soma(func.coalesce(cidadao.ativo, True) == True),  # noqa: E712
+        soma(func.coalesce(cidadao.elegivel, True) == True),  # noqa: E712
+        soma(func.coalesce(cidadao.votou, False) == True),  # noqa: E712
+        func.now(),
+    ).group_by(cidadao.bairro, zona)
+
+    db.execute(tabela.delete())
+    db.execute(
+        tabela.insert().from_select(
+            ["bairro", "zona", *CAMPOS_CONTADOR, "atualizado_em"], consulta
+        )
+    )
+    db.commit()
+    return db.query(func.count()).select_from(tabela).scalar()
+
+
+def _com_percentual(linha: Dict[str, Any]) -> Dict[str, Any]:
+    elegiveis = linha["elegiveis"]
+    linha["comparecimento_percentual"] = round(linha["votaram"] / elegiveis * 100, 2) if elegiveis else None
+    return linha
+
+
+def get_contadores(db: Session, agrupar_por: str = "bairro") -> List[Dict[str, Any]]:
+    """
+    Retorna os contadores agrupados por 'bairro', 'zona' ou ambos ('bairro_zona').
+    Lê apenas a tabela de contadores, sem varrer a de cidadãos.
+    Grupos que ficaram sem cidadãos são omitidos até a próxima reconciliação removê-los.
+    """
+    tabela = models.ContadorApuracao.__table__
+    if agrupar_por == "bairro":
+        chaves = [tabela.c.bairro]
+    elif agrupar_por == "zona":
+        chaves = [tabela.c.zona]
+    else:
+        chaves = [tabela.c.bairro, tabela.c.zona]
+
+    consulta = select(
+        *chaves,
+        *(cast(func.sum(tabela.c[campo]), Integer).label(campo) for campo in CAMPOS_CONTADOR),
+    ).group_by(*chaves).having(func.sum(tabela.c.total) > 0).order_by(*chaves)
+    return [_com_percentual(dict(linha._mapping)) for linha in db.execute(consulta)]
+
+
+def get_totais(db: Session) -> Dict[str, Any]:
+    tabela = models.ContadorApuracao.__table__
+    linha = db.execute(
+        select(*(func.coalesce(func.sum(tabela.c[campo]), 0).label(campo) for campo in CAMPOS_CONTADOR))
+    ).one()
+    return _com_percentual({campo: int(valor) for campo, valor in linha._mapping.items()})
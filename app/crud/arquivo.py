@@ -0,0 +1,189 @@
+import hashlib
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from .. import models
+
+# Colunas aceitas na ordenação da listagem
+ORDENACOES = ("nome", "tamanho", "total_linhas", "criado_em", "modificado_em")
+
+
+def get_arquivo_por_nome(db: Session, nome: str) -> Optional[models.ArquivoEnviado]:
+    return db.query(models.ArquivoEnviado).filter(models.ArquivoEnviado.nome == nome).first()
+
+
+def get_arquivo_por_hash(db: Session, sha256: str) -> Optional[models.ArquivoEnviado]:
+    """
+    Retorna o primeiro arquivo catalogado com o conteúdo informado.
+    """
+    return db.query(models.ArquivoEnviado).filter(
+        models.ArquivoEnviado.sha256 == sha256
+    ).order_by(models.ArquivoEnviado.id).first()
+
+
+def nomes_em_uso(db: Session, nome: str) -> Set[str]:
+    """
+    Retorna os nomes catalogados iguais a `nome` ou com sufixo numérico (nome_1.ext, nome_2.ext...).
+    """
+    base, extensao = os.path.splitext(nome)
+    padrao = base.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "\\_%" + extensao
+    return {
+        linha.nome for linha in db.query(models.ArquivoEnviado.nome).filter(
+            or_(models.ArquivoEnviado.nome == nome, models.ArquivoEnviado.nome.like(padrao, escape="\\"))
+        )
+    }
+
+
+def registrar_arquivo(
+    db: Session,
+    nome: str,
+    tamanho: int,
+    sha256: str,
+    modificado_em: datetime,
+    total_linhas: Optional[int] = None,
+    enviado_por: Optional[str] = None
+) -> models.ArquivoEnviado:
+    """
+    Inclui ou atualiza um arquivo no catálogo.
+    """
+    arquivo = get_arquivo_por_nome(db, nome)
+    if arquivo is None:
+        arquivo = models.ArquivoEnviado(nome=nome, enviado_por=enviado_por)
+        db.add(arquivo)
+    arquivo.tamanho = tamanho
+    arquivo.sha256 = sha256
+    arquivo.modificado_em = modificado_em
+    if total_linhas is not None:
+        arquivo.total_linhas = total_linhas
+    db.commit()
+    db.refresh(arquivo)
+    return arquivo
+
+
+def remover_arquivo(db: Session, nome: str) -> None:
+    db.query(models.ArquivoEnviado).filter(models.ArquivoEnviado.nome == nome).delete(synchronize_session=False)
+    db.commit()
+
+
+def atualizar_total_linhas(db: Session, nome: str, total_linhas: Optional[int]) -> None:
+    db.query(models.ArquivoEnviado).filter(models.ArquivoEnviado.nome == nome).update(
+        {models.ArquivoEnviado.total_linhas: total_linhas}, synchronize_session=False
+    )
+    db.commit()
+
+
+def listar_arquivos(
+    db: Session,
+    offset: int = 0,
+    limit: int = 50,
+    ordenar_por: str = "modificado_em",
+    ordem: str = "desc",
+    nome: Optional[str] = None,
+    enviado_por: Optional[str] = None,
+    sha256: Optional[str] = None
+) -> Tuple[int, List[models.ArquivoEnviado]]:
+    """
+    Lista o catálogo de uploads com filtros, ordenação e paginação.
+    Retorna o total de arquivos que atendem aos filtros e a página pedida.
+    """
+    Arquivo = models.ArquivoEnviado
+    query = db.query(Arquivo)
+    if nome:
+        query = query.filter(Arquivo.nome.ilike(f"%{nome}%"))
+    if enviado_por:
+        query = query.filter(Arquivo.enviado_por == enviado_por)
+    if sha256:
+        query = query.filter(Arquivo.sha256 == sha256)
+
+    total = query.with_entities(func.count(Arquivo.id)).scalar()
+    coluna = getattr(Arquivo, ordenar_por)
+    chave = coluna.desc() if ordem == "desc" else coluna.asc()
+    # O ID desempata registros com o mesmo valor, mantendo a paginação estável
+    desempate = Arquivo.id.desc() if ordem == "desc" else Arquivo.id.asc()
+    itens = query.order_by(chave, desempate).offset(offset).limit(limit).all()
+    return total, itens
+
+
+def calcular_sha256(caminho: str, tamanho_bloco: int = 1024 * 1024) -> str:
+    hash_conteudo = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        while bloco := f.read(tamanho_bloco):
+            hash_conteudo.update(bloco)
+    return hash_conteudo.hexdigest()
+
+
+def _remover_do_catalogo(db: Session, nomes: List[str]) -> None:
+    if nomes:
+        db.query(models.ArquivoEnviado).filter(
+            models.ArquivoEnviado.nome.in_(nomes)
+        ).delete(synchronize_session=False)
+
+
+def reconciliar_arquivos(db: Session, pasta: str) -> Dict[str, Any]:
+    """
+    Reconstrói o catálogo a partir da pasta de uploads: inclui arquivos novos,
+    atualiza os que mudaram de tamanho ou data e remove os que não existem mais.
+    Arquivos com o mesmo conteúdo de outro já catalogado são contados em "duplicados".
+    """
+    from ..importacao import contar_linhas_xlsx
+
+    catalogados = {arquivo.nome: arquivo for arquivo in db.query(models.ArquivoEnviado)}
+    # Ignora as pastas de prévias e temporários de upload
+    entradas = [entrada for entrada in os.scandir(pasta) if not entrada.name.startswith(".") and entrada.is_file()]
+    presentes = {entrada.name for entrada in entradas}
+
+    # Sai primeiro o que não existe mais, liberando o hash para um arquivo novo com o mesmo conteúdo
+    removidos = [nome for nome in catalogados if nome not in presentes]
+    _remover_do_catalogo(db, removidos)
+    # O catálogo tem uma entrada por conteúdo; cópias idênticas com outro nome ficam de fora
+    dono_do_hash = {arquivo.sha256: nome for nome, arquivo in catalogados.items() if nome in presentes}
+    adicionados = atualizados = duplicados = 0
+
+    for entrada in entradas:
+        info = entrada.stat()
+        modificado_em = datetime.utcfromtimestamp(info.st_mtime)
+        arquivo = catalogados.get(entrada.name)
+        if arquivo is not None and arquivo.tamanho == info.st_size and arquivo.modificado_em == modificado_em:
+            continue
+
+        sha256 = calcular_sha256(entrada.path)
+        if dono_do_hash.get(sha256, entrada.name) != entrada.name:
+            duplicados += 1
+            if arquivo is not None:
+                dono_do_hash.pop(arquivo.sha256, None)
+                _remover_do_catalogo(db, [entrada.name])
+                removidos.append(entrada.name)
+            continue
+
+        total_linhas = None
+        if entrada.name.lower().endswith(".xlsx"):
+            try:
+                total_linhas = contar_linhas_xlsx(entrada.path)
+            except Exception:
+                pass
+        if arquivo is None:
+            arquivo = models.ArquivoEnviado(nome=entrada.name, criado_em=modificado_em)
+            db.add(arquivo)
+            adicionados += 1
+        else:
+            if dono_do_hash.get(arquivo.sha256) == entrada.name:
+                del dono_do_hash[arquivo.sha256]
+            atualizados += 1
+        dono_do_hash[sha256] = entrada.name
+        arquivo.tamanho = info.st_size
+        arquivo.sha256 = sha256
+        arquivo.modificado_em = modificado_em
+        arquivo.total_linhas = total_linhas
+
+    db.commit()
+    return {
+        "adicionados": adicionados,
+        "atualizados": atualizados,
+        "removidos": len(removidos),
+        "duplicados": duplicados,
+        "total": len(presentes),
+    }
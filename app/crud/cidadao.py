@@ -1,42 +1,87 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from .. import models
-from ..schemas.cidadao import CidadaoCreate, CidadaoUpdate
-from typing import List, Optional, Any, Union, Dict
-
-def clean_null_values(cidadao: Any) -> None:
-    """
-    Converte strings 'NULL' para None em um objeto cidadão.
-    """
-    if cidadao is None:
-        return
-        
-    fields_to_clean = [
-        'cpf', 'cpf_conjuge', 'telefone', 'email', 
-        'nome_conjuge', 'programa_social'
-    ]
-    
-    for field in fields_to_clean:
-        if hasattr(cidadao, field):
-            value = getattr(cidadao, field)
-            if isinstance(value, str) and value.upper() == 'NULL':
-                setattr(cidadao, field, None)
+from sqlalchemy import func, update, select, null
+from .. import models, busca
+from .. import cache
+from .dialeto import insert_dialeto
+from . import apuracao
+from ..cache import chave_id, chave_cpf
+from ..schemas.cidadao import CidadaoCreate, CidadaoUpdate, CidadaoInDB, CheckInVoto
+from typing import List, Optional, Any, Union, Dict, Tuple
 
 def get_cidadao(db: Session, cidadao_id: int):
     """
     Retorna um cidadão pelo ID.
     """
-    cidadao = db.query(models.Cidadao).filter(models.Cidadao.id == cidadao_id).first()
-    clean_null_values(cidadao)
-    return cidadao
+    return db.query(models.Cidadao).filter(models.Cidadao.id == cidadao_id).first()
 
 def get_cidadao_by_cpf(db: Session, cpf: str):
     """
     Retorna um cidadão pelo CPF.
     """
-    cidadao = db.query(models.Cidadao).filter(models.Cidadao.cpf == cpf).first()
-    clean_null_values(cidadao)
-    return cidadao
+    return db.query(models.Cidadao).filter(models.Cidadao.cpf == cpf).first()
+
+def _guardar_em_cache(db_cidadao: models.Cidadao) -> Dict[str, Any]:
+    """
+    Serializa o cidadão e o guarda no cache sob as chaves de ID e de CPF.
+    """
+    dados = CidadaoInDB.model_validate(db_cidadao).model_dump(mode="json")
+    cache.cache_cidadaos.definir(chave_id(db_cidadao.id), dados)
+    cache.cache_cidadaos.definir(chave_cpf(db_cidadao.cpf), dados)
+    return dados
+
+def _invalidar_cache(cidadao_id: Optional[int], *cpfs: Optional[str]) -> None:
+    chaves = [chave_cpf(cpf) for cpf in cpfs if cpf]
+    if cidadao_id is not None:
+        chaves.append(chave_id(cidadao_id))
+    cache.cache_cidadaos.remover(*chaves)
+
+def carregar_dados_cidadao(db: Session, cidadao_id: int) -> Optional[Dict[str, Any]]:
+    db_cidadao = get_cidadao(db, cidadao_id)
+    return _guardar_em_cache(db_cidadao) if db_cidadao is not None else None
+
+def carregar_dados_cidadao_por_cpf(db: Session, cpf: str) -> Optional[Dict[str, Any]]:
+    db_cidadao = get_cidadao_by_cpf(db, cpf)
+    return _guardar_em_cache(db_cidadao) if db_cidadao is not None else None
+
+def get_cidadao_dados(db: Session, cidadao_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Retorna os dados serializados de um cidadão pelo ID, passando pelo cache de leitura.
+    """
+    dados = cache.cache_cidadaos.obter(chave_id(cidadao_id))
+    if dados is None:
+        dados = carregar_dados_cidadao(db, cidadao_id)
+    return dados
+
+def get_cidadao_dados_by_cpf(db: Session, cpf: str) -> Optional[Dict[str, Any]]:
+    """
+    Retorna os dados serializados de um cidadão pelo CPF, passando pelo cache de leitura.
+    """
+    dados = cache.cache_cidadaos.obter(chave_cpf(cpf))
+    if dados is None:
+        dados = carregar_dados_cidadao_por_cpf(db, cpf)
+    return dados
+
+def filtros_cidadaos(
+    bairro: Optional[str] = None,
+    status_cadastro: Optional[str] = None,
+    ativo: Optional[bool] = None,
+    elegivel: Optional[bool] = None
+) -> list:
+    """
+    Monta as condições dos filtros opcionais da listagem de cidadãos.
+    """
+    filtros = []
+    if bairro:
+        # Compara pela chave normalizada lower(bairro), coberta pelo índice trigram no PostgreSQL
+        filtros.append(func.lower(models.Cidadao.bairro).like(f"%{bairro.lower()}%"))
+    if status_cadastro:
+        filtros.append(models.Cidadao.status_cadastro == status_cadastro)
+    if ativo is not None:
+        # A coluna pura (e não ativo = :param) casa com o predicado do índice parcial
+        filtros.append(models.Cidadao.ativo if ativo else ~models.Cidadao.ativo)
+    if elegivel is not None:
+        filtros.append(models.Cidadao.elegivel == elegivel)
+    return filtros
 
 def get_cidadaos(
     db: Session, 
@@ -45,42 +90,89 @@ def get_cidadaos(
     bairro: Optional[str] = None,
     status_cadastro: Optional[str] = None,
     ativo: Optional[bool] = None,
-    elegivel: Optional[bool] = None
+    elegivel: Optional[bool] = None,
+    after_id: Optional[int] = None
 ):
     """
     Retorna uma lista de cidadãos com filtros opcionais.
+    Se `after_id` for informado, usa paginação por cursor (id > after_id, ordenado por id)
+    em vez de offset.
     """
-    query = db.query(models.Cidadao)
+    query = db.query(models.Cidadao).filter(
+        *filtros_cidadaos(bairro=bairro, status_cadastro=status_cadastro, ativo=ativo, elegivel=elegivel)
+    )
     
-    # Aplicar filtros se fornecidos
-    if bairro:
-        query = query.filter(models.Cidadao.bairro.ilike(f"%{bairro}%"))
-    if status_cadastro:
-        query = query.filter(models.Cidadao.status_cadastro == status_cadastro)
-    if ativo is not None:
-        query = query.filter(models.Cidadao.ativo == ativo)
-    if elegivel is not None:
-        query = query.filter(models.Cidadao.elegivel == elegivel)
+    if after_id is not None:
+        query = query.filter(models.Cidadao.id > after_id).order_by(models.Cidadao.id)
+    else:
+        query = query.offset(skip)
     
-    cidadaos = query.offset(skip).limit(limit).all()
-    # Limpar valores 'NULL' em cada cidadão retornado
-    for cidadao in cidadaos:
-        clean_null_values(cidadao)
-    return cidadaos
+    return query.limit(limit).all()
+
+# Campos de CidadaoInDB, na ordem da resposta
+CAMPOS_RESPOSTA = list(CidadaoInDB.model_fields)
+# Validadores "before" do schema que alteram o valor gravado (CPF com pontuação, telefone formatado)
+NORMALIZAR_RESPOSTA = {
+    "cpf": CidadaoInDB.validate_cpf,
+    "cpf_conjuge": CidadaoInDB.validate_cpf_conjuge,
+    "telefone": CidadaoInDB.validate_telefone,
+    "email": CidadaoInDB.validate_email,
+}
+
+def get_cidadaos_linhas(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    bairro: Optional[str] = None,
+    status_cadastro: Optional[str] = None,
+    ativo: Optional[bool] = None,
+    elegivel: Optional[bool] = None,
+    after_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Igual a get_cidadaos, mas seleciona só as colunas e devolve dicionários no formato
+    de CidadaoInDB, sem criar objetos ORM nem validar cada linha pelo schema.
+    CPFs, telefone e e-mail passam pelos mesmos validadores do schema, então saem
+    iguais aos da resposta validada. Campos do schema que não existem na tabela saem como None.
+    """
+    tabela = models.Cidadao.__table__
+    consulta = select(*(
+        tabela.c[campo] if campo in tabela.c else null().label(campo)
+        for campo in CAMPOS_RESPOSTA
+    )).where(*filtros_cidadaos(bairro=bairro, status_cadastro=status_cadastro, ativo=ativo, elegivel=elegivel))
+
+    if after_id is not None:
+        consulta = consulta.where(tabela.c.id > after_id).order_by(tabela.c.id)
+    else:
+        consulta = consulta.offset(skip)
+
+    linhas = []
+    for linha in db.execute(consulta.limit(limit)):
+        dados = dict(zip(CAMPOS_RESPOSTA, linha))
+        for campo, normalizar in NORMALIZAR_RESPOSTA.items():
+            dados[campo] = normalizar(dados[campo])
+        linhas.append(dados)
+    return linhas
 
 # Função dedicada para buscar por elegibilidade
 
-def get_cidadaos_por_elegibilidade(db: Session, elegivel: bool, skip: int = 0, limit: int = 100):
+def get_cidadaos_por_elegibilidade(
+    db: Session,
+    elegivel: bool,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None
+):
     """
     Retorna uma lista de cidadãos filtrando por elegibilidade.
+    Se `after_id` for informado, usa paginação por cursor em vez de offset.
     """
-    cidadaos = db.query(models.Cidadao).filter(
-        models.Cidadao.elegivel == elegivel
-    ).offset(skip).limit(limit).all()
-    # Limpar valores 'NULL' em cada cidadão retornado
-    for cidadao in cidadaos:
-        clean_null_values(cidadao)
-    return cidadaos
+    query = db.query(models.Cidadao).filter(models.Cidadao.elegivel == elegivel)
+    if after_id is not None:
+        query = query.filter(models.Cidadao.id > after_id).order_by(models.Cidadao.id)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 def count_cidadaos(
     db: Session,
@@ -91,17 +183,9 @@ def count_cidadaos(
     """
     Retorna o número total de cidadãos com filtros opcionais.
     """
-    query = db.query(models.Cidadao)
-    
-    # Aplicar filtros se fornecidos
-    if bairro:
-        query = query.filter(models.Cidadao.bairro.ilike(f"%{bairro}%"))
-    if status_cadastro:
-        query = query.filter(models.Cidadao.status_cadastro == status_cadastro)
-    if ativo is not None:
-        query = query.filter(models.Cidadao.ativo == ativo)
-    
-    return query.count()
+    return db.query(func.count(models.Cidadao.id)).filter(
+        *filtros_cidadaos(bairro=bairro, status_cadastro=status_cadastro, ativo=ativo)
+    ).scalar()
 
 def create_cidadao(db: Session, cidadao: CidadaoCreate):
     """
@@ -123,6 +207,8 @@ def create_cidadao(db: Session, cidadao: CidadaoCreate):
     )
     
     db.add(db_cidadao)
+    db.flush()
+    apuracao.ajustar_contadores(db, [(None, apuracao.estado_contagem(db_cidadao))])
     db.commit()
     db.refresh(db_cidadao)
     return db_cidadao
@@ -132,12 +218,16 @@ def update_cidadao(db: Session, db_cidadao: models.Cidadao, cidadao: CidadaoUpda
     Atualiza os dados de um cidadão existente.
     """
     update_data = cidadao.dict(exclude_unset=True)
+    cpf_anterior = db_cidadao.cpf
+    estado_anterior = apuracao.estado_contagem(db_cidadao)
     
     for field, value in update_data.items():
         setattr(db_cidadao, field, value)
     
     db.add(db_cidadao)
+    apuracao.ajustar_contadores(db, [(estado_anterior, apuracao.estado_contagem(db_cidadao))])
     db.commit()
+    _invalidar_cache(db_cidadao.id, cpf_anterior, db_cidadao.cpf)
     db.refresh(db_cidadao)
     return db_cidadao
 
@@ -147,8 +237,11 @@ def delete_cidadao(db: Session, cidadao_id: int):
     """
     db_cidadao = get_cidadao(db, cidadao_id)
     if db_cidadao:
+        estado_anterior = apuracao.estado_contagem(db_cidadao)
         db_cidadao.ativo = False
+        apuracao.ajustar_contadores(db, [(estado_anterior, apuracao.estado_contagem(db_cidadao))])
         db.commit()
+        _invalidar_cache(cidadao_id, db_cidadao.cpf)
         db.refresh(db_cidadao)
     return db_cidadao
 
@@ -159,8 +252,11 @@ def atualizar_votou(db: Session, cidadao_id: int, votou: bool):
     db_cidadao = get_cidadao(db, cidadao_id)
     if db_cidadao is None:
         return None
+    estado_anterior = apuracao.estado_contagem(db_cidadao)
     db_cidadao.votou = votou
+    apuracao.ajustar_contadores(db, [(estado_anterior, apuracao.estado_contagem(db_cidadao))])
     db.commit()
+    _invalidar_cache(cidadao_id, db_cidadao.cpf)
     db.refresh(db_cidadao)
     return db_cidadao
 
@@ -171,25 +267,141 @@ def atualizar_elegivel(db: Session, cidadao_id: int, elegivel: bool):
     db_cidadao = get_cidadao(db, cidadao_id)
     if db_cidadao is None:
         return None
+    estado_anterior = apuracao.estado_contagem(db_cidadao)
     db_cidadao.elegivel = elegivel
+    apuracao.ajustar_contadores(db, [(estado_anterior, apuracao.estado_contagem(db_cidadao))])
     db.commit()
+    _invalidar_cache(cidadao_id, db_cidadao.cpf)
     db.refresh(db_cidadao)
     return db_cidadao
 
+def _em_lotes(valores: List[Any], tamanho_lote: int):
+    for inicio in range(0, len(valores), tamanho_lote):
+        yield valores[inicio:inicio + tamanho_lote]
+
+def registrar_votos(db: Session, itens: List[CheckInVoto], tamanho_lote: int = 1000) -> List[Dict[str, Any]]:
+    """
+    Aplica uma lista de check-ins de votação identificados por ID ou CPF, em uma transação.
+    A cada `tamanho_lote` registros é feita uma consulta e um UPDATE por valor de votou,
+    alterando apenas quem ainda não está no valor pedido (idempotente).
+    Retorna o resultado de cada item, na ordem recebida.
+    """
+    Cidadao = models.Cidadao
+    ids = {item.id for item in itens if item.id is not None}
+    cpfs = list({item.cpf for item in itens if item.cpf is not None})
+    for lote in _em_lotes(cpfs, tamanho_lote):
+        ids.update(id_ for (id_,) in db.query(Cidadao.id).filter(Cidadao.cpf.in_(lote)))
+
+    # Bloqueia as linhas até o commit para que os contadores reflitam o UPDATE. Os bloqueios
+    # são pegos em ordem crescente de id, em todos os lotes, para que dois lotes de check-in
+    # com cidadãos em comum não se travem mutuamente (deadlock)
+    linhas = []
+    for lote in _em_lotes(sorted(ids), tamanho_lote):
+        linhas.extend(db.query(
+            Cidadao.id, Cidadao.cpf, Cidadao.bairro, Cidadao.zona,
+            Cidadao.ativo, Cidadao.elegivel, Cidadao.votou
+        ).filter(Cidadao.id.in_(lote)).order_by(Cidadao.id).with_for_update().all())
+    por_id = {linha.id: linha for linha in linhas}
+    por_cpf = {linha.cpf: linha for linha in linhas}
+
+    # Itens repetidos para o mesmo cidadão: prevalece o último, os anteriores são 'substituido'
+    alvos = [por_id.get(item.id) if item.id is not None else por_cpf.get(item.cpf) for item in itens]
+    ultimo = {linha.id: indice for indice, linha in enumerate(alvos) if linha is not None}
+    votou_final = {cidadao_id: itens[indice].votou for cidadao_id, indice in ultimo.items()}
+
+    resultados: List[Dict[str, Any]] = []
+    for indice, (item, linha) in enumerate(zip(itens, alvos)):
+        if linha is None:
+            status = "nao_encontrado"
+        elif ultimo[linha.id] != indice:
+            status = "substituido"
+        else:
+            status = "atualizado" if bool(linha.votou) != item.votou else "inalterado"
+        resultados.append({
+            "indice": indice,
+            "id": linha.id if linha is not None else item.id,
+            "cpf": linha.cpf if linha is not None else item.cpf,
+            "votou": item.votou,
+            "status": status,
+        })
+
+    alterados = [por_id[cidadao_id] for cidadao_id, valor in sorted(votou_final.items())
+                 if bool(por_id[cidadao_id].votou) != valor]
+    for valor in (True, False):
+        alvo = [linha.id for linha in alterados if votou_final[linha.id] is valor]
+        for lote in _em_lotes(alvo, tamanho_lote):
+            db.execute(
+                update(Cidadao).where(Cidadao.id.in_(lote)).values(votou=valor),
+                execution_options={"synchronize_session": False}
+            )
+
+    transicoes = []
+    for linha in alterados:
+        estado = apuracao.estado_contagem(linha)
+        transicoes.append((estado, estado[:4] + (votou_final[linha.id],)))
+    apuracao.ajustar_contadores(db, transicoes)
+    db.commit()
+    cache.cache_cidadaos.remover(*(
+        chave for linha in alterados for chave in (chave_id(linha.id), chave_cpf(linha.cpf))
+    ))
+    return resultados
+
 def search_cidadaos(db: Session, search_term: str, limit: int = 10):
     """
     Busca cidadãos por nome, CPF, bairro ou endereço.
+    Usa os índices de busca textual (pg_trgm ou FTS5) quando existirem,
+    com ordenação por relevância; caso contrário, recorre ao ILIKE.
+    """
+    if busca.busca_indexada_disponivel(db):
+        return busca.buscar_cidadaos(db, search_term, limit=limit)
+    return busca.buscar_por_substring(db, search_term, limit)
+
+def upsert_cidadaos(db: Session, cidadaos: List[Dict[str, Any]]) -> Tuple[int, int]:
     """
-    search = f"%{search_term}%"
-    cidadaos = db.query(models.Cidadao).filter(
-        or_(
-            models.Cidadao.nome_completo.ilike(search),
-            models.Cidadao.cpf.ilike(search),
-            models.Cidadao.bairro.ilike(search),
-            models.Cidadao.endereco_completo.ilike(search)
+    Insere ou atualiza um lote de cidadãos usando o CPF como chave.
+    Campos nulos no lote não sobrescrevem valores já cadastrados.
+    Retorna a quantidade de registros inseridos e atualizados.
+    """
+    if not cidadaos:
+        return 0, 0
+
+    # O mesmo CPF não pode aparecer duas vezes no mesmo comando; prevalece a última linha
+    por_cpf = {cidadao["cpf"]: cidadao for cidadao in cidadaos}
+    linhas = list(por_cpf.values())
+
+    existentes = dict(
+        db.query(models.Cidadao.cpf, models.Cidadao.id).filter(
+            models.Cidadao.cpf.in_(por_cpf.keys())
+        ).all()
+    )
+
+    # Célula vazia em coluna NOT NULL não entra no comando: registros novos recebem o
+    # padrão do modelo e os existentes mantêm o valor atual. Como o executemany exige as
+    # mesmas colunas em todas as linhas, o lote é gravado em grupos por conjunto de colunas.
+    tabela = models.Cidadao.__table__
+    grupos: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for linha in linhas:
+        linha = {
+            campo: valor for campo, valor in linha.items()
+            if valor is not None or tabela.c[campo].nullable
+        }
+        grupos.setdefault(tuple(linha), []).append(linha)
+
+    insert = insert_dialeto(db)
+    for chaves, grupo in grupos.items():
+        stmt = insert(tabela)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.Cidadao.cpf],
+            set_={
+                campo: func.coalesce(stmt.excluded[campo], tabela.c[campo])
+                for campo in chaves if campo != "cpf"
+            }
         )
-    ).limit(limit).all()
-    # Limpar valores 'NULL' em cada cidadão retornado
-    for cidadao in cidadaos:
-        clean_null_values(cidadao)
-    return cidadaos
+        db.execute(stmt, grupo)
+    db.commit()
+    for cpf, cidadao_id in existentes.items():
+        _invalidar_cache(cidadao_id, cpf)
+
+    # Linhas repetidas no lote contam como atualizações do mesmo registro
+    atualizados = len(existentes) + len(cidadaos) - len(linhas)
+    return len(linhas) - len(existentes), atualizados
@@ -0,0 +1,111 @@
+"""
+Versões assíncronas das operações de cidadão, para uso com `get_async_db`.
+
+Cada função executa a operação síncrona equivalente de `cidadao.py` via `run_sync`:
+com DB_ASYNC ativo, o I/O passa pelo driver assíncrono (asyncpg/aiosqlite) sem
+bloquear o event loop; caso contrário, a sessão síncrona roda no threadpool.
+As operações que gravam no cache rodam dentro de `cache.operacoes_fora_do_loop()`,
+para que um cache com cliente síncrono (Redis) não bloqueie o event loop.
+"""
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from .. import models
+from .. import cache
+from ..cache import chave_id, chave_cpf
+from ..schemas.cidadao import CidadaoCreate, CidadaoUpdate, CheckInVoto
+from . import cidadao as crud
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from ..database import ThreadedSession
+
+    AsyncDB = Union[AsyncSession, ThreadedSession]
+
+async def get_cidadao(db: "AsyncDB", cidadao_id: int):
+    return await db.run_sync(crud.get_cidadao, cidadao_id)
+
+async def get_cidadao_by_cpf(db: "AsyncDB", cpf: str):
+    return await db.run_sync(crud.get_cidadao_by_cpf, cpf)
+
+async def _run_sync_com_cache(db: "AsyncDB", fn, *args, **kwargs):
+    async with cache.operacoes_fora_do_loop():
+        return await db.run_sync(fn, *args, **kwargs)
+
+async def get_cidadao_dados(db: "AsyncDB", cidadao_id: int) -> Optional[Dict[str, Any]]:
+    # A consulta ao cache não passa pela sessão
+    dados = await cache.cache_cidadaos.obter_async(chave_id(cidadao_id))
+    if dados is None:
+        dados = await _run_sync_com_cache(db, crud.carregar_dados_cidadao, cidadao_id)
+    return dados
+
+async def get_cidadao_dados_by_cpf(db: "AsyncDB", cpf: str) -> Optional[Dict[str, Any]]:
+    dados = await cache.cache_cidadaos.obter_async(chave_cpf(cpf))
+    if dados is None:
+        dados = await _run_sync_com_cache(db, crud.carregar_dados_cidadao_por_cpf, cpf)
+    return dados
+
+async def get_cidadaos(
+    db: "AsyncDB",
+    skip: int = 0,
+    limit: int = 100,
+    bairro: Optional[str] = None,
+    status_cadastro: Optional[str] = None,
+    ativo: Optional[bool] = None,
+    elegivel: Optional[bool] = None,
+    after_id: Optional[int] = None
+):
+    return await db.run_sync(
+        crud.get_cidadaos,
+        skip=skip,
+        limit=limit,
+        bairro=bairro,
+        status_cadastro=status_cadastro,
+        ativo=ativo,
+        elegivel=elegivel,
+        after_id=after_id
+    )
+
+async def get_cidadaos_por_elegibilidade(
+    db: "AsyncDB",
+    elegivel: bool,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None
+):
+    return await db.run_sync(
+        crud.get_cidadaos_por_elegibilidade, elegivel, skip=skip, limit=limit, after_id=after_id
+    )
+
+async def count_cidadaos(
+    db: "AsyncDB",
+    bairro: Optional[str] = None,
+    status_cadastro: Optional[str] = None,
+    ativo: Optional[bool] = None
+) -> int:
+    return await db.run_sync(
+        crud.count_cidadaos, bairro=bairro, status_cadastro=status_cadastro, ativo=ativo
+    )
+
+async def create_cidadao(db: "AsyncDB", cidadao: CidadaoCreate):
+    return await db.run_sync(crud.create_cidadao, cidadao)
+
+async def update_cidadao(db: "AsyncDB", db_cidadao: models.Cidadao, cidadao: CidadaoUpdate):
+    return await _run_sync_com_cache(db, crud.update_cidadao, db_cidadao, cidadao)
+
+async def delete_cidadao(db: "AsyncDB", cidadao_id: int):
+    return await _run_sync_com_cache(db, crud.delete_cidadao, cidadao_id)
+
+async def atualizar_votou(db: "AsyncDB", cidadao_id: int, votou: bool):
+    return await _run_sync_com_cache(db, crud.atualizar_votou, cidadao_id, votou)
+
+async def registrar_votos(db: "AsyncDB", itens: List[CheckInVoto], tamanho_lote: int = 1000) -> List[Dict[str, Any]]:
+    return await _run_sync_com_cache(db, crud.registrar_votos, itens, tamanho_lote=tamanho_lote)
+
+async def atualizar_elegivel(db: "AsyncDB", cidadao_id: int, elegivel: bool):
+    return await _run_sync_com_cache(db, crud.atualizar_elegivel, cidadao_id, elegivel)
+
+async def search_cidadaos(db: "AsyncDB", search_term: str, limit: int = 10):
+    return await db.run_sync(crud.search_cidadaos, search_term, limit=limit)
+
+async def upsert_cidadaos(db: "AsyncDB", cidadaos: List[Dict[str, Any]]) -> Tuple[int, int]:
+    return await db.run_sync(crud.upsert_cidadaos, cidadaos)
@@ -0,0 +1,14 @@
+from sqlalchemy.orm import Session
+
+def insert_dialeto(db: Session):
+    """
+    Retorna a construção INSERT ... ON CONFLICT do dialeto em uso.
+    """
+    dialeto = db.get_bind().dialect.name
+    if dialeto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialeto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert não suportado para o banco '{dialeto}'")
+    return insert
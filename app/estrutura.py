@@ -0,0 +1,117 @@
+"""
+Estrutura do banco (tabelas e colunas) para a rota /estrutura-bd.
+
+O catálogo é lido uma vez e guardado em memória. A cada pedido, só a versão do
+esquema é conferida (tabela alembic_version, quando existir): uma migração
+aplicada troca a versão e força nova leitura. Como nem toda alteração passa
+pelo Alembic, a cópia também expira após ESTRUTURA_BD_TTL segundos e é
+descartada quando o próprio app cria ou remove tabelas pelos metadados.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Connection
+
+ESTRUTURA_BD_TTL = float(os.getenv("ESTRUTURA_BD_TTL", "300"))
+
+_lock = threading.Lock()
+_cache: Dict[str, Dict[str, Any]] = {}
+
+
+def invalidar_estrutura() -> None:
+    with _lock:
+        _cache.clear()
+
+
+def versao_esquema(conn: Connection) -> Optional[str]:
+    """
+    Retorna a revisão do Alembic aplicada ao banco, ou None se não houver controle de versão.
+    """
+    if not inspect(conn).has_table("alembic_version"):
+        return None
+    return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def _ler_estrutura(conn: Connection, versao: Optional[str]) -> Dict[str, Any]:
+    inspetor = inspect(conn)
+    # Uma consulta ao catálogo para todas as tabelas, em vez de uma por tabela
+    colunas = inspetor.get_multi_columns()
+    chaves = inspetor.get_multi_pk_constraint()
+    tabelas = []
+    for (schema, nome_tabela), colunas_tabela in sorted(colunas.items(), key=lambda item: item[0][1]):
+        chave_primaria = set(chaves.get((schema, nome_tabela), {}).get("constrained_columns") or [])
+        tabelas.append({
+            "nome": nome_tabela,
+            "colunas": [
+                {
+                    "nome": coluna["name"],
+                    "tipo": str(coluna["type"]),
+                    "nulo": bool(coluna["nullable"]),
+                    "chave_primaria": coluna["name"] in chave_primaria,
+                }
+                for coluna in colunas_tabela
+            ],
+        })
+    return {"versao": versao, "gerado_em": datetime.utcnow().isoformat(), "tabelas": tabelas}
+
+
+def obter_estrutura(conn: Connection) -> Dict[str, Any]:
+    """
+    Retorna a estrutura do banco, relendo o catálogo só se a versão mudou ou a cópia expirou.
+    """
+    chave = conn.engine.url.render_as_string(hide_password=True)
+    versao = versao_esquema(conn)
+    with _lock:
+        entrada = _cache.get(chave)
+        if entrada is not None and entrada["versao"] == versao and entrada["expira_em"] > time.monotonic():
+            return entrada["estrutura"]
+
+    estrutura = _ler_estrutura(conn, versao)
+    with _lock:
+        _cache[chave] = {
+            "versao": versao,
+            "expira_em": time.monotonic() + ESTRUTURA_BD_TTL,
+            "estrutura": estrutura,
+        }
+    return estrutura
+
+
+def gerar_xml(estrutura: Dict[str, Any]) -> Iterator[str]:
+    """
+    Escreve a estrutura em XML indentado, uma tabela por vez.
+    """
+    yield '<?xml version="1.0" encoding="utf-8"?>\n<banco_de_dados>\n'
+    for tabela in estrutura["tabelas"]:
+        partes = [f"  <tabela nome={quoteattr(tabela['nome'])}>\n"]
+        for coluna in tabela["colunas"]:
+            partes.append(
+                "    <coluna>\n"
+                f"      <nome>{escape(coluna['nome'])}</nome>\n"
+                f"      <tipo>{escape(coluna['tipo'])}</tipo>\n"
+                f"      <nulo>{'SIM' if coluna['nulo'] else 'NÃO'}</nulo>\n"
+            )
+            if coluna["chave_primaria"]:
+                partes.append("      <chave_primaria>SIM</chave_primaria>\n")
+            partes.append("    </coluna>\n")
+        partes.append("  </tabela>\n")
+        yield "".join(partes)
+    yield "</banco_de_dados>\n"
+
+
+def _ao_alterar_tabelas(*args, **kwargs) -> None:
+    invalidar_estrutura()
+
+
+def monitorar_metadados(*metadados) -> None:
+    """
+    Descarta a cópia quando create_all/drop_all são executados nesses metadados.
+    """
+    for metadata in metadados:
+        for evento in ("after_create", "after_drop"):
+            if not event.contains(metadata, evento, _ao_alterar_tabelas):
+                event.listen(metadata, evento, _ao_alterar_tabelas)
@@ -0,0 +1,100 @@
+"""
+Exportação da tabela de cidadãos em NDJSON, CSV ou XLSX.
+
+As linhas são lidas com cursor no servidor (`stream_results`/`yield_per`) e
+escritas direto no formato de saída, sem criar objetos ORM nem validar cada
+linha pelo schema; o uso de memória não depende da quantidade exportada.
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+from typing import Iterator, List, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from app import models
+from app.respostas import valor_json
+
+# Linhas buscadas do cursor a cada lote
+TAMANHO_LOTE_EXPORTACAO = int(os.getenv("EXPORT_TAMANHO_LOTE", "1000"))
+
+FORMATOS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+COLUNAS_EXPORTACAO = [coluna.name for coluna in models.Cidadao.__table__.columns]
+
+
+def ler_lotes(engine: Engine, filtros: Sequence, tamanho_lote: int = TAMANHO_LOTE_EXPORTACAO) -> Iterator[List[tuple]]:
+    """
+    Percorre os cidadãos filtrados em ordem de ID, entregando lotes de tuplas.
+    """
+    tabela = models.Cidadao.__table__
+    consulta = select(*(tabela.c[nome] for nome in COLUNAS_EXPORTACAO)).where(*filtros).order_by(tabela.c.id)
+    with engine.connect() as conn:
+        resultado = conn.execution_options(stream_results=True, yield_per=tamanho_lote).execute(consulta)
+        for particao in resultado.partitions():
+            yield particao
+
+
+def gerar_ndjson(lotes: Iterator[List[tuple]]) -> Iterator[bytes]:
+    for lote in lotes:
+        yield "".join(
+            json.dumps(dict(zip(COLUNAS_EXPORTACAO, linha)), ensure_ascii=False, default=valor_json) + "\n"
+            for linha in lote
+        ).encode("utf-8")
+
+
+def gerar_csv(lotes: Iterator[List[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    # BOM para o Excel reconhecer o UTF-8
+    buffer.write("\ufeff")
+    escritor.writerow(COLUNAS_EXPORTACAO)
+    for lote in lotes:
+        escritor.writerows(lote)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gerar_xlsx(lotes: Iterator[List[tuple]], tamanho_bloco: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    O XLSX é um ZIP e só pode ser enviado depois de fechado: as linhas são
+    gravadas em modo write-only num arquivo temporário, que é então transmitido.
+    """
+    from openpyxl import Workbook
+
+    arquivo = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False)
+    arquivo.close()
+    try:
+        planilha = Workbook(write_only=True)
+        aba = planilha.create_sheet("cidadaos")
+        aba.append(COLUNAS_EXPORTACAO)
+        for lote in lotes:
+            for linha in lote:
+                aba.append(tuple(linha))
+        planilha.save(arquivo.name)
+
+        with open(arquivo.name, "rb") as f:
+            while bloco := f.read(tamanho_bloco):
+                yield bloco
+    finally:
+        os.unlink(arquivo.name)
+
+
+GERADORES = {"ndjson": gerar_ndjson, "csv": gerar_csv, "xlsx": gerar_xlsx}
+
+
+def exportar_cidadaos(engine: Engine, formato: str, filtros: Sequence) -> Iterator[bytes]:
+    """
+    Gera o conteúdo da exportação no formato pedido, lote a lote.
+    """
+    return GERADORES[formato](ler_lotes(engine, filtros))
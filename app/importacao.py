@@ -0,0 +1,176 @@
+import re
+import time
+import unicodedata
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.crud import cidadao as crud_cidadao
+from app.schemas.cidadao import CidadaoCreate
+
+# Campos obrigatórios na tabela de cidadãos
+CAMPOS_OBRIGATORIOS = ('nome_completo', 'cpf', 'bairro', 'endereco_completo')
+
+# Quantidade máxima de erros detalhados devolvidos no resultado
+MAX_ERROS = 100
+
+
+class ImportacaoCancelada(Exception):
+    """
+    Lançada pelo callback de progresso para interromper a importação entre dois lotes.
+    """
+
+
+def normalizar_cabecalho(valor: Any) -> str:
+    """
+    Converte o cabeçalho da planilha para o nome do campo ('Endereço Completo' -> 'endereco_completo').
+    """
+    texto = unicodedata.normalize('NFKD', str(valor or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r'[^a-z0-9]+', '_', texto.strip().lower()).strip('_')
+
+
+def contar_linhas_xlsx(caminho: str) -> Optional[int]:
+    """
+    Estima o total de linhas de dados pela dimensão gravada na planilha, sem percorrê-la.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(caminho, read_only=True)
+    try:
+        max_row = workbook.active.max_row
+        return max(max_row - 1, 0) if max_row else None
+    finally:
+        workbook.close()
+
+
+def ler_linhas_xlsx(caminho: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Lê a primeira aba da planilha linha a linha, sem carregar o arquivo inteiro em memória.
+    A primeira linha é tratada como cabeçalho; colunas desconhecidas e linhas vazias são ignoradas.
+    Produz pares (número da linha na planilha, dados da linha).
+    """
+    from openpyxl import load_workbook
+
+    campos = set(CidadaoCreate.model_fields)
+    workbook = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        linhas = workbook.active.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+        colunas = [
+            (indice, nome) for indice, nome in enumerate(map(normalizar_cabecalho, cabecalho))
+            if nome in campos
+        ]
+        for numero, valores in enumerate(linhas, start=2):
+            if not any(v is not None and str(v).strip() for v in valores):
+                continue
+            yield numero, {nome: valores[indice] if indice < len(valores) else None for indice, nome in colunas}
+    finally:
+        workbook.close()
+
+
+def normalizar_linha(linha: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aplica a mesma normalização de POST /cidadaos/ a uma linha da planilha.
+    Lança ValueError se a linha não puder ser importada.
+    """
+    for campo, valor in linha.items():
+        # Células numéricas chegam como float (11987654321.0); sem isto virariam "...0"
+        if isinstance(valor, float) and valor.is_integer():
+            linha[campo] = int(valor)
+    for campo in ('cpf', 'cpf_conjuge'):
+        # CPFs numéricos perdem os zeros à esquerda no Excel
+        if isinstance(linha.get(campo), int):
+            linha[campo] = str(linha[campo]).zfill(11)
+    for campo, valor in linha.items():
+        if isinstance(valor, str):
+            valor = valor.strip()
+            linha[campo] = None if valor.upper() in ('', 'NULL') else valor
+        elif valor is not None and campo not in ('cpf', 'cpf_conjuge'):
+            linha[campo] = str(valor)
+
+    try:
+        cidadao = CidadaoCreate(**linha)
+    except ValidationError as e:
+        raise ValueError("; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+
+    # Só as colunas presentes na planilha: as ausentes não sobrescrevem cadastros existentes
+    # e, em registros novos, ficam com o padrão do modelo (status_cadastro="Ativo")
+    dados = cidadao.model_dump(include=set(linha))
+    faltando = [campo for campo in CAMPOS_OBRIGATORIOS if not dados.get(campo)]
+    if faltando:
+        raise ValueError(f"Campos obrigatórios ausentes ou inválidos: {', '.join(faltando)}")
+    return dados
+
+
+def importar_linhas(
+    db: Session,
+    linhas: Iterator[Tuple[int, Dict[str, Any]]],
+    tamanho_lote: int = 1000,
+    progresso: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Importa as linhas para a tabela de cidadãos em lotes de upsert por CPF.
+    Retorna as contagens de inseridos, atualizados e rejeitados e a vazão obtida.
+    Se informado, `progresso` é chamado com o resultado parcial após cada lote gravado.
+    """
+    inicio = time.perf_counter()
+    resultado = {"inseridos": 0, "atualizados": 0, "rejeitados": 0, "total_linhas": 0, "erros": []}
+    lote: List[Dict[str, Any]] = []
+    numeros_lote: List[int] = []
+
+    def registrar_erro(linha: Optional[int], mensagem: str):
+        if len(resultado["erros"]) < MAX_ERROS:
+            resultado["erros"].append({"linha": linha, "erro": mensagem})
+
+    def gravar_lote():
+        try:
+            inseridos, atualizados = crud_cidadao.upsert_cidadaos(db, lote)
+            resultado["inseridos"] += inseridos
+            resultado["atualizados"] += atualizados
+        except SQLAlchemyError as e:
+            db.rollback()
+            resultado["rejeitados"] += len(lote)
+            registrar_erro(
+                numeros_lote[0],
+                f"Lote das linhas {numeros_lote[0]} a {numeros_lote[-1]} rejeitado: {getattr(e, 'orig', e)}"
+            )
+        lote.clear()
+        numeros_lote.clear()
+        if progresso:
+            progresso(resultado)
+
+    for numero, linha in linhas:
+        resultado["total_linhas"] += 1
+        try:
+            lote.append(normalizar_linha(linha))
+            numeros_lote.append(numero)
+        except ValueError as e:
+            resultado["rejeitados"] += 1
+            registrar_erro(numero, str(e))
+            continue
+        if len(lote) >= tamanho_lote:
+            gravar_lote()
+    if lote:
+        gravar_lote()
+
+    duracao = time.perf_counter() - inicio
+    resultado["duracao_segundos"] = round(duracao, 3)
+    resultado["linhas_por_segundo"] = round(resultado["total_linhas"] / duracao, 1) if duracao > 0 else None
+    return resultado
+
+
+def importar_xlsx(
+    db: Session,
+    caminho: str,
+    tamanho_lote: int = 1000,
+    progresso: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Importa uma planilha XLSX para a tabela de cidadãos de forma incremental.
+    """
+    return importar_linhas(db, ler_linhas_xlsx(caminho), tamanho_lote=tamanho_lote, progresso=progresso)
@@ -0,0 +1,236 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from app import metricas
+from app.crud.apuracao import reconciliar_contadores
+from app.database import SessionLocal
+from app.importacao import ImportacaoCancelada, contar_linhas_xlsx, importar_xlsx
+
+# Quantidade de importações processadas em paralelo
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))
+
+# Quantidade de jobs finalizados mantidos em memória para consulta
+MAX_JOBS_FINALIZADOS = int(os.getenv("IMPORT_MAX_JOBS_FINALIZADOS", "100"))
+
+# Intervalo da reconciliação dos contadores de apuração (0 desativa)
+CONTADORES_RECONCILIAR_SEGUNDOS = float(os.getenv("CONTADORES_RECONCILIAR_SEGUNDOS", "300"))
+
+PENDENTE = "pendente"
+PROCESSANDO = "processando"
+CONCLUIDO = "concluido"
+CANCELADO = "cancelado"
+ERRO = "erro"
+
+logger = logging.getLogger(__name__)
+
+FINALIZADOS = (CONCLUIDO, CANCELADO, ERRO)
+
+
+class ImportJob:
+    """
+    Estado de uma importação de planilha executada em segundo plano.
+    """
+
+    def __init__(self, nome_arquivo: str, caminho: str, tamanho_lote: int):
+        self.id = uuid.uuid4().hex
+        self.nome_arquivo = nome_arquivo
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self.status = PENDENTE
+        self.total_linhas: Optional[int] = None
+        self.resultado: Dict[str, Any] = {"inseridos": 0, "atualizados": 0, "rejeitados": 0, "total_linhas": 0, "erros": []}
+        self.erro: Optional[str] = None
+        self.criado_em = time.time()
+        self.iniciado_em: Optional[float] = None
+        self.finalizado_em: Optional[float] = None
+        self.cancelar = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        processadas = self.resultado["total_linhas"]
+        if self.status == CONCLUIDO:
+            percentual = 100.0
+        elif self.total_linhas:
+            percentual = round(min(processadas / self.total_linhas, 1.0) * 100, 1)
+        else:
+            percentual = 0.0
+
+        duracao = None
+        if self.iniciado_em:
+            duracao = (self.finalizado_em or time.time()) - self.iniciado_em
+
+        return {
+            "id": self.id,
+            "nome_arquivo": self.nome_arquivo,
+            "status": self.status,
+            "progresso_percentual": percentual,
+            "linhas_processadas": processadas,
+            "total_linhas_estimado": self.total_linhas,
+            "inseridos": self.resultado["inseridos"],
+            "atualizados": self.resultado["atualizados"],
+            "rejeitados": self.resultado["rejeitados"],
+            "linhas_por_segundo": round(processadas / duracao, 1) if duracao else None,
+            "erros": list(self.resultado["erros"]),
+            "erro": self.erro,
+            "criado_em": self.criado_em,
+            "iniciado_em": self.iniciado_em,
+            "finalizado_em": self.finalizado_em,
+        }
+
+
+_executor = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix="importacao")
+_jobs: Dict[str, ImportJob] = {}
+_lock = threading.Lock()
+
+
+def _executar(job: ImportJob):
+    # Sob o mesmo lock de cancelar_job: um job cancelado enquanto pendente nunca começa
+    with _lock:
+        if job.status != PENDENTE:
+            return
+        job.status = PROCESSANDO
+        job.iniciado_em = time.time()
+
+    def progresso(parcial: Dict[str, Any]):
+        job.resultado = parcial
+        if job.cancelar.is_set():
+            raise ImportacaoCancelada()
+
+    db = SessionLocal()
+    try:
+        job.total_linhas = contar_linhas_xlsx(job.caminho)
+        job.resultado = importar_xlsx(db, job.caminho, tamanho_lote=job.tamanho_lote, progresso=progresso)
+        job.status = CONCLUIDO
+    except ImportacaoCancelada:
+        # Os lotes já gravados permanecem no banco
+        job.status = CANCELADO
+    except Exception as e:
+        db.rollback()
+        job.status = ERRO
+        job.erro = str(e)
+        logger.exception("Falha na importação", extra={"job": job.id, "arquivo": job.nome_arquivo})
+    finally:
+        try:
+            # O upsert em lote não ajusta os contadores incrementalmente
+            if job.resultado["inseridos"] or job.resultado["atualizados"]:
+                reconciliar_contadores(db)
+        except Exception as e:
+            db.rollback()
+            job.erro = job.erro or f"Falha ao reconciliar contadores: {e}"
+            logger.exception("Falha ao reconciliar contadores após importação", extra={"job": job.id})
+        db.close()
+        job.finalizado_em = time.time()
+        metricas.registrar_importacao(job.status, job.resultado, job.finalizado_em - job.iniciado_em)
+        logger.info(
+            "Importação finalizada",
+            extra={
+                "job": job.id,
+                "status": job.status,
+                "duracao_s": round(job.finalizado_em - job.iniciado_em, 3),
+                "inseridos": job.resultado["inseridos"],
+                "atualizados": job.resultado["atualizados"],
+                "rejeitados": job.resultado["rejeitados"],
+            }
+        )
+
+
+def _descartar_antigos():
+    finalizados = sorted(
+        (job for job in _jobs.values() if job.status in FINALIZADOS),
+        key=lambda job: job.finalizado_em or 0
+    )
+    for job in finalizados[:max(len(finalizados) - MAX_JOBS_FINALIZADOS, 0)]:
+        del _jobs[job.id]
+
+
+def enfileirar_importacao(nome_arquivo: str, caminho: str, tamanho_lote: int = 1000) -> ImportJob:
+    """
+    Cria um job de importação e o envia para o pool de workers.
+    """
+    job = ImportJob(nome_arquivo, caminho, tamanho_lote)
+    with _lock:
+        _descartar_antigos()
+        _jobs[job.id] = job
+    # O contexto acompanha o job, para que seus logs tragam o id da requisição que o criou
+    _executor.submit(contextvars.copy_context().run, _executar, job)
+    return job
+
+
+def obter_job(job_id: str) -> Optional[ImportJob]:
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def listar_jobs() -> List[ImportJob]:
+    with _lock:
+        return sorted(_jobs.values(), key=lambda job: job.criado_em, reverse=True)
+
+
+def cancelar_job(job_id: str) -> Optional[ImportJob]:
+    """
+    Solicita o cancelamento do job; a importação para ao final do lote em andamento.
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None and job.status not in FINALIZADOS:
+            job.cancelar.set()
+            if job.status == PENDENTE:
+                job.status = CANCELADO
+                job.finalizado_em = time.time()
+    return job
+
+
+class ReconciliacaoPeriodica:
+    """
+    Thread que recalcula periodicamente os contadores de apuração,
+    corrigindo divergências deixadas por escritas que não os ajustam.
+    """
+
+    def __init__(self, intervalo: float = CONTADORES_RECONCILIAR_SEGUNDOS):
+        self.intervalo = intervalo
+        self.ultima_execucao: Optional[float] = None
+        self.ultimo_erro: Optional[str] = None
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def executar(self) -> int:
+        db = SessionLocal()
+        try:
+            grupos = reconciliar_contadores(db)
+            self.ultima_execucao = time.time()
+            self.ultimo_erro = None
+            return grupos
+        except Exception as e:
+            db.rollback()
+            self.ultimo_erro = str(e)
+            raise
+        finally:
+            db.close()
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.executar()
+            except Exception:
+                logger.exception("Falha na reconciliação periódica dos contadores")
+
+    def iniciar(self):
+        if self.intervalo <= 0 or self._thread is not None:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="reconciliacao-contadores", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+reconciliacao_contadores = ReconciliacaoPeriodica()
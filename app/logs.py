@@ -0,0 +1,176 @@
+"""
+Logs estruturados em JSON, gravados fora do event loop.
+
+Os módulos usam `logging.getLogger(__name__)` normalmente. O logger "app" recebe
+um QueueHandler: a chamada de log só serializa o registro e o coloca em uma fila,
+e um QueueListener em thread própria faz a escrita em stdout. Cada linha traz o
+id da requisição (cabeçalho X-Request-ID, recebido ou gerado), que acompanha o
+handler no threadpool por estar em uma ContextVar.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" (padrão) ou "texto", mais legível no desenvolvimento
+LOG_FORMATO = os.getenv("LOG_FORMATO", "json").lower()
+# Registros aguardando escrita; com a fila cheia, novos registros são descartados
+LOG_FILA = int(os.getenv("LOG_FILA", "10000"))
+
+CABECALHO_REQUEST_ID = "x-request-id"
+# Registros feitos fora de uma requisição (inicialização, threads de fundo)
+SEM_REQUEST_ID = "-"
+# Ids recebidos do cliente só são aceitos se forem curtos e sem caracteres de controle
+_REQUEST_ID_VALIDO = re.compile(r"^[A-Za-z0-9._:\-]{1,128}$")
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Atributos de todo LogRecord; o que sobra veio de `extra=` e vai como campo do JSON
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+
+class FiltroRequestId(logging.Filter):
+    """
+    Anota o registro com o id da requisição em andamento, na thread que fez o log.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get() or SEM_REQUEST_ID
+        return True
+
+
+class FormatadorJSON(logging.Formatter):
+    """
+    Uma linha JSON por registro: horário, nível, logger, mensagem, request_id e os campos de `extra=`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        registro = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+        }
+        if getattr(record, "request_id", SEM_REQUEST_ID) != SEM_REQUEST_ID:
+            registro["request_id"] = record.request_id
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO and not chave.startswith("_"):
+                registro[chave] = valor
+        if record.exc_info:
+            registro["excecao"] = self.formatException(record.exc_info)
+        if orjson is not None:
+            return orjson.dumps(registro, default=str).decode()
+        return json.dumps(registro, default=str, ensure_ascii=False)
+
+
+class _QueueHandlerSemBloqueio(logging.handlers.QueueHandler):
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Melhor perder um log do que travar a requisição esperando a escrita
+            pass
+
+
+def configurar() -> None:
+    """
+    Liga o logger "app" à fila e inicia a thread de escrita. Chamadas repetidas não têm efeito.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    if LOG_FORMATO == "texto":
+        formatador = logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+    else:
+        formatador = FormatadorJSON()
+
+    # O registro é formatado antes de entrar na fila (exceções e argumentos já resolvidos);
+    # a thread do listener só escreve a linha pronta
+    fila: queue.Queue = queue.Queue(maxsize=LOG_FILA)
+    handler_fila = _QueueHandlerSemBloqueio(fila)
+    handler_fila.addFilter(FiltroRequestId())
+    handler_fila.setFormatter(formatador)
+
+    saida = logging.StreamHandler(sys.stdout)
+    saida.setFormatter(logging.Formatter("%(message)s"))
+
+    logger = logging.getLogger("app")
+    logger.setLevel(LOG_LEVEL)
+    logger.addHandler(handler_fila)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(fila, saida)
+    _listener.start()
+    atexit.register(parar)
+
+
+def parar() -> None:
+    """
+    Escreve os registros pendentes e encerra a thread de escrita.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        logger = logging.getLogger("app")
+        for handler in list(logger.handlers):
+            if isinstance(handler, _QueueHandlerSemBloqueio):
+                logger.removeHandler(handler)
+
+
+class RequestIdMiddleware:
+    """
+    Middleware ASGI que define o id da requisição e o devolve no cabeçalho X-Request-ID.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        recebido = None
+        for nome, valor in scope.get("headers", []):
+            if nome == CABECALHO_REQUEST_ID.encode():
+                recebido = valor.decode("latin-1")
+                break
+        request_id = recebido if recebido and _REQUEST_ID_VALIDO.match(recebido) else uuid.uuid4().hex
+        token = _request_id.set(request_id)
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                cabecalhos = list(mensagem.get("headers", []))
+                cabecalhos.append((CABECALHO_REQUEST_ID.encode(), request_id.encode("latin-1")))
+                mensagem = {**mensagem, "headers": cabecalhos}
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _request_id.reset(token)
+
+
+def instalar(app) -> None:
+    """
+    Configura os logs e adiciona o middleware de id da requisição.
+    """
+    configurar()
+    app.add_middleware(RequestIdMiddleware)
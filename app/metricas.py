@@ -0,0 +1,370 @@
+"""
+Métricas da aplicação e exposição no formato texto do Prometheus (GET /metrics).
+
+Contadores, medidores e histogramas guardam valores em memória, com um lock por
+métrica e sem alocação no caminho quente além da tupla de rótulos. Valores que já
+existem em outros módulos (cache, pool de conexões, jobs de importação) são lidos
+só no momento da coleta.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Desativa o middleware, os eventos de SQL das métricas e a rota /metrics
+METRICAS = os.getenv("METRICAS", "true").lower() in ("1", "true", "yes")
+
+# Limites padrão (em segundos) para histogramas de latência
+LIMITES_LATENCIA = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Comandos SQL costumam levar menos de 1 ms
+LIMITES_SQL = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+# Jobs de importação levam de segundos a minutos
+LIMITES_IMPORTACAO = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+
+class Histograma:
+    """
+    Histograma cumulativo de baixo custo, seguro para uso entre threads.
+    """
+
+    def __init__(self, limites: Iterable[float] = LIMITES_LATENCIA):
+        self.limites = tuple(sorted(limites))
+        self._contagens = [0] * (len(self.limites) + 1)
+        self.soma = 0.0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float) -> None:
+        indice = bisect_left(self.limites, valor)
+        with self._lock:
+            self._contagens[indice] += 1
+            self.soma += valor
+            self.total += 1
+
+    def buckets(self) -> Dict[str, int]:
+        """
+        Contagens acumuladas por limite superior ('le'), incluindo '+Inf'.
+        """
+        with self._lock:
+            contagens = list(self._contagens)
+        acumulado = 0
+        resultado = {}
+        for limite, contagem in zip(self.limites + (float("inf"),), contagens):
+            acumulado += contagem
+            resultado["+Inf" if limite == float("inf") else repr(limite)] = acumulado
+        return resultado
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"buckets": self.buckets(), "soma": round(self.soma, 6), "total": self.total}
+
+
+def _escapar(valor: Any) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _rotulos(nomes: Tuple[str, ...], valores: Tuple, extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor: float) -> str:
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    """
+    Contador monotônico com rótulos.
+    """
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Tuple[str, ...] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self._valores: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, rotulos: Tuple = (), valor: float = 1) -> None:
+        with self._lock:
+            self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+
+    def valor(self, rotulos: Tuple = ()) -> float:
+        return self._valores.get(rotulos, 0)
+
+    def amostras(self) -> List[str]:
+        with self._lock:
+            valores = list(self._valores.items())
+        return [f"{self.nome}{_rotulos(self.rotulos, chave)} {_numero(valor)}" for chave, valor in valores]
+
+
+class Medidor(Contador):
+    """
+    Valor que sobe e desce (requisições em andamento, por exemplo).
+    """
+    tipo = "gauge"
+
+    def decrementar(self, rotulos: Tuple = (), valor: float = 1) -> None:
+        self.incrementar(rotulos, -valor)
+
+
+class HistogramaRotulado:
+    """
+    Um Histograma por combinação de rótulos.
+    """
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Tuple[str, ...] = (), limites: Iterable[float] = LIMITES_LATENCIA):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self.limites = tuple(limites)
+        self._series: Dict[Tuple, Histograma] = {}
+        self._lock = threading.Lock()
+
+    def serie(self, rotulos: Tuple = ()) -> Histograma:
+        histograma = self._series.get(rotulos)
+        if histograma is None:
+            with self._lock:
+                histograma = self._series.setdefault(rotulos, Histograma(self.limites))
+        return histograma
+
+    def observar(self, rotulos: Tuple, valor: float) -> None:
+        self.serie(rotulos).observar(valor)
+
+    def amostras(self) -> List[str]:
+        with self._lock:
+            series = list(self._series.items())
+        linhas = []
+        for chave, histograma in series:
+            linhas.extend(amostras_histograma(self.nome, self.rotulos, chave, histograma))
+        return linhas
+
+
+def amostras_histograma(nome: str, nomes_rotulos: Tuple[str, ...], rotulos: Tuple, histograma: Histograma) -> List[str]:
+    """
+    Linhas _bucket (acumuladas, com le="+Inf"), _sum e _count de um Histograma.
+    """
+    dados = histograma.to_dict()
+    linhas = []
+    for limite, contagem in dados["buckets"].items():
+        rotulos_bucket = _rotulos(nomes_rotulos, rotulos, f'le="{limite}"')
+        linhas.append(f"{nome}_bucket{rotulos_bucket} {contagem}")
+    linhas.append(f"{nome}_sum{_rotulos(nomes_rotulos, rotulos)} {_numero(float(dados['soma']))}")
+    linhas.append(f"{nome}_count{_rotulos(nomes_rotulos, rotulos)} {dados['total']}")
+    return linhas
+
+
+def _cabecalho(nome: str, ajuda: str, tipo: str) -> List[str]:
+    return [f"# HELP {nome} {ajuda}", f"# TYPE {nome} {tipo}"]
+
+
+requisicoes = Contador(
+    "fumapis_requisicoes_http_total", "Requisições HTTP concluídas.", ("metodo", "rota", "status")
+)
+duracao_requisicoes = HistogramaRotulado(
+    "fumapis_requisicoes_http_duracao_segundos", "Duração das requisições HTTP por rota.", ("metodo", "rota")
+)
+requisicoes_em_andamento = Medidor(
+    "fumapis_requisicoes_http_em_andamento", "Requisições HTTP sendo atendidas."
+)
+consultas_sql = Contador(
+    "fumapis_consultas_sql_total", "Comandos SQL executados.", ("operacao",)
+)
+duracao_consultas_sql = HistogramaRotulado(
+    "fumapis_consultas_sql_duracao_segundos", "Duração dos comandos SQL.", ("operacao",), LIMITES_SQL
+)
+importacoes = Contador(
+    "fumapis_importacoes_total", "Jobs de importação finalizados.", ("status",)
+)
+linhas_importadas = Contador(
+    "fumapis_importacao_linhas_total", "Linhas de planilha processadas pelos jobs de importação.", ("resultado",)
+)
+duracao_importacoes = HistogramaRotulado(
+    "fumapis_importacao_duracao_segundos", "Duração dos jobs de importação.", limites=LIMITES_IMPORTACAO
+)
+
+REGISTRO = [
+    requisicoes, duracao_requisicoes, requisicoes_em_andamento,
+    consultas_sql, duracao_consultas_sql,
+    importacoes, linhas_importadas, duracao_importacoes,
+]
+
+
+def _coletar_cache() -> List[str]:
+    from app import cache
+
+    caches = (("cidadaos", cache.cache_cidadaos), ("usuarios", cache.cache_usuarios))
+    linhas = []
+    for nome, chave, ajuda, tipo in (
+        ("fumapis_cache_acertos_total", "hits", "Leituras encontradas no cache.", "counter"),
+        ("fumapis_cache_falhas_total", "misses", "Leituras não encontradas no cache.", "counter"),
+        ("fumapis_cache_invalidacoes_total", "invalidacoes", "Chaves removidas do cache.", "counter"),
+        ("fumapis_cache_taxa_acerto", "hit_rate", "Fração das leituras encontradas no cache.", "gauge"),
+    ):
+        linhas.extend(_cabecalho(nome, ajuda, tipo))
+        for rotulo, instancia in caches:
+            valor = instancia.metricas()[chave]
+            if valor is not None:
+                linhas.append(f'{nome}{{cache="{rotulo}"}} {_numero(valor)}')
+    return linhas
+
+
+def _coletar_pool() -> List[str]:
+    from sqlalchemy.pool import QueuePool
+    from app.database import async_engine, engine
+
+    engines = [("sincrono", engine)]
+    if async_engine is not None:
+        engines.append(("assincrono", async_engine.sync_engine))
+    em_uso = _cabecalho("fumapis_pool_conexoes_em_uso", "Conexões do pool em uso.", "gauge")
+    timeouts = _cabecalho("fumapis_pool_timeouts_total", "Esperas por conexão que estouraram o timeout.", "counter")
+    espera = _cabecalho("fumapis_pool_espera_segundos", "Espera por uma conexão livre do pool.", "histogram")
+    for rotulo, alvo in engines:
+        pool = alvo.pool
+        if isinstance(pool, QueuePool):
+            em_uso.append(f'fumapis_pool_conexoes_em_uso{{engine="{rotulo}"}} {pool.checkedout()}')
+        metricas_pool = getattr(pool, "metricas", None)
+        if metricas_pool:
+            timeouts.append(f'fumapis_pool_timeouts_total{{engine="{rotulo}"}} {metricas_pool["timeouts"]}')
+            espera.extend(amostras_histograma("fumapis_pool_espera_segundos", ("engine",), (rotulo,), metricas_pool["espera"]))
+    return em_uso + timeouts + espera
+
+
+def _coletar_jobs() -> List[str]:
+    from app import jobs
+
+    por_status: Dict[str, int] = {jobs.PENDENTE: 0, jobs.PROCESSANDO: 0}
+    for job in jobs.listar_jobs():
+        if job.status in por_status:
+            por_status[job.status] += 1
+    linhas = _cabecalho("fumapis_importacoes_em_andamento", "Jobs de importação na fila ou em processamento.", "gauge")
+    linhas.extend(f'fumapis_importacoes_em_andamento{{status="{status}"}} {total}' for status, total in por_status.items())
+    return linhas
+
+
+COLETORES: List[Callable[[], List[str]]] = [_coletar_cache, _coletar_pool, _coletar_jobs]
+
+
+def expor() -> str:
+    """
+    Todas as métricas no formato texto do Prometheus (versão 0.0.4).
+    """
+    linhas: List[str] = []
+    for metrica in REGISTRO:
+        linhas.extend(_cabecalho(metrica.nome, metrica.ajuda, metrica.tipo))
+        linhas.extend(metrica.amostras())
+    for coletor in COLETORES:
+        linhas.extend(coletor())
+    return "\n".join(linhas) + "\n"
+
+
+def _operacao(statement: str) -> str:
+    palavra = statement.lstrip()[:8].split(None, 1)
+    return palavra[0].upper() if palavra else "OUTRA"
+
+
+# Recebem (comando, duração) de cada comando SQL medido. Um único par de eventos por
+# engine mede o comando uma vez e repassa a duração às métricas e ao perfil SQL.
+OBSERVADORES_SQL: List[Callable[[str, float], None]] = []
+
+
+def _antes_de_executar(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metricas_inicio = time.perf_counter()
+
+
+def _depois_de_executar(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, "_metricas_inicio", None)
+    if inicio is None:
+        return
+    duracao = time.perf_counter() - inicio
+    for observador in OBSERVADORES_SQL:
+        observador(statement, duracao)
+
+
+def _contar_consulta(statement: str, duracao: float) -> None:
+    operacao = _operacao(statement)
+    consultas_sql.incrementar((operacao,))
+    duracao_consultas_sql.observar((operacao,), duracao)
+
+
+def observar_sql(engine_alvo, observador: Callable[[str, float], None]) -> None:
+    """
+    Mede os comandos SQL de um engine síncrono ou assíncrono e repassa cada duração ao observador.
+    """
+    from sqlalchemy import event
+
+    alvo = getattr(engine_alvo, "sync_engine", engine_alvo)
+    for nome, funcao in (
+        ("before_cursor_execute", _antes_de_executar),
+        ("after_cursor_execute", _depois_de_executar),
+    ):
+        if not event.contains(alvo, nome, funcao):
+            event.listen(alvo, nome, funcao)
+    if observador not in OBSERVADORES_SQL:
+        OBSERVADORES_SQL.append(observador)
+
+
+def monitorar_engine(engine_alvo) -> None:
+    """
+    Conta e mede os comandos SQL de um engine síncrono ou assíncrono.
+    """
+    observar_sql(engine_alvo, _contar_consulta)
+
+
+def registrar_importacao(status: str, resultado: Dict[str, Any], duracao: Optional[float]) -> None:
+    importacoes.incrementar((status,))
+    for chave in ("inseridos", "atualizados", "rejeitados"):
+        if resultado.get(chave):
+            linhas_importadas.incrementar((chave,), resultado[chave])
+    if duracao is not None:
+        duracao_importacoes.observar((), duracao)
+
+
+class MetricasMiddleware:
+    """
+    Middleware ASGI: contagem, duração por rota (modelo do caminho) e requisições em andamento.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        status = 500
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            await send(mensagem)
+
+        requisicoes_em_andamento.incrementar()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            requisicoes_em_andamento.decrementar()
+            # O modelo da rota ('/cidadaos/{cidadao_id}') mantém a cardinalidade baixa
+            rota = getattr(scope.get("route"), "path", None) or "<sem rota>"
+            metodo = scope["method"]
+            requisicoes.incrementar((metodo, rota, str(status)))
+            duracao_requisicoes.observar((metodo, rota), time.perf_counter() - inicio)
+
+
+def instalar(app) -> None:
+    """
+    Liga as métricas no app: eventos nos engines do app.database e o middleware.
+    """
+    from app.database import async_engine, engine
+
+    monitorar_engine(engine)
+    if async_engine is not None:
+        monitorar_engine(async_engine)
+    app.add_middleware(MetricasMiddleware)
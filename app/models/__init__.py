@@ -1,10 +1,14 @@
 # Inicializador do pacote models
 from .user import UserDB, UserCreate, UserInDB, UserOut
 from .cidadao import Cidadao
+from .contador import ContadorApuracao
+from .arquivo import ArquivoEnviado
 from .base import Base
 
 __all__ = [
     'UserDB', 'UserCreate', 'UserInDB', 'UserOut',  # Modelos de usuário
     'Cidadao',  # Modelo de cidadão
+    'ContadorApuracao',  # Contadores de comparecimento
+    'ArquivoEnviado',  # Catálogo de uploads
     'Base'      # Base para os modelos
 ]
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from datetime import datetime
+from .base import Base
+
+class ArquivoEnviado(Base):
+    """
+    Catálogo dos arquivos da pasta de uploads, para listar sem varrer o diretório.
+    Cada conteúdo (sha256) aparece uma vez: cópias idênticas não são catalogadas.
+    """
+    __tablename__ = "arquivos_enviados"
+
+    id = Column(Integer, primary_key=True, index=True)
+    nome = Column(String(255), nullable=False, unique=True, index=True)
+    tamanho = Column(BigInteger, nullable=False, index=True)
+    sha256 = Column(String(64), nullable=False, unique=True, index=True)
+    total_linhas = Column(Integer, nullable=True)
+    enviado_por = Column(String(100), nullable=True, index=True)
+    criado_em = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    modificado_em = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
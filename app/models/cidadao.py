@@ -1,24 +1,34 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date
+from sqlalchemy import Column, Integer, Boolean, Date, Index, text
 from datetime import datetime
 from .base import Base
+from .tipos import TextoLimpo
 
 class Cidadao(Base):
     __tablename__ = "cidadaos"
 
     id = Column(Integer, primary_key=True, index=True)
-    nome_completo = Column(String(100), nullable=False)
-    cpf = Column(String(11), unique=True, index=True, nullable=False)
-    nome_conjuge = Column(String(100), nullable=True)
-    cpf_conjuge = Column(String(11), nullable=True)
-    bairro = Column(String(100), nullable=False)
-    zona = Column(String(50), nullable=True)
-    telefone = Column(String(15), nullable=True)
-    email = Column(String(100), nullable=True)
-    endereco_completo = Column(String(200), nullable=False)
-    programa_social = Column(String(100), nullable=True)
-    status_cadastro = Column(String(50), nullable=False, default="Ativo")
+    nome_completo = Column(TextoLimpo(100, anulavel=False), nullable=False)
+    cpf = Column(TextoLimpo(11, anulavel=False), unique=True, index=True, nullable=False)
+    nome_conjuge = Column(TextoLimpo(100), nullable=True)
+    cpf_conjuge = Column(TextoLimpo(11), nullable=True)
+    bairro = Column(TextoLimpo(100, anulavel=False), nullable=False)
+    zona = Column(TextoLimpo(50), nullable=True)
+    telefone = Column(TextoLimpo(15), nullable=True)
+    email = Column(TextoLimpo(100), nullable=True)
+    endereco_completo = Column(TextoLimpo(200, anulavel=False), nullable=False)
+    programa_social = Column(TextoLimpo(100), nullable=True)
+    status_cadastro = Column(TextoLimpo(50, anulavel=False), nullable=False, default="Ativo")
     data_cadastro = Column(Date, default=datetime.utcnow)
     ativo = Column(Boolean, default=True)
     votou = Column(Boolean, default=False)
     elegivel = Column(Boolean, default=True)
 
+# Índices das consultas de listagem, contagem e exportação (filtro + paginação por id).
+# O índice parcial só é usado quando o filtro da consulta repete o predicado, que é
+# como a coluna booleana pura é escrita em cada dialeto (ver filtros_cidadaos).
+Index("ix_cidadaos_elegivel_id", Cidadao.elegivel, Cidadao.id)
+Index("ix_cidadaos_status_cadastro_id", Cidadao.status_cadastro, Cidadao.id)
+Index(
+    "ix_cidadaos_ativos_elegivel_id", Cidadao.elegivel, Cidadao.id,
+    postgresql_where=text("ativo"), sqlite_where=text("ativo = 1")
+)
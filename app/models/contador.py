@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from .base import Base
+
+class ContadorApuracao(Base):
+    """
+    Contagens por bairro e zona mantidas incrementalmente a cada alteração de cidadão.
+    Cidadãos sem zona são contados com zona = ''.
+    """
+    __tablename__ = "contadores_apuracao"
+
+    bairro = Column(String(100), primary_key=True)
+    zona = Column(String(50), primary_key=True, default="")
+    total = Column(Integer, nullable=False, default=0)
+    ativos = Column(Integer, nullable=False, default=0)
+    elegiveis = Column(Integer, nullable=False, default=0)
+    votaram = Column(Integer, nullable=False, default=0)
+    atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,22 +1,27 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean
+from sqlalchemy import Column, Integer, Date, Boolean, Index
 from .base import Base
+from .tipos import TextoLimpo
 from datetime import date
 
 class Eleitor(Base):
     __tablename__ = "eleitores"
     
     id = Column(Integer, primary_key=True, index=True)
-    nome = Column(String(100), nullable=False)
-    cpf = Column(String(11), unique=True, nullable=False)
-    titulo_eleitor = Column(String(12), unique=True, nullable=False)
-    zona_eleitoral = Column(String(10))
-    secao_eleitoral = Column(String(10))
-    endereco = Column(String(200))
-    bairro = Column(String(100))
-    cidade = Column(String(100))
-    estado = Column(String(2))
-    telefone = Column(String(15))
-    email = Column(String(100))
+    nome = Column(TextoLimpo(100, anulavel=False), nullable=False)
+    cpf = Column(TextoLimpo(11, anulavel=False), unique=True, nullable=False)
+    titulo_eleitor = Column(TextoLimpo(12, anulavel=False), unique=True, nullable=False)
+    # NOT NULL no banco (migração add_eleitores_table): só removem espaços
+    zona_eleitoral = Column(TextoLimpo(10, anulavel=False))
+    secao_eleitoral = Column(TextoLimpo(10, anulavel=False))
+    endereco = Column(TextoLimpo(200, anulavel=False))
+    bairro = Column(TextoLimpo(100, anulavel=False))
+    cidade = Column(TextoLimpo(100, anulavel=False))
+    estado = Column(TextoLimpo(2, anulavel=False))
+    telefone = Column(TextoLimpo(15))
+    email = Column(TextoLimpo(100))
     data_nascimento = Column(Date)
     data_cadastro = Column(Date, default=date.today)
-    ativo = Column(Boolean, default=True)
\ No newline at end of file
+    ativo = Column(Boolean, default=True)
+
+# Consultas por zona e por zona + seção
+Index("ix_eleitores_zona_secao", Eleitor.zona_eleitoral, Eleitor.secao_eleitoral)
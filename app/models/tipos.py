@@ -0,0 +1,42 @@
+from sqlalchemy import String
+from sqlalchemy.types import TypeDecorator
+
+
+def limpar_texto(valor, anulavel: bool = True):
+    """
+    Remove espaços das pontas e, se `anulavel`, converte '', 'NULL' (qualquer caixa)
+    e strings só com espaços para None.
+    """
+    if isinstance(valor, str):
+        valor = valor.strip()
+        if anulavel and (not valor or valor.upper() == 'NULL'):
+            return None
+    return valor
+
+
+class TextoLimpo(TypeDecorator):
+    """
+    String normalizada com `limpar_texto` ao gravar e ao carregar do banco.
+
+    Colunas NOT NULL usam `anulavel=False` e só têm os espaços removidos; converter
+    '' para None nelas faria a gravação falhar. A limpeza acontece no processamento
+    do resultado, antes de o valor chegar ao objeto ORM, então não marca as
+    instâncias como alteradas. Valores comparados com a coluna (WHERE, LIKE, IN)
+    não passam pela limpeza: `status_cadastro == ""` continua sendo `= ''`.
+    """
+    impl = String
+    cache_ok = True
+
+    def __init__(self, *args, anulavel: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.anulavel = anulavel
+
+    def process_bind_param(self, value, dialect):
+        return limpar_texto(value, self.anulavel)
+
+    def process_result_value(self, value, dialect):
+        return limpar_texto(value, self.anulavel)
+
+    def coerce_compared_value(self, op, value):
+        # O lado comparado usa a String pura, sem process_bind_param
+        return self.impl_instance
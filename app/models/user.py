@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, event, inspect
 from sqlalchemy.orm import declarative_base
 from pydantic import BaseModel
 from passlib.hash import bcrypt
@@ -6,11 +6,9 @@ from passlib.hash import bcrypt
 Base = declarative_base()
 
 def hash_password(password: str) -> str:
-    import bcrypt
-    # Gera um salt e faz o hash da senha
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+    from app.senhas import gerar_hash_no_pool
+    # Gera o hash com o custo configurado (BCRYPT_ROUNDS) no pool limitado de bcrypt
+    return gerar_hash_no_pool(password)
 
 class UserDB(Base):
     __tablename__ = "users"
@@ -18,6 +16,16 @@ class UserDB(Base):
     name = Column(String(100), nullable=False, unique=True)
     password = Column(String(255), nullable=False)
 
+@event.listens_for(UserDB, "after_update")
+@event.listens_for(UserDB, "after_delete")
+def _invalidar_tokens_em_cache(mapper, connection, target):
+    # Tokens do nome atual e de nomes anteriores deixam de ser aceitos a partir do cache
+    from app.cache import invalidar_principal
+    nomes = {target.name, *inspect(target).attrs.name.history.deleted}
+    for nome in nomes:
+        if nome:
+            invalidar_principal(nome)
+
 class UserCreate(BaseModel):
     name: str
     password: str
@@ -0,0 +1,52 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, status
+
+# Maior página aceita pelas rotas de listagem
+LIMITE_MAXIMO = 10000
+
+
+def codificar_cursor(ultimo_id: int) -> str:
+    """
+    Gera o cursor opaco que aponta para o registro seguinte ao `ultimo_id`.
+    """
+    dados = json.dumps({"id": ultimo_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(dados).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: Optional[str]) -> int:
+    """
+    Retorna o último ID contido no cursor, ou 0 para a primeira página.
+    """
+    if not cursor:
+        return 0
+    try:
+        dados = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ultimo_id = json.loads(dados)["id"]
+        if not isinstance(ultimo_id, int):
+            raise ValueError
+        return ultimo_id
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido"
+        )
+
+
+def montar_pagina(itens: List[Any], limit: int) -> Dict[str, Any]:
+    """
+    Monta a página a partir de uma consulta feita com `limit + 1` registros;
+    o registro excedente indica que existe uma próxima página.
+    Aceita objetos ORM ou dicionários com a chave 'id'.
+    """
+    proximo = None
+    if len(itens) > limit:
+        itens = itens[:max(limit, 0)]
+        # Página vazia não tem último registro para o cursor
+        if itens:
+            ultimo = itens[-1]
+            proximo = codificar_cursor(ultimo["id"] if isinstance(ultimo, dict) else ultimo.id)
+    return {"items": itens, "next_cursor": proximo}
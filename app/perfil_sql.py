@@ -0,0 +1,182 @@
+"""
+Perfil das consultas SQL de cada requisição (opcional, SQL_PERFIL=true).
+
+Os eventos before/after_cursor_execute do SQLAlchemy (os mesmos das métricas,
+via app.metricas.observar_sql) medem cada comando e o atribuem à requisição em
+andamento (guardada em uma ContextVar, que acompanha o handler no threadpool e
+nas sessões assíncronas). Ao fim da requisição ficam
+registrados a quantidade de consultas, o tempo total no banco, os comandos mais
+lentos e os comandos idênticos repetidos (sinal de N+1). O resumo vai no
+cabeçalho Server-Timing e as últimas requisições ficam em GET /debug/sql.
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from app import metricas
+from app.database import _env_bool
+
+SQL_PERFIL = _env_bool("SQL_PERFIL", "false")
+# Requisições guardadas para a rota de depuração
+SQL_PERFIL_HISTORICO = int(os.getenv("SQL_PERFIL_HISTORICO", "100"))
+# Execuções do mesmo comando em uma requisição a partir das quais ele é sinalizado
+SQL_PERFIL_LIMIAR_REPETICAO = int(os.getenv("SQL_PERFIL_LIMIAR_REPETICAO", "5"))
+# Comandos mais lentos listados por requisição
+SQL_PERFIL_MAIS_LENTAS = 5
+# Tamanho máximo do texto SQL guardado
+_MAX_SQL = 500
+
+logger = logging.getLogger(__name__)
+
+_perfil_atual: ContextVar[Optional["PerfilRequisicao"]] = ContextVar("perfil_sql", default=None)
+_historico: deque = deque(maxlen=SQL_PERFIL_HISTORICO)
+_lock = threading.Lock()
+
+
+class PerfilRequisicao:
+    """
+    Consultas executadas durante uma requisição.
+    """
+
+    def __init__(self, metodo: str, caminho: str):
+        self.metodo = metodo
+        self.caminho = caminho
+        self.inicio = time.perf_counter()
+        self.consultas: List[tuple] = []
+
+    def registrar(self, sql: str, duracao: float) -> None:
+        self.consultas.append((sql, duracao))
+
+    @property
+    def tempo_db(self) -> float:
+        return sum(duracao for _, duracao in self.consultas)
+
+    def repetidas(self, limiar: int = SQL_PERFIL_LIMIAR_REPETICAO) -> List[Dict[str, Any]]:
+        """
+        Comandos idênticos (mesmo SQL, parâmetros diferentes) executados `limiar` vezes ou mais.
+        """
+        vezes = Counter(sql for sql, _ in self.consultas)
+        tempos: Counter = Counter()
+        for sql, duracao in self.consultas:
+            tempos[sql] += duracao
+        return [
+            {"sql": sql[:_MAX_SQL], "vezes": total, "tempo_ms": round(tempos[sql] * 1000, 3)}
+            for sql, total in vezes.most_common() if total >= limiar
+        ]
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.tempo_db * 1000:.3f};desc="{len(self.consultas)} consultas", '
+            f"app;dur={(time.perf_counter() - self.inicio) * 1000:.3f}"
+        )
+
+    def resumo(self, status: int, rota: Optional[str]) -> Dict[str, Any]:
+        mais_lentas = sorted(self.consultas, key=lambda consulta: consulta[1], reverse=True)
+        return {
+            "metodo": self.metodo,
+            "caminho": self.caminho,
+            "rota": rota,
+            "status": status,
+            "duracao_ms": round((time.perf_counter() - self.inicio) * 1000, 3),
+            "consultas": len(self.consultas),
+            "tempo_db_ms": round(self.tempo_db * 1000, 3),
+            "mais_lentas": [
+                {"sql": sql[:_MAX_SQL], "ms": round(duracao * 1000, 3)}
+                for sql, duracao in mais_lentas[:SQL_PERFIL_MAIS_LENTAS]
+            ],
+            "repetidas": self.repetidas(),
+        }
+
+
+def _registrar_no_perfil(statement: str, duracao: float) -> None:
+    perfil = _perfil_atual.get()
+    if perfil is not None:
+        perfil.registrar(statement, duracao)
+
+
+def monitorar_engine(engine_alvo) -> None:
+    """
+    Registra a medição em um engine síncrono ou assíncrono.
+
+    Usa o mesmo par de eventos das métricas: com as duas ligadas, cada comando é
+    medido uma única vez.
+    """
+    metricas.observar_sql(engine_alvo, _registrar_no_perfil)
+
+
+def _finalizar(perfil: PerfilRequisicao, status: int, rota: Optional[str]) -> None:
+    resumo = perfil.resumo(status, rota)
+    with _lock:
+        _historico.append(resumo)
+    for repetida in resumo["repetidas"]:
+        logger.warning(
+            "Possível N+1",
+            extra={
+                "metodo": perfil.metodo,
+                "rota": rota or perfil.caminho,
+                "vezes": repetida["vezes"],
+                "sql": repetida["sql"][:120],
+            },
+        )
+
+
+def ultimos(limite: int = 20, apenas_repetidas: bool = False) -> List[Dict[str, Any]]:
+    """
+    Perfis das requisições mais recentes, da mais nova para a mais antiga.
+    """
+    with _lock:
+        perfis = list(_historico)
+    perfis.reverse()
+    if apenas_repetidas:
+        perfis = [perfil for perfil in perfis if perfil["repetidas"]]
+    return perfis[:limite]
+
+
+class PerfilSQLMiddleware:
+    """
+    Middleware ASGI que abre um perfil por requisição HTTP e acrescenta o Server-Timing.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        perfil = PerfilRequisicao(scope["method"], scope["path"])
+        token = _perfil_atual.set(perfil)
+        status = 500
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+                cabecalhos = list(mensagem.get("headers", []))
+                cabecalhos.append((b"server-timing", perfil.server_timing().encode("latin-1")))
+                mensagem = {**mensagem, "headers": cabecalhos}
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _perfil_atual.reset(token)
+            rota = getattr(scope.get("route"), "path", None)
+            _finalizar(perfil, status, rota)
+
+
+def instalar(app) -> None:
+    """
+    Liga o perfil no app: eventos nos engines do app.database e o middleware.
+    """
+    from app.database import async_engine, engine
+
+    monitorar_engine(engine)
+    if async_engine is not None:
+        monitorar_engine(async_engine)
+    app.add_middleware(PerfilSQLMiddleware)
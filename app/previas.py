@@ -0,0 +1,109 @@
+"""
+Prévias das planilhas enviadas.
+
+A planilha é lida uma única vez e gravada como arquivo Arrow IPC ao lado do
+upload (pasta `.previas`), identificado pelo mtime e pelo tamanho do arquivo
+original. As visualizações seguintes leem só o trecho pedido desse arquivo,
+mapeado em memória, em vez de reler o XLSX inteiro com o pandas.
+"""
+import json
+import os
+import re
+import tempfile
+from typing import Any, Dict, List
+
+PASTA_PREVIAS = ".previas"
+
+
+def _caminho_previa(caminho_arquivo: str) -> str:
+    info = os.stat(caminho_arquivo)
+    pasta = os.path.join(os.path.dirname(caminho_arquivo), PASTA_PREVIAS)
+    nome = os.path.basename(caminho_arquivo)
+    return os.path.join(pasta, f"{nome}.{info.st_mtime_ns}-{info.st_size}.arrow")
+
+
+def _remover_antigas(caminho_previa: str) -> None:
+    pasta, nome_atual = os.path.split(caminho_previa)
+    padrao = re.compile(re.escape(nome_atual.rsplit(".", 2)[0]) + r"\.\d+-\d+\.arrow")
+    for nome in os.listdir(pasta):
+        if nome != nome_atual and padrao.fullmatch(nome):
+            try:
+                os.remove(os.path.join(pasta, nome))
+            except FileNotFoundError:
+                pass
+
+
+def _para_tabela(df):
+    import pandas as pd
+    import pyarrow as pa
+
+    df = df.copy()
+    df.columns = [str(coluna) for coluna in df.columns]
+    colunas = {}
+    for coluna in df.columns:
+        try:
+            colunas[coluna] = pa.array(df[coluna], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Colunas com tipos misturados (ex.: CPF ora número, ora texto) viram texto
+            colunas[coluna] = pa.array(
+                [None if pd.isna(valor) else str(valor) for valor in df[coluna]], type=pa.string()
+            )
+    return pa.table(colunas)
+
+
+def gerar_previa(caminho_arquivo: str) -> str:
+    """
+    Lê a planilha e grava a prévia em Arrow IPC, com os nomes e os tipos
+    originais (pandas) das colunas nos metadados. Retorna o caminho da prévia.
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    caminho_previa = _caminho_previa(caminho_arquivo)
+    df = pd.read_excel(caminho_arquivo, engine='openpyxl')
+    tabela = _para_tabela(df)
+    metadados = {
+        "colunas": tabela.column_names,
+        "tipos": {str(coluna): str(tipo) for coluna, tipo in df.dtypes.items()},
+    }
+    tabela = tabela.replace_schema_metadata({"previa": json.dumps(metadados)})
+
+    pasta = os.path.dirname(caminho_previa)
+    os.makedirs(pasta, exist_ok=True)
+    # Grava em arquivo temporário e renomeia, para leitores concorrentes nunca verem a prévia pela metade
+    descritor, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    try:
+        with os.fdopen(descritor, "wb") as destino, pa.ipc.new_file(destino, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+        os.replace(temporario, caminho_previa)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    _remover_antigas(caminho_previa)
+    return caminho_previa
+
+
+def obter_previa(caminho_arquivo: str, offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+    """
+    Retorna as colunas, os tipos, o total de linhas e as linhas [offset, offset + limit)
+    da planilha, gerando a prévia se ela não existir ou estiver desatualizada.
+    """
+    import pyarrow as pa
+
+    caminho_previa = _caminho_previa(caminho_arquivo)
+    if not os.path.exists(caminho_previa):
+        caminho_previa = gerar_previa(caminho_arquivo)
+
+    with pa.memory_map(caminho_previa) as origem:
+        tabela = pa.ipc.open_file(origem).read_all()
+        metadados = json.loads(tabela.schema.metadata[b"previa"])
+        linhas: List[Dict[str, Any]] = tabela.slice(offset, limit).to_pylist()
+
+    return {
+        "colunas": metadados["colunas"],
+        "tipos": metadados["tipos"],
+        "total_linhas": tabela.num_rows,
+        "linhas": linhas,
+    }
+
@@ -0,0 +1,33 @@
+import json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+
+def valor_json(valor: Any) -> Any:
+    """
+    Conversão de datas para o json da biblioteca padrão (parâmetro `default`).
+    """
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+class RespostaJSONRapida(JSONResponse):
+    """
+    Resposta JSON codificada com orjson quando instalado (ou json da biblioteca padrão).
+    Usada pelas rotas que devolvem dados já limpos, sem passar pelo response_model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(
+            content, ensure_ascii=False, separators=(",", ":"), default=valor_json
+        ).encode("utf-8")
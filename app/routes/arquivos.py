@@ -0,0 +1,273 @@
+"""
+Rotas de arquivos: upload e prévia de planilhas, catálogo de uploads e jobs de importação.
+
+Ficam separadas das demais para que workers sem rotas de arquivo (ROTAS_ARQUIVOS=false)
+não carreguem este módulo nem a leitura de planilhas.
+"""
+import logging
+import os
+from datetime import timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Path as PathParam
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse
+from sqlalchemy.orm import Session
+
+from app import jobs
+from app import previas
+from app import uploads
+from app.crud import arquivo as crud_arquivo
+from app.database import get_db
+from app.importacao import contar_linhas_xlsx
+from app.models.user import UserDB
+from app.routes.routes import get_current_user, get_usuario_opcional
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/arquivos")
+def listar_arquivos(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, gt=0, le=1000),
+    ordenar_por: Literal["nome", "tamanho", "total_linhas", "criado_em", "modificado_em"] = Query("modificado_em"),
+    ordem: Literal["asc", "desc"] = Query("desc"),
+    nome: Optional[str] = Query(None, description="Parte do nome do arquivo"),
+    enviado_por: Optional[str] = Query(None, description="Usuário que enviou o arquivo"),
+    sha256: Optional[str] = Query(None, description="Hash SHA-256 do conteúdo"),
+    db: Session = Depends(get_db)
+):
+    """Lista os arquivos enviados a partir do catálogo de uploads"""
+    total, itens = crud_arquivo.listar_arquivos(
+        db, offset=offset, limit=limit, ordenar_por=ordenar_por, ordem=ordem,
+        nome=nome, enviado_por=enviado_por, sha256=sha256
+    )
+    return {
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "arquivos": [
+            {
+                "nome": arquivo.nome,
+                "tamanho_kb": round(arquivo.tamanho / 1024, 2),
+                "data_modificacao": arquivo.modificado_em.replace(tzinfo=timezone.utc).timestamp(),
+                "sha256": arquivo.sha256,
+                "total_linhas": arquivo.total_linhas,
+                "enviado_por": arquivo.enviado_por,
+                "criado_em": arquivo.criado_em,
+            }
+            for arquivo in itens
+        ]
+    }
+
+@router.post("/arquivos/reconciliar")
+def reconciliar_catalogo_arquivos(
+    db: Session = Depends(get_db),
+    current_user: UserDB = Depends(get_current_user)
+):
+    """Reconstrói o catálogo de uploads a partir da pasta uploads/"""
+    return crud_arquivo.reconciliar_arquivos(db, uploads.UPLOAD_FOLDER)
+
+@router.get("/arquivos/{nome_arquivo}")
+async def visualizar_arquivo(
+    nome_arquivo: str = PathParam(..., description="Nome do arquivo a ser visualizado ou baixado"),
+    download: bool = Query(False, description="Se True, faz download do arquivo em vez de mostrar o conteúdo"),
+    offset: int = Query(0, ge=0, description="Primeira linha da planilha exibida na prévia"),
+    limit: int = Query(50, gt=0, le=1000, description="Quantidade de linhas exibidas na prévia")
+):
+    """Visualiza ou baixa um arquivo específico"""
+    try:
+        # Previne path traversal
+        if '..' in nome_arquivo or '/' in nome_arquivo or '\\' in nome_arquivo:
+            raise HTTPException(status_code=400, detail="Nome de arquivo inválido")
+            
+        caminho_arquivo = os.path.join(uploads.UPLOAD_FOLDER, nome_arquivo)
+        
+        if not os.path.isfile(caminho_arquivo):
+            raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+        
+        # Se for para baixar o arquivo
+        if download:
+            return FileResponse(
+                path=caminho_arquivo,
+                filename=nome_arquivo,
+                media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+        
+        # Se for para visualizar o conteúdo
+        if nome_arquivo.lower().endswith(('.xlsx', '.xls')):
+            try:
+                # A prévia é lida de um arquivo Arrow gerado no upload, sem reler o XLSX
+                previa = await run_in_threadpool(previas.obter_previa, caminho_arquivo, offset, limit)
+            except Exception as e:
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"Não foi possível ler o arquivo Excel: {str(e)}"
+                )
+            
+            total = previa["total_linhas"]
+            dados = [
+                {coluna: ('' if valor is None else valor) for coluna, valor in linha.items()}
+                for linha in previa["linhas"]
+            ]
+            fim = offset + len(dados)
+            return {
+                "nome_arquivo": nome_arquivo,
+                "tamanho_kb": round(os.path.getsize(caminho_arquivo) / 1024, 2),
+                "total_linhas": total,
+                "colunas": previa["colunas"],
+                "tipos": previa["tipos"],
+                "offset": offset,
+                "limit": limit,
+                "dados": dados,
+                "mensagem": f"Mostrando linhas {offset + 1} a {fim} de {total}" if (offset or fim < total) else "Mostrando todas as linhas"
+            }
+        else:
+            # Para outros tipos de arquivo, retorna informações básicas
+            with open(caminho_arquivo, 'r', encoding='utf-8', errors='ignore') as f:
+                conteudo = f.read(1000)  # Lê apenas os primeiros 1000 caracteres
+                
+            return {
+                "nome_arquivo": nome_arquivo,
+                "tipo": "texto",
+                "tamanho_kb": round(os.path.getsize(caminho_arquivo) / 1024, 2),
+                "preview": conteudo,
+                "mensagem": "Mostrando os primeiros 1000 caracteres"
+            }
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao processar arquivo: {str(e)}")
+
+@router.post("/upload-xlsx")
+async def upload_xlsx(
+    file: UploadFile = File(...),
+    importar: bool = Query(False, description="Se True, importa as linhas da planilha para a tabela de cidadãos"),
+    tamanho_lote: int = Query(1000, gt=0, le=10000, description="Quantidade de linhas gravadas por lote na importação"),
+    db: Session = Depends(get_db),
+    usuario: Optional[UserDB] = Depends(get_usuario_opcional)
+):
+    logger.debug("Upload iniciado", extra={"arquivo": file.filename})
+
+    try:
+        # Verifica se o arquivo é XLSX
+        if not file.filename or not file.filename.lower().endswith(('.xlsx', '.xls')):
+            error_msg = f"Formato de arquivo inválido: {file.filename}. Apenas XLSX/XLS são aceitos"
+            logger.info("Upload recusado: formato inválido", extra={"arquivo": file.filename})
+            return JSONResponse(
+                status_code=400,
+                content={"message": error_msg}
+            )
+        
+        try:
+            # Grava o upload em blocos, fora do event loop, com limite de tamanho e hash do conteúdo
+            try:
+                salvo = await uploads.salvar_upload(
+                    file, uploads.UPLOAD_FOLDER, db, enviado_por=usuario.name if usuario else None
+                )
+            except uploads.UploadMuitoGrande as e:
+                return JSONResponse(
+                    status_code=413,
+                    content={"message": str(e)}
+                )
+            file_path = salvo.caminho
+            safe_filename = salvo.nome
+            
+            logger.info(
+                "Upload recebido",
+                extra={"arquivo": safe_filename, "bytes": salvo.tamanho, "duplicado": salvo.duplicado}
+            )
+            
+            # Modo importação: enfileira um job que carrega as linhas em lotes no pool de workers
+            if importar:
+                job = jobs.enfileirar_importacao(os.path.basename(file_path), file_path, tamanho_lote=tamanho_lote)
+                if not salvo.duplicado:
+                    total = await run_in_threadpool(contar_linhas_xlsx, file_path)
+                    await run_in_threadpool(crud_arquivo.atualizar_total_linhas, db, safe_filename, total)
+                logger.info("Importação enfileirada", extra={"arquivo": safe_filename, "job": job.id})
+                return JSONResponse(
+                    status_code=202,
+                    content={
+                        "message": "Importação enfileirada",
+                        "nome_arquivo": os.path.basename(file_path),
+                        "caminho_salvo": file_path,
+                        "tamanho_arquivo": f"{salvo.tamanho / 1024:.2f} KB",
+                        "sha256": salvo.sha256,
+                        "duplicado": salvo.duplicado,
+                        "job": job.to_dict()
+                    }
+                )
+            
+            # Lê o arquivo XLSX uma única vez, fora do event loop, e grava a prévia usada nas visualizações
+            previa = await run_in_threadpool(previas.obter_previa, file_path, 0, 5)
+            if not salvo.duplicado:
+                await run_in_threadpool(crud_arquivo.atualizar_total_linhas, db, safe_filename, previa["total_linhas"])
+            
+            if previa["total_linhas"] == 0:
+                logger.warning("Planilha vazia", extra={"arquivo": safe_filename})
+                return JSONResponse(
+                    status_code=200,
+                    content={"message": "Arquivo processado, mas está vazio"}
+                )
+            
+            # Prepara a resposta
+            colunas = previa["colunas"]
+            amostra_cleaned = [
+                {coluna: ('' if valor is None else valor) for coluna, valor in linha.items()}
+                for linha in previa["linhas"]
+            ]
+            total_linhas = previa["total_linhas"]
+            
+            response_data = {
+                "message": "Arquivo processado com sucesso",
+                "nome_arquivo": safe_filename,
+                "caminho_salvo": file_path,
+                "tamanho_arquivo": f"{salvo.tamanho / 1024:.2f} KB",
+                "sha256": salvo.sha256,
+                "duplicado": salvo.duplicado,
+                "colunas": colunas,
+                "tipos": previa["tipos"],
+                "amostra_dados": amostra_cleaned,
+                "total_linhas": total_linhas
+            }
+            
+            return response_data
+            
+        except Exception as e:
+            error_msg = f"Erro ao processar o arquivo: {str(e)}"
+            logger.exception("Erro ao processar o arquivo", extra={"arquivo": file.filename})
+            return JSONResponse(
+                status_code=500,
+                content={"message": error_msg}
+            )
+            
+    except Exception as e:
+        error_msg = f"Erro inesperado: {str(e)}"
+        logger.exception("Erro inesperado no upload", extra={"arquivo": file.filename})
+        return JSONResponse(
+            status_code=500,
+            content={"message": error_msg}
+        )
+
+@router.get("/importacoes")
+def listar_importacoes():
+    """Lista os jobs de importação em memória, do mais recente para o mais antigo"""
+    return {"importacoes": [job.to_dict() for job in jobs.listar_jobs()]}
+
+@router.get("/importacoes/{job_id}")
+def obter_importacao(job_id: str):
+    """Retorna o status, o progresso, a vazão e os erros de um job de importação"""
+    job = jobs.obter_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Importação não encontrada")
+    return job.to_dict()
+
+@router.post("/importacoes/{job_id}/cancelar")
+def cancelar_importacao(job_id: str):
+    """Cancela um job de importação; os lotes já gravados são mantidos"""
+    job = jobs.cancelar_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Importação não encontrada")
+    return job.to_dict()
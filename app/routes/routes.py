@@ -1,38 +1,55 @@
+import logging
 import os
-import pandas as pd
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Path as PathParam
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path as PathParam
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 from datetime import date
 
-from app.database import get_db
+from app.database import get_db, get_async_db, engine, async_engine, pool_status
+from app.models import Base
 from app.models.user import UserDB, UserCreate, UserOut, UserInDB, hash_password
-from app.schemas.cidadao import Cidadao, CidadaoCreate, CidadaoUpdate
+from app.schemas.cidadao import Cidadao, CidadaoCreate, CidadaoUpdate, CidadaoPagina, CheckInVotoLote, CheckInVotoLoteResultado
 from app.crud import cidadao as crud_cidadao
+from app.crud import cidadao_async as crud_cidadao_async
+from app.crud import apuracao as crud_apuracao
+from app import jobs
+from app import exportacao
+from app import senhas
+from app import estrutura
+from app import perfil_sql
+from app import metricas
+from app.respostas import RespostaJSONRapida
+from app import cache
+from app.paginacao import LIMITE_MAXIMO, decodificar_cursor, montar_pagina
 from app.schemas.cidadao import Cidadao, CidadaoInDB
 from passlib.hash import bcrypt
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi import Request, Response
-import xml.etree.ElementTree as ET
-from fastapi.responses import Response as FastAPIResponse
+
+logger = logging.getLogger(__name__)
 
 SECRET_KEY = "PMTUZQX7@"  # Troque por uma chave forte
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Com AUTH_STATELESS=true, o usuário é montado a partir das claims assinadas do token,
+# sem consultar o banco nem o cache; alterações no usuário só valem para novos tokens
+AUTH_STATELESS = os.getenv("AUTH_STATELESS", "false").lower() in ("1", "true", "yes", "on")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+oauth2_scheme_opcional = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    import bcrypt
-    try:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
-    except Exception as e:
-        print(f"Erro ao verificar senha: {e}")
-        return False
+    return senhas.verificar(plain_password, hashed_password)
+
+def _gravar_hash_senha(db: Session, user: UserDB, novo_hash: str) -> None:
+    user.password = novo_hash
+    db.commit()
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -57,18 +74,37 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+
+    # Objetos montados fora da sessão servem apenas para leitura (id e name)
+    if AUTH_STATELESS and payload.get("uid") is not None:
+        return UserDB(id=payload["uid"], name=username)
+
+    exp = payload.get("exp")
+    principal = cache.obter_principal(username, exp)
+    if principal is not None:
+        return UserDB(id=principal["id"], name=principal["name"])
+
     user = get_user_by_name(db, username)
     if user is None:
         raise credentials_exception
+    cache.guardar_principal(username, exp, user.id)
     return user
 
+def get_usuario_opcional(token: Optional[str] = Depends(oauth2_scheme_opcional), db: Session = Depends(get_db)):
+    """
+    Retorna o usuário autenticado, ou None se a requisição não enviar token.
+    """
+    if token is None:
+        return None
+    return get_current_user(token, db)
+
 router = APIRouter()
 
 @router.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db = Depends(get_async_db)):
     try:
         # Tenta executar uma consulta simples para verificar a conexão
-        db.execute("SELECT 1")
+        await db.run_sync(lambda session: session.execute(text("SELECT 1")))
         return {"status": "ok", "database": "connected"}
     except Exception as e:
         raise HTTPException(
@@ -76,245 +112,71 @@ async def health_check(db: Session = Depends(get_db)):
             detail={"status": "error", "database": "connection failed", "error": str(e)}
         )
 
-
-import os
-from pathlib import Path
-
-# Obtém o diretório absoluto do projeto
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
-
-# Cria o diretório de uploads se não existir
-try:
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-    print(f"Pasta de uploads criada em: {UPLOAD_FOLDER}")
-    print(f"Diretório atual: {os.getcwd()}")
-    print(f"Conteúdo do diretório: {os.listdir(BASE_DIR)}")
-except Exception as e:
-    print(f"Erro ao criar pasta de uploads: {e}")
-    raise
-
-@router.get("/arquivos")
-async def listar_arquivos():
-    """Lista todos os arquivos enviados"""
-    try:
-        if not os.path.exists(UPLOAD_FOLDER):
-            return {"arquivos": []}
-            
-        arquivos = []
-        for nome_arquivo in os.listdir(UPLOAD_FOLDER):
-            caminho = os.path.join(UPLOAD_FOLDER, nome_arquivo)
-            if os.path.isfile(caminho):
-                arquivos.append({
-                    "nome": nome_arquivo,
-                    "tamanho_kb": round(os.path.getsize(caminho) / 1024, 2),
-                    "data_modificacao": os.path.getmtime(caminho)
-                })
-        
-        # Ordena por data de modificação (mais recente primeiro)
-        arquivos.sort(key=lambda x: x["data_modificacao"], reverse=True)
-        
-        return {"arquivos": arquivos}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao listar arquivos: {str(e)}")
-
-@router.get("/arquivos/{nome_arquivo}")
-async def visualizar_arquivo(
-    nome_arquivo: str = PathParam(..., description="Nome do arquivo a ser visualizado ou baixado"),
-    download: bool = Query(False, description="Se True, faz download do arquivo em vez de mostrar o conteúdo")
+@router.get("/metrics", include_in_schema=False)
+def metricas_prometheus():
+    """
+    Métricas da aplicação no formato texto do Prometheus.
+    """
+    if not metricas.METRICAS:
+        # Sem metricas.instalar as séries de requisições e SQL ficariam zeradas
+        raise HTTPException(status_code=404, detail="Métricas desativadas (defina METRICAS=true)")
+    return Response(content=metricas.expor(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/metricas/cache")
+def metricas_cache():
+    """Hits, misses, taxa de acerto e invalidações dos caches de cidadãos e de usuários autenticados"""
+    return {
+        "cidadaos": cache.cache_cidadaos.metricas(),
+        "usuarios": cache.cache_usuarios.metricas(),
+    }
+
+@router.get("/debug/sql")
+def perfis_sql(
+    limite: int = Query(20, ge=1, le=500, description="Quantidade de requisições recentes"),
+    apenas_repetidas: bool = Query(False, description="Só requisições com comandos repetidos (possível N+1)"),
+    current_user: UserDB = Depends(get_current_user)
 ):
-    """Visualiza ou baixa um arquivo específico"""
-    try:
-        # Previne path traversal
-        if '..' in nome_arquivo or '/' in nome_arquivo or '\\' in nome_arquivo:
-            raise HTTPException(status_code=400, detail="Nome de arquivo inválido")
-            
-        caminho_arquivo = os.path.join(UPLOAD_FOLDER, nome_arquivo)
-        
-        if not os.path.isfile(caminho_arquivo):
-            raise HTTPException(status_code=404, detail="Arquivo não encontrado")
-        
-        # Se for para baixar o arquivo
-        if download:
-            return FileResponse(
-                path=caminho_arquivo,
-                filename=nome_arquivo,
-                media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-        
-        # Se for para visualizar o conteúdo
-        if nome_arquivo.lower().endswith(('.xlsx', '.xls')):
-            try:
-                df = pd.read_excel(caminho_arquivo, engine='openpyxl')
-                
-                # Converte para dicionário e limpa os dados
-                def clean_data(data):
-                    if isinstance(data, dict):
-                        return {k: clean_data(v) for k, v in data.items()}
-                    elif isinstance(data, list):
-                        return [clean_data(item) for item in data]
-                    elif pd.isna(data):
-                        return None
-                    return data
-                
-                # Pega as primeiras 50 linhas para visualização
-                dados = df.head(50).fillna('').to_dict(orient='records')
-                dados_limpos = clean_data(dados)
-                
-                return {
-                    "nome_arquivo": nome_arquivo,
-                    "tamanho_kb": round(os.path.getsize(caminho_arquivo) / 1024, 2),
-                    "total_linhas": len(df),
-                    "colunas": df.columns.tolist(),
-                    "dados": dados_limpos,
-                    "mensagem": f"Mostrando 50 primeiras linhas de {len(df)}" if len(df) > 50 else "Mostrando todas as linhas"
-                }
-                
-            except Exception as e:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Não foi possível ler o arquivo Excel: {str(e)}"
-                )
-        else:
-            # Para outros tipos de arquivo, retorna informações básicas
-            with open(caminho_arquivo, 'r', encoding='utf-8', errors='ignore') as f:
-                conteudo = f.read(1000)  # Lê apenas os primeiros 1000 caracteres
-                
-            return {
-                "nome_arquivo": nome_arquivo,
-                "tipo": "texto",
-                "tamanho_kb": round(os.path.getsize(caminho_arquivo) / 1024, 2),
-                "preview": conteudo,
-                "mensagem": "Mostrando os primeiros 1000 caracteres"
-            }
-            
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao processar arquivo: {str(e)}")
-
-@router.post("/upload-xlsx")
-async def upload_xlsx(file: UploadFile = File(...)):
-    print(f"Iniciando upload do arquivo: {file.filename}")
-    print(f"Pasta de upload: {UPLOAD_FOLDER}")
-    print(f"Diretório atual: {os.getcwd()}")
-    
-    try:
-        # Verifica se o arquivo é XLSX
-        if not file.filename or not file.filename.lower().endswith(('.xlsx', '.xls')):
-            error_msg = f"Formato de arquivo inválido: {file.filename}. Apenas XLSX/XLS são aceitos"
-            print(error_msg)
-            return JSONResponse(
-                status_code=400,
-                content={"message": error_msg}
-            )
-        
-        # Garante que o diretório de upload existe
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-        print(f"Conteúdo da pasta de upload: {os.listdir(UPLOAD_FOLDER)}")
-        
-        # Cria um nome de arquivo seguro
-        import uuid
-        import re
-        
-        # Remove caracteres não seguros do nome do arquivo
-        safe_filename = re.sub(r'[^\w\-_. ]', '_', file.filename)
-        file_path = os.path.join(UPLOAD_FOLDER, safe_filename)
-        
-        # Se o arquivo já existir, adiciona um sufixo único
-        counter = 1
-        while os.path.exists(file_path):
-            name, ext = os.path.splitext(safe_filename)
-            file_path = os.path.join(UPLOAD_FOLDER, f"{name}_{counter}{ext}")
-            counter += 1
-        
-        print(f"Salvando arquivo em: {file_path}")
-        
-        try:
-            # Lê o conteúdo do arquivo
-            contents = await file.read()
-            if not contents:
-                raise ValueError("O arquivo está vazio")
-            
-            # Garante que o diretório existe
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                
-            # Salva o arquivo
-            with open(file_path, "wb") as buffer:
-                buffer.write(contents)
-            
-            print(f"Arquivo salvo com sucesso. Tamanho: {len(contents)} bytes")
-            print(f"Arquivo existe? {os.path.exists(file_path)}")
-            print(f"Caminho absoluto: {os.path.abspath(file_path)}")
-            
-            # Verifica se o arquivo foi realmente salvo
-            if not os.path.exists(file_path):
-                raise Exception(f"Falha ao salvar o arquivo em {file_path}")
-            
-            # Tenta ler o arquivo XLSX
-            print("Lendo arquivo XLSX...")
-            df = pd.read_excel(file_path, engine='openpyxl')
-            
-            if df.empty:
-                print("Aviso: O arquivo Excel está vazio")
-                return JSONResponse(
-                    status_code=200,
-                    content={"message": "Arquivo processado, mas está vazio"}
-                )
-            
-            # Função para converter valores NaN para None
-            def clean_data(data):
-                if isinstance(data, dict):
-                    return {k: clean_data(v) for k, v in data.items()}
-                elif isinstance(data, list):
-                    return [clean_data(item) for item in data]
-                elif pd.isna(data):
-                    return None
-                return data
-            
-            # Converte para dicionário e limpa os dados
-            data = df.to_dict(orient='records')
-            data_cleaned = clean_data(data)
-            
-            # Prepara a resposta
-            colunas = df.columns.tolist()
-            amostra = df.head().fillna('').to_dict(orient='records')
-            amostra_cleaned = clean_data(amostra)
-            total_linhas = len(df)
-            
-            print(f"Arquivo processado com sucesso. Colunas: {colunas}, Total de linhas: {total_linhas}")
-            
-            response_data = {
-                "message": "Arquivo processado com sucesso",
-                "nome_arquivo": safe_filename,
-                "caminho_salvo": file_path,
-                "tamanho_arquivo": f"{os.path.getsize(file_path) / 1024:.2f} KB",
-                "colunas": colunas,
-                "amostra_dados": amostra_cleaned,
-                "total_linhas": total_linhas
-            }
-            
-            # Garante que não há valores NaN na resposta
-            import json
-            json.dumps(response_data, default=str)  # Testa a serialização
-            
-            return response_data
-            
-        except Exception as e:
-            error_msg = f"Erro ao processar o arquivo: {str(e)}"
-            print(error_msg)
-            return JSONResponse(
-                status_code=500,
-                content={"message": error_msg}
-            )
-            
-    except Exception as e:
-        error_msg = f"Erro inesperado: {str(e)}"
-        print(error_msg)
-        return JSONResponse(
-            status_code=500,
-            content={"message": error_msg}
-        )
+    """
+    Consultas SQL das últimas requisições: quantidade, tempo no banco, mais lentas e repetidas.
+    """
+    if not perfil_sql.SQL_PERFIL:
+        raise HTTPException(status_code=404, detail="Perfil SQL desativado (defina SQL_PERFIL=true)")
+    return {
+        "limiar_repeticao": perfil_sql.SQL_PERFIL_LIMIAR_REPETICAO,
+        "requisicoes": perfil_sql.ultimos(limite, apenas_repetidas),
+    }
+
+@router.get("/metricas/pool")
+def metricas_pool():
+    """Estado dos pools de conexão: conexões em uso, overflow, timeouts e histograma de espera no checkout"""
+    status_pool = {"sincrono": pool_status(engine)}
+    if async_engine is not None:
+        status_pool["assincrono"] = pool_status(async_engine)
+    return status_pool
+
+
+@router.get("/apuracao", tags=["Apuração"], summary="Comparecimento em tempo real")
+def obter_apuracao(
+    agrupar_por: Literal["bairro", "zona", "bairro_zona"] = Query("bairro", description="Agrupamento dos contadores"),
+    db: Session = Depends(get_db)
+):
+    """
+    Retorna os totais e as contagens de cidadãos, ativos, elegíveis e que votaram por bairro e/ou zona.
+    Servido a partir dos contadores mantidos incrementalmente, sem contar a tabela de cidadãos.
+    """
+    return {
+        "totais": crud_apuracao.get_totais(db),
+        "grupos": crud_apuracao.get_contadores(db, agrupar_por=agrupar_por),
+        "ultima_reconciliacao": jobs.reconciliacao_contadores.ultima_execucao,
+    }
+
+@router.post("/apuracao/reconciliar", tags=["Apuração"], summary="Recalcular contadores")
+def reconciliar_apuracao(current_user: UserDB = Depends(get_current_user)):
+    """
+    Recalcula os contadores de apuração a partir da tabela de cidadãos.
+    """
+    grupos = jobs.reconciliacao_contadores.executar()
+    return {"grupos": grupos, "reconciliado_em": jobs.reconciliacao_contadores.ultima_execucao}
 
 @router.post("/users", response_model=UserOut)
 def create_user(user: UserCreate, db: Session = Depends(get_db)):
@@ -324,6 +186,8 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     db.add(novo_usuario)
     try:
         db.commit()
+        # Descarta tokens em cache de um usuário anterior com o mesmo nome
+        cache.invalidar_principal(novo_usuario.name)
         db.refresh(novo_usuario)
         return novo_usuario
     except IntegrityError:
@@ -339,22 +203,30 @@ def get_users(db: Session = Depends(get_db)):
 
 # Rota de login
 @router.post("/login")
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    print(f"Tentativa de login para o usuário: {form_data.username}")
-    user = get_user_by_name(db, form_data.username)
-    print(f"Usuário encontrado: {user is not None}")
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db = Depends(get_async_db)):
+    user = await db.run_sync(get_user_by_name, form_data.username)
     
     if not user:
-        print("Usuário não encontrado")
+        logger.info("Login recusado: usuário não encontrado", extra={"usuario": form_data.username})
         raise HTTPException(status_code=400, detail="Usuário ou senha incorretos")
         
-    print(f"Verificando senha para o usuário: {user.name}")
-    if not verify_password(form_data.password, user.password):
-        print("Senha incorreta")
+    # O bcrypt roda no pool limitado, fora do event loop
+    if not await senhas.verificar_async(form_data.password, user.password):
+        logger.info("Login recusado: senha incorreta", extra={"usuario": user.name})
         raise HTTPException(status_code=400, detail="Usuário ou senha incorretos")
+    
+    # Lidos antes do commit do rehash, que expira o objeto: depois dele, o acesso faria
+    # uma consulta síncrona no event loop
+    nome, usuario_id = user.name, user.id
+
+    # Regrava o hash se o custo configurado mudou desde que a senha foi definida
+    if senhas.precisa_rehash(user.password):
+        novo_hash = await senhas.gerar_hash_async(form_data.password)
+        # A alteração do usuário invalida os tokens em cache; com Redis, fora do event loop
+        async with cache.operacoes_fora_do_loop():
+            await db.run_sync(_gravar_hash_senha, user, novo_hash)
         
-    print("Credenciais válidas, gerando token...")
-    access_token = create_access_token(data={"sub": user.name})
+    access_token = create_access_token(data={"sub": nome, "uid": usuario_id})
     return {"access_token": access_token, "token_type": "bearer"}
 
 # Exemplo de rota protegida
@@ -362,58 +234,46 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
 def read_users_me(current_user: UserDB = Depends(get_current_user)):
     return current_user
 
-# Rota GET que retorna todas as tabelas e colunas do banco de dados em formato XML
-@router.get("/estrutura-bd", response_class=FastAPIResponse)
-async def obter_estrutura_bd(db: Session = Depends(get_db)):
+# create_all/drop_all feitos pelo app descartam a estrutura em cache
+estrutura.monitorar_metadados(Base.metadata, UserDB.metadata)
+
+def _ler_estrutura_sincrona():
+    with engine.connect() as conn:
+        return estrutura.obter_estrutura(conn)
+
+# Rota GET que retorna todas as tabelas e colunas do banco de dados em XML ou JSON
+@router.get("/estrutura-bd")
+async def obter_estrutura_bd(formato: Literal["xml", "json"] = Query("xml")):
     try:
-        from sqlalchemy import inspect
-        
-        # Cria o elemento raiz do XML
-        root = ET.Element("banco_de_dados")
-        
-        # Obtém o inspetor do banco de dados
-        inspector = inspect(db.get_bind())
-        
-        # Obtém todas as tabelas do banco de dados
-        tabelas = inspector.get_table_names()
-        
-        for nome_tabela in tabelas:
-            # Cria um elemento para cada tabela
-            tabela_element = ET.SubElement(root, "tabela", nome=nome_tabela)
-            
-            # Obtém as colunas da tabela atual
-            colunas = inspector.get_columns(nome_tabela)
-            
-            # Adiciona informações sobre cada coluna
-            for coluna in colunas:
-                coluna_element = ET.SubElement(tabela_element, "coluna")
-                ET.SubElement(coluna_element, "nome").text = coluna['name']
-                ET.SubElement(coluna_element, "tipo").text = str(coluna['type'])
-                ET.SubElement(coluna_element, "nulo").text = "SIM" if coluna['nullable'] else "NÃO"
-                if coluna.get('primary_key'):
-                    ET.SubElement(coluna_element, "chave_primaria").text = "SIM"
-        
-        # Converte para string XML
-        xml_string = ET.tostring(root, encoding="unicode", method="xml")
-        
-        # Formata o XML com recuos para melhor legibilidade
-        from xml.dom import minidom
-        xml_pretty = minidom.parseString(xml_string).toprettyxml(indent="  ")
-        
-        # Retorna a resposta com o tipo de conteúdo correto
-        return FastAPIResponse(
-            content=xml_pretty,
-            media_type="application/xml",
-            status_code=200
-        )
-        
+        # A leitura do catálogo roda fora do event loop
+        if async_engine is not None:
+            async with async_engine.connect() as conn:
+                dados = await conn.run_sync(estrutura.obter_estrutura)
+        else:
+            dados = await run_in_threadpool(_ler_estrutura_sincrona)
     except Exception as e:
+        if formato == "json":
+            return JSONResponse(
+                status_code=500,
+                content={"detail": f"Erro ao obter estrutura do banco de dados: {str(e)}"}
+            )
         return Response(
             content=f"<erro>Erro ao obter estrutura do banco de dados: {str(e)}</erro>",
             media_type="application/xml",
             status_code=500
         )
 
+    if formato == "json":
+        return RespostaJSONRapida(dados)
+    return StreamingResponse(estrutura.gerar_xml(dados), media_type="application/xml")
+
+@router.post("/estrutura-bd/invalidar", status_code=status.HTTP_204_NO_CONTENT)
+def invalidar_estrutura_bd(current_user: UserDB = Depends(get_current_user)):
+    """
+    Descarta a estrutura em cache, para alterações feitas fora do Alembic.
+    """
+    estrutura.invalidar_estrutura()
+
 # Rotas para gerenciamento de cidadãos
 @router.post("/cidadaos/", response_model=CidadaoInDB, status_code=status.HTTP_201_CREATED)
 def criar_cidadao(
@@ -434,18 +294,47 @@ def criar_cidadao(
     
     return crud_cidadao.create_cidadao(db=db, cidadao=cidadao)
 
-@router.get("/cidadaos/", response_model=List[Cidadao])
+def _listar_rapido(db: Session, paginacao: str, cursor: Optional[str], skip: int, limit: int, **filtros):
+    """
+    Caminho rápido das listagens: tuplas de colunas serializadas direto em JSON,
+    no mesmo formato da resposta validada pelo response_model (CPFs e telefone
+    normalizados em get_cidadaos_linhas).
+    """
+    if paginacao == "cursor" or cursor is not None:
+        linhas = crud_cidadao.get_cidadaos_linhas(
+            db, limit=limit + 1, after_id=decodificar_cursor(cursor), **filtros
+        )
+        return RespostaJSONRapida(montar_pagina(linhas, limit))
+    return RespostaJSONRapida(crud_cidadao.get_cidadaos_linhas(db, skip=skip, limit=limit, **filtros))
+
+@router.get("/cidadaos/", response_model=Union[List[Cidadao], CidadaoPagina])
 def listar_cidadaos(
-    skip: int = 0,
-    limit: int = 2000,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(2000, ge=1, le=LIMITE_MAXIMO),
     bairro: Optional[str] = None,
     status_cadastro: Optional[str] = None,
+    paginacao: Literal["offset", "cursor"] = Query("offset", description="Modo de paginação; 'cursor' retorna {items, next_cursor}"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco retornado em next_cursor (implica paginacao=cursor)"),
+    rapido: bool = Query(False, description="Seleciona apenas as colunas e serializa com orjson, sem validar cada linha"),
     db: Session = Depends(get_db)
 ):
     """
     Lista os cidadãos cadastrados com filtros opcionais.
     Acesso público - não requer autenticação.
     """
+    if rapido:
+        return _listar_rapido(
+            db, paginacao, cursor, skip, limit, bairro=bairro, status_cadastro=status_cadastro
+        )
+    if paginacao == "cursor" or cursor is not None:
+        cidadaos = crud_cidadao.get_cidadaos(
+            db=db,
+            limit=limit + 1,
+            bairro=bairro,
+            status_cadastro=status_cadastro,
+            after_id=decodificar_cursor(cursor)
+        )
+        return montar_pagina(cidadaos, limit)
     return crud_cidadao.get_cidadaos(
         db=db,
         skip=skip,
@@ -454,7 +343,28 @@ def listar_cidadaos(
         status_cadastro=status_cadastro
     )
 
-
+@router.get("/cidadaos/exportar", tags=["Cidadãos"], summary="Exportar cidadãos", response_class=StreamingResponse)
+def exportar_cidadaos(
+    formato: Literal["ndjson", "csv", "xlsx"] = Query("ndjson", description="Formato do arquivo exportado"),
+    bairro: Optional[str] = None,
+    status_cadastro: Optional[str] = None,
+    ativo: Optional[bool] = None,
+    elegivel: Optional[bool] = None
+):
+    """
+    Exporta todos os cidadãos que atendem aos filtros, em streaming.
+    As linhas são lidas do banco em lotes com cursor no servidor, com uso de memória constante.
+    """
+    filtros = crud_cidadao.filtros_cidadaos(
+        bairro=bairro, status_cadastro=status_cadastro, ativo=ativo, elegivel=elegivel
+    )
+    media_type, extensao = exportacao.FORMATOS[formato]
+    nome_arquivo = f"cidadaos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extensao}"
+    return StreamingResponse(
+        exportacao.exportar_cidadaos(engine, formato, filtros),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'}
+    )
 
 @router.get("/cidadaos/{cidadao_id}", response_model=CidadaoInDB)
 def obter_cidadao(
@@ -465,41 +375,41 @@ def obter_cidadao(
     Obtém os detalhes de um cidadão específico pelo ID.
     Acesso público - não requer autenticação.
     """
-    db_cidadao = crud_cidadao.get_cidadao(db, cidadao_id=cidadao_id)
-    if db_cidadao is None:
+    cidadao = crud_cidadao.get_cidadao_dados(db, cidadao_id=cidadao_id)
+    if cidadao is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cidadão não encontrado"
         )
-    return db_cidadao
+    return cidadao
 
 @router.get("/cidadaos/cpf/{cpf}", response_model=CidadaoInDB, tags=["Cidadãos"], summary="Buscar cidadão por CPF",
           description="Retorna os dados de um cidadão com base no CPF informado.")
 async def buscar_cidadao_por_cpf(
     cpf: str = PathParam(..., min_length=11, max_length=11, pattern=r'^[0-9]{11}$', description="CPF do cidadão (apenas números)"),
-    db: Session = Depends(get_db)
+    db = Depends(get_async_db)
 ):
     """
     Busca um cidadão pelo CPF.
     """
-    db_cidadao = crud_cidadao.get_cidadao_by_cpf(db, cpf=cpf)
-    if db_cidadao is None:
+    cidadao = await crud_cidadao_async.get_cidadao_dados_by_cpf(db, cpf=cpf)
+    if cidadao is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Cidadão com CPF {cpf} não encontrado"
         )
-    return db_cidadao
+    return cidadao
 
 @router.get("/cidadaos/nome/{nome}", response_model=List[CidadaoInDB], tags=["Cidadãos"], summary="Buscar cidadãos por nome", description="Retorna uma lista de cidadãos cujo nome contenha o termo informado.")
 async def buscar_cidadaos_por_nome(
     nome: str,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    db = Depends(get_async_db)
 ):
     """
     Busca cidadãos pelo nome (parcial ou completo).
     """
-    resultados = crud_cidadao.search_cidadaos(db, search_term=nome, limit=limit)
+    resultados = await crud_cidadao_async.search_cidadaos(db, search_term=nome, limit=limit)
     if not resultados:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -556,18 +466,50 @@ def remover_cidadao(
 
 from fastapi import Body
 
-@router.get("/cidadaos/elegiveis/{elegivel}", response_model=List[CidadaoInDB], tags=["Cidadãos"], summary="Buscar cidadãos por elegibilidade", description="Retorna cidadãos filtrando pelo campo elegivel (true/false).")
+@router.get("/cidadaos/elegiveis/{elegivel}", response_model=Union[List[CidadaoInDB], CidadaoPagina], tags=["Cidadãos"], summary="Buscar cidadãos por elegibilidade", description="Retorna cidadãos filtrando pelo campo elegivel (true/false).")
 def buscar_cidadaos_por_elegibilidade(
     elegivel: bool,
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=LIMITE_MAXIMO),
+    paginacao: Literal["offset", "cursor"] = Query("offset", description="Modo de paginação; 'cursor' retorna {items, next_cursor}"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco retornado em next_cursor (implica paginacao=cursor)"),
+    rapido: bool = Query(False, description="Seleciona apenas as colunas e serializa com orjson, sem validar cada linha"),
     db: Session = Depends(get_db)
 ):
     """
     Retorna cidadãos filtrando pelo campo elegivel (true/false).
     """
+    if rapido:
+        return _listar_rapido(db, paginacao, cursor, skip, limit, elegivel=elegivel)
+    if paginacao == "cursor" or cursor is not None:
+        cidadaos = crud_cidadao.get_cidadaos_por_elegibilidade(
+            db, elegivel, limit=limit + 1, after_id=decodificar_cursor(cursor)
+        )
+        return montar_pagina(cidadaos, limit)
     return crud_cidadao.get_cidadaos_por_elegibilidade(db, elegivel, skip=skip, limit=limit)
 
+@router.post("/cidadaos/votou/lote", response_model=CheckInVotoLoteResultado, tags=["Cidadãos"], summary="Registrar votação em lote", description="Atualiza o campo votou de vários cidadãos, identificados por ID ou CPF, em uma única requisição.")
+def registrar_votos_em_lote(
+    lote: CheckInVotoLote,
+    db: Session = Depends(get_db)
+):
+    """
+    Aplica um lote de check-ins de votação. A operação é idempotente: reenviar
+    o mesmo lote não altera nada e retorna os itens como 'inalterado'.
+    Se o mesmo cidadão aparecer mais de uma vez, vale o último item.
+    """
+    itens = crud_cidadao.registrar_votos(db, lote.itens)
+    contagem = {"atualizado": 0, "inalterado": 0, "substituido": 0, "nao_encontrado": 0}
+    for item in itens:
+        contagem[item["status"]] += 1
+    return {
+        "atualizados": contagem["atualizado"],
+        "inalterados": contagem["inalterado"],
+        "substituidos": contagem["substituido"],
+        "nao_encontrados": contagem["nao_encontrado"],
+        "itens": itens,
+    }
+
 @router.patch("/cidadaos/{cidadao_id}/votou", response_model=CidadaoInDB, tags=["Cidadãos"], summary="Atualizar status de votação", description="Atualiza o campo votou de um cidadão pelo ID.")
 def atualizar_status_votou(
     cidadao_id: int,
@@ -1,5 +1,8 @@
 # Inicializador do pacote de schemas
-from .cidadao import Cidadao, CidadaoBase, CidadaoCreate, CidadaoUpdate, CidadaoInDB
+from .cidadao import (
+    Cidadao, CidadaoBase, CidadaoCreate, CidadaoUpdate, CidadaoInDB, CidadaoPagina,
+    CheckInVoto, CheckInVotoLote, CheckInVotoResultado, CheckInVotoLoteResultado
+)
 
 __all__ = [
     'Cidadao',
@@ -7,4 +10,9 @@ __all__ = [
     'CidadaoCreate',
     'CidadaoUpdate',
     'CidadaoInDB',
+    'CidadaoPagina',
+    'CheckInVoto',
+    'CheckInVotoLote',
+    'CheckInVotoResultado',
+    'CheckInVotoLoteResultado',
 ]
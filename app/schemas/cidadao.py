@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field, validator, field_validator, field_serializer
+from pydantic import BaseModel, EmailStr, Field, validator, field_validator, field_serializer, model_validator
 from datetime import date, datetime
-from typing import Optional, Any
+from typing import Optional, Any, List, Literal
 
 class CidadaoBase(BaseModel):
     nome_completo: Optional[str] = Field(None, max_length=100)
@@ -97,3 +97,45 @@ class CidadaoInDB(CidadaoBase):
 
 class Cidadao(CidadaoInDB):
     pass
+
+class CidadaoPagina(BaseModel):
+    items: List[Cidadao]
+    next_cursor: Optional[str] = None
+
+class CheckInVoto(BaseModel):
+    """
+    Registro de votação de um cidadão, identificado pelo ID ou pelo CPF.
+    """
+    id: Optional[int] = None
+    cpf: Optional[str] = Field(None, pattern=r'^[0-9]{11}$')
+    votou: bool = True
+
+    @field_validator('cpf', mode='before')
+    def validate_cpf(cls, v):
+        if v is None or v == '':
+            return None
+        # Aceita CPF com pontuação
+        return ''.join(filter(str.isdigit, str(v)))
+
+    @model_validator(mode='after')
+    def validate_identificador(self):
+        if (self.id is None) == (self.cpf is None):
+            raise ValueError("Informe exatamente um entre 'id' e 'cpf'")
+        return self
+
+class CheckInVotoLote(BaseModel):
+    itens: List[CheckInVoto] = Field(..., min_length=1, max_length=10000)
+
+class CheckInVotoResultado(BaseModel):
+    indice: int
+    id: Optional[int] = None
+    cpf: Optional[str] = None
+    votou: bool
+    status: Literal["atualizado", "inalterado", "substituido", "nao_encontrado"]
+
+class CheckInVotoLoteResultado(BaseModel):
+    atualizados: int
+    inalterados: int
+    substituidos: int
+    nao_encontrados: int
+    itens: List[CheckInVotoResultado]
@@ -0,0 +1,61 @@
+"""
+Hash e verificação de senhas com bcrypt em um pool de threads limitado.
+
+O bcrypt é caro de propósito e libera o GIL durante o cálculo; rodar em um pool
+próprio tira o trabalho do event loop e limita quantos hashes disputam a CPU ao
+mesmo tempo, mesmo durante uma rajada de logins.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+# Fator de custo (log2 das iterações) dos novos hashes
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Hashes calculados em paralelo
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+
+
+def gerar_hash(senha: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def verificar(senha: str, hash_senha: str) -> bool:
+    try:
+        return bcrypt.checkpw(senha.encode('utf-8'), hash_senha.encode('utf-8'))
+    except ValueError:
+        # Hash armazenado em formato inválido
+        return False
+
+
+def custo(hash_senha: str) -> Optional[int]:
+    """
+    Extrai o fator de custo de um hash no formato $2b$<custo>$...
+    """
+    partes = hash_senha.split("$")
+    if len(partes) < 4 or not partes[2].isdigit():
+        return None
+    return int(partes[2])
+
+
+def precisa_rehash(hash_senha: str, rounds: int = BCRYPT_ROUNDS) -> bool:
+    return custo(hash_senha) != rounds
+
+
+def gerar_hash_no_pool(senha: str) -> str:
+    """
+    Versão para código síncrono: espera o hash calculado no pool limitado.
+    """
+    return _executor.submit(gerar_hash, senha).result()
+
+
+async def gerar_hash_async(senha: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_executor, gerar_hash, senha)
+
+
+async def verificar_async(senha: str, hash_senha: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_executor, verificar, senha, hash_senha)
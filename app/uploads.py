@@ -0,0 +1,269 @@
+"""
+Gravação dos arquivos enviados.
+
+O upload é copiado para um arquivo temporário na pasta de destino em blocos de
+tamanho fixo, com a escrita feita no threadpool, o limite de tamanho verificado
+durante a cópia e o SHA-256 calculado no caminho. Corpos maiores que o limite são
+recusados antes da leitura pelo LimiteUploadMiddleware. Conteúdo idêntico a um
+upload anterior não é gravado de novo: o arquivo existente é reaproveitado. O
+catálogo (arquivos_enviados) tem um índice único no hash, que resolve uploads
+simultâneos do mesmo conteúdo, inclusive entre processos.
+"""
+import hashlib
+import logging
+import os
+import re
+import json
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.crud import arquivo as crud_arquivo
+
+# Pasta uploads/ na raiz do projeto
+BASE_DIR = Path(__file__).resolve().parent.parent
+UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
+
+# Tamanho máximo aceito por upload, em bytes (padrão 50 MiB)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+# Tamanho dos blocos lidos do upload e gravados em disco
+UPLOAD_BLOCO_BYTES = int(os.getenv("UPLOAD_BLOCO_BYTES", str(1024 * 1024)))
+
+# Rotas cujo corpo é limitado pelo LimiteUploadMiddleware
+ROTAS_UPLOAD = ("/upload-xlsx",)
+# Margem para cabeçalhos e delimitadores do multipart além do arquivo em si
+_FOLGA_MULTIPART = 64 * 1024
+# Tentativas de gravar no catálogo quando outro processo pega o mesmo nome
+_TENTATIVAS_NOME = 5
+
+logger = logging.getLogger(__name__)
+
+
+def preparar_pasta_uploads() -> None:
+    """
+    Cria a pasta de uploads se não existir. Chamada no startup do app, não na importação.
+    """
+    try:
+        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+        logger.debug("Pasta de uploads pronta", extra={"pasta": UPLOAD_FOLDER})
+    except Exception:
+        logger.exception("Erro ao criar pasta de uploads", extra={"pasta": UPLOAD_FOLDER})
+        raise
+
+
+class UploadMuitoGrande(Exception):
+    """O upload excedeu UPLOAD_MAX_BYTES."""
+
+
+class UploadVazio(Exception):
+    """O upload não tem conteúdo."""
+
+
+def _mensagem_muito_grande(max_bytes: int) -> str:
+    return f"O arquivo excede o tamanho máximo de {max_bytes / (1024 * 1024):.1f} MB"
+
+
+class ArquivoSalvo:
+    """
+    Resultado da gravação de um upload; `duplicado` indica que o conteúdo já existia.
+    """
+
+    def __init__(self, caminho: str, tamanho: int, sha256: str, duplicado: bool):
+        self.caminho = caminho
+        self.nome = os.path.basename(caminho)
+        self.tamanho = tamanho
+        self.sha256 = sha256
+        self.duplicado = duplicado
+
+
+def nome_seguro(nome: str) -> str:
+    """Remove caracteres não seguros do nome do arquivo."""
+    return re.sub(r'[^\w\-_. ]', '_', nome)
+
+
+def _gravar_bloco(destino, hash_conteudo, bloco: bytes) -> None:
+    hash_conteudo.update(bloco)
+    destino.write(bloco)
+
+
+def _nome_livre(db: Session, pasta: str, nome: str) -> str:
+    # Se o nome já estiver em uso, adiciona o menor sufixo numérico livre
+    em_uso = crud_arquivo.nomes_em_uso(db, nome)
+    base, extensao = os.path.splitext(nome)
+    candidato, contador = nome, 1
+    while candidato in em_uso or os.path.exists(os.path.join(pasta, candidato)):
+        candidato = f"{base}_{contador}{extensao}"
+        contador += 1
+    return os.path.join(pasta, candidato)
+
+
+def _duplicado(db: Session, temporario: str, pasta: str, sha256: str, tamanho: int) -> Optional[ArquivoSalvo]:
+    """
+    Descarta o temporário se o conteúdo já estiver no catálogo. Se a entrada do catálogo
+    existir mas o arquivo tiver sumido da pasta, o temporário volta para o nome catalogado.
+    """
+    existente = crud_arquivo.get_arquivo_por_hash(db, sha256)
+    if existente is None:
+        return None
+    caminho = os.path.join(pasta, existente.nome)
+    if os.path.isfile(caminho) and os.path.getsize(caminho) == tamanho:
+        os.remove(temporario)
+    else:
+        os.replace(temporario, caminho)
+        crud_arquivo.registrar_arquivo(
+            db, nome=existente.nome, tamanho=tamanho, sha256=sha256,
+            modificado_em=datetime.utcfromtimestamp(os.path.getmtime(caminho))
+        )
+    return ArquivoSalvo(caminho, tamanho, sha256, True)
+
+
+def _publicar(
+    db: Session, temporario: str, pasta: str, nome: str, tamanho: int, sha256: str, enviado_por: Optional[str]
+) -> ArquivoSalvo:
+    """
+    Registra o conteúdo no catálogo e move o temporário para o nome final,
+    ou o descarta se o mesmo conteúdo já foi enviado.
+
+    A entrada do catálogo é gravada antes do arquivo: os índices únicos de nome e hash
+    decidem entre uploads simultâneos. Quem perde recebe IntegrityError e reaproveita
+    o conteúdo do outro ou tenta o próximo nome livre.
+    """
+    for _ in range(_TENTATIVAS_NOME):
+        salvo = _duplicado(db, temporario, pasta, sha256, tamanho)
+        if salvo is not None:
+            return salvo
+
+        caminho = _nome_livre(db, pasta, nome)
+        try:
+            crud_arquivo.registrar_arquivo(
+                db,
+                nome=os.path.basename(caminho),
+                tamanho=tamanho,
+                sha256=sha256,
+                # os.replace preserva a data de modificação do temporário
+                modificado_em=datetime.utcfromtimestamp(os.path.getmtime(temporario)),
+                enviado_por=enviado_por
+            )
+        except IntegrityError:
+            db.rollback()
+            continue
+        try:
+            os.replace(temporario, caminho)
+        except BaseException:
+            crud_arquivo.remover_arquivo(db, os.path.basename(caminho))
+            raise
+        return ArquivoSalvo(caminho, tamanho, sha256, False)
+    raise RuntimeError(f"Não foi possível reservar um nome para {nome} no catálogo de uploads")
+
+
+async def salvar_upload(
+    arquivo: UploadFile,
+    pasta: str,
+    db: Session,
+    enviado_por: Optional[str] = None,
+    max_bytes: int = UPLOAD_MAX_BYTES,
+    tamanho_bloco: int = UPLOAD_BLOCO_BYTES
+) -> ArquivoSalvo:
+    """
+    Grava o upload em `pasta` sem carregá-lo inteiro em memória.
+    Lança UploadMuitoGrande ao passar de `max_bytes` e UploadVazio se não houver conteúdo.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=pasta, prefix=".upload-", suffix=".tmp")
+    hash_conteudo = hashlib.sha256()
+    tamanho = 0
+    try:
+        with os.fdopen(descritor, "wb") as destino:
+            while bloco := await arquivo.read(tamanho_bloco):
+                tamanho += len(bloco)
+                if tamanho > max_bytes:
+                    raise UploadMuitoGrande(_mensagem_muito_grande(max_bytes))
+                await run_in_threadpool(_gravar_bloco, destino, hash_conteudo, bloco)
+        if tamanho == 0:
+            raise UploadVazio("O arquivo está vazio")
+        return await run_in_threadpool(
+            _publicar, db, temporario, pasta, nome_seguro(arquivo.filename),
+            tamanho, hash_conteudo.hexdigest(), enviado_por
+        )
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+class LimiteUploadMiddleware:
+    """
+    Middleware ASGI que recusa com 413 os uploads acima de UPLOAD_MAX_BYTES antes de o corpo
+    ser lido e gravado pelo parser de multipart: pelo Content-Length, quando informado, ou
+    assim que os bytes recebidos passam do limite (corpo enviado em chunks).
+    """
+
+    def __init__(self, app, caminhos: Iterable[str] = ROTAS_UPLOAD, max_bytes: int = UPLOAD_MAX_BYTES):
+        self.app = app
+        self.caminhos = frozenset(caminhos)
+        self.max_bytes = max_bytes
+        self.max_corpo = max_bytes + _FOLGA_MULTIPART
+
+    async def _recusar(self, send) -> None:
+        corpo = json.dumps({"message": _mensagem_muito_grande(self.max_bytes)}, ensure_ascii=False).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(corpo)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": corpo})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.caminhos:
+            await self.app(scope, receive, send)
+            return
+
+        for nome, valor in scope.get("headers", []):
+            if nome == b"content-length":
+                if valor.isdigit() and int(valor) > self.max_corpo:
+                    await self._recusar(send)
+                    return
+                break
+
+        recebido = 0
+        excedeu = False
+        respondeu = False
+
+        async def receber():
+            nonlocal recebido, excedeu
+            mensagem = await receive()
+            if mensagem["type"] == "http.request":
+                recebido += len(mensagem.get("body", b""))
+                if recebido > self.max_corpo:
+                    excedeu = True
+                    raise UploadMuitoGrande(_mensagem_muito_grande(self.max_bytes))
+            return mensagem
+
+        async def enviar(mensagem):
+            nonlocal respondeu
+            if excedeu:
+                # O erro de leitura vira 400 no FastAPI; a resposta dele é trocada pelo 413
+                if mensagem["type"] == "http.response.start" and not respondeu:
+                    respondeu = True
+                    await self._recusar(send)
+                return
+            respondeu = respondeu or mensagem["type"] == "http.response.start"
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receber, enviar)
+        except UploadMuitoGrande:
+            if respondeu:
+                raise
+            respondeu = True
+            await self._recusar(send)
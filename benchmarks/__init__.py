@@ -0,0 +1 @@
+# Benchmarks da API (executar com: python -m benchmarks.<nome>)
@@ -0,0 +1,94 @@
+"""
+Benchmark de concorrência da camada de banco nas rotas assíncronas.
+
+Compara GET /cidadaos/cpf/{cpf} sob carga concorrente em três modos:
+  bloqueante  - CRUD síncrono chamado direto no `async def` (comportamento anterior)
+  threadpool  - DB_ASYNC=false: sessão síncrona executada no threadpool
+  async       - DB_ASYNC=true: AsyncSession com driver assíncrono
+
+Uso:
+    python -m benchmarks.bench_async_db --latencia-ms 5 --concorrencia 50
+
+Sem PostgreSQL, use --latencia-ms para simular a ida e volta de rede no SQLite.
+Compare principalmente req/s: no modo bloqueante o cliente roda no mesmo event loop
+travado, então a latência por requisição não mostra o tempo de fila.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks import comum
+
+MODOS = ("bloqueante", "threadpool", "async")
+
+
+async def executar_modo(modo: str, args) -> dict:
+    comum.configurar_ambiente(args.database_url, DB_ASYNC="true" if modo == "async" else "false")
+
+    import main
+    from app import database
+    from app.crud import cidadao as crud_cidadao
+    from app.schemas.cidadao import CidadaoInDB
+
+    cidadaos = comum.preparar_banco(args.registros)
+    comum.simular_latencia(database.engine, args.latencia_ms)
+    if database.async_engine is not None:
+        comum.simular_latencia(database.async_engine, args.latencia_ms)
+
+    @main.app.get("/bench/cpf-bloqueante/{cpf}", response_model=CidadaoInDB)
+    async def cpf_bloqueante(cpf: str):
+        # A sessão é aberta e fechada no próprio handler: com get_db, o fechamento roda no
+        # threadpool e, com o event loop bloqueado, o pool de conexões se esgota (deadlock)
+        with database.SessionLocal() as db:
+            return CidadaoInDB.model_validate(crud_cidadao.get_cidadao_by_cpf(db, cpf=cpf))
+
+    prefixo = "/bench/cpf-bloqueante/" if modo == "bloqueante" else "/cidadaos/cpf/"
+    caminhos = [prefixo + cidadaos[i % len(cidadaos)]["cpf"] for i in range(args.requisicoes)]
+
+    async with comum.cliente_asgi(main.app) as cliente:
+        # Aquecimento: abre conexões e compila as consultas
+        await comum.carga(cliente, caminhos[:args.concorrencia], args.concorrencia)
+        resultado = await comum.carga(cliente, caminhos, args.concorrencia)
+
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+    return {"modo": modo, **resultado}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modo", choices=MODOS + ("todos",), default="todos")
+    parser.add_argument("--requisicoes", type=int, default=1000)
+    parser.add_argument("--concorrencia", type=int, default=50)
+    parser.add_argument("--registros", type=int, default=2000)
+    parser.add_argument("--latencia-ms", type=float, default=5.0)
+    parser.add_argument("--database-url", default=None, help="Padrão: SQLite temporário")
+    args = parser.parse_args()
+
+    if args.modo != "todos":
+        print(json.dumps(asyncio.run(executar_modo(args.modo, args))))
+        return
+
+    # Cada modo roda em um processo separado, pois a configuração é lida na importação do app
+    resultados = []
+    for modo in MODOS:
+        comando = [sys.executable, "-m", "benchmarks.bench_async_db", "--modo", modo] + [
+            f"--requisicoes={args.requisicoes}",
+            f"--concorrencia={args.concorrencia}",
+            f"--registros={args.registros}",
+            f"--latencia-ms={args.latencia_ms}",
+        ] + ([f"--database-url={args.database_url}"] if args.database_url else [])
+        saida = subprocess.run(comando, check=True, capture_output=True, text=True, env=os.environ.copy())
+        resultados.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+
+    print(f"{'modo':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'erros':>8}")
+    for r in resultados:
+        print(f"{r['modo']:<12}{r['req_por_segundo']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['erros']:>8}")
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main()
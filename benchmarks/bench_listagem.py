@@ -0,0 +1,134 @@
+"""
+Benchmark da listagem de cidadãos: limpeza de NULL por instância vs. tipo de coluna.
+
+  antes   - listener `loaded_as_persistent` com a limpeza por hasattr/getattr/setattr
+            em 27 campos, seguida da segunda passada do CRUD (comportamento anterior)
+  depois  - limpeza no processamento do resultado pelo tipo TextoLimpo
+
+Uso:
+    python -m benchmarks.bench_listagem --registros 20000 --limite 2000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks import comum
+
+MODOS = ("antes", "depois")
+
+CAMPOS_LISTENER = [
+    'cpf', 'cpf_conjuge', 'telefone', 'email',
+    'nome_conjuge', 'programa_social', 'endereco_completo',
+    'bairro', 'status_cadastro', 'nome_completo',
+    'endereco', 'cidade', 'estado', 'cep', 'rg', 'orgao_emissor',
+    'titulo_eleitor', 'zona_eleitoral', 'secao_eleitoral',
+    'nome_mae', 'nome_pai', 'naturalidade', 'nacionalidade',
+    'estado_civil', 'grau_instrucao', 'profissao', 'renda_mensal'
+]
+CAMPOS_CRUD = ['cpf', 'cpf_conjuge', 'telefone', 'email', 'nome_conjuge', 'programa_social']
+
+
+def limpeza_listener(instance):
+    for field in CAMPOS_LISTENER:
+        if hasattr(instance, field):
+            value = getattr(instance, field)
+            if isinstance(value, str):
+                value = value.strip()
+                if value.upper() == 'NULL' or value == '':
+                    setattr(instance, field, None)
+                else:
+                    setattr(instance, field, value.strip() if value else None)
+            elif value is None:
+                setattr(instance, field, None)
+
+
+def limpeza_crud(cidadao):
+    for field in CAMPOS_CRUD:
+        if hasattr(cidadao, field):
+            value = getattr(cidadao, field)
+            if isinstance(value, str) and value.upper() == 'NULL':
+                setattr(cidadao, field, None)
+
+
+def executar_modo(modo: str, args) -> dict:
+    comum.configurar_ambiente(args.database_url)
+
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+    from sqlalchemy.types import TypeDecorator
+
+    from app.models.tipos import TextoLimpo
+
+    if modo == "antes":
+        # Desliga o processamento de resultado do tipo e restaura a limpeza por instância
+        TextoLimpo.process_result_value = TypeDecorator.process_result_value
+        event.listen(Session, "loaded_as_persistent", lambda session, instance: limpeza_listener(instance))
+
+    from app.crud import cidadao as crud_cidadao
+    from app.database import SessionLocal
+    from app.schemas.cidadao import Cidadao
+
+    comum.preparar_banco(args.registros)
+
+    def listar(db):
+        cidadaos = crud_cidadao.get_cidadaos(db, skip=0, limit=args.limite)
+        if modo == "antes":
+            for cidadao in cidadaos:
+                limpeza_crud(cidadao)
+        return cidadaos
+
+    # Aquecimento
+    with SessionLocal() as db:
+        listar(db)
+
+    tempos_orm, tempos_resposta = [], []
+    for _ in range(args.repeticoes):
+        with SessionLocal() as db:
+            inicio = time.perf_counter()
+            cidadaos = listar(db)
+            tempos_orm.append(time.perf_counter() - inicio)
+            [Cidadao.model_validate(c).model_dump(mode="json") for c in cidadaos]
+            tempos_resposta.append(time.perf_counter() - inicio)
+
+    linhas = len(cidadaos)
+    return {
+        "modo": modo,
+        "linhas_por_pagina": linhas,
+        "listagem_ms": round(min(tempos_orm) * 1000, 2),
+        "listagem_linhas_por_segundo": round(linhas / min(tempos_orm)),
+        "com_serializacao_ms": round(min(tempos_resposta) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modo", choices=MODOS + ("todos",), default="todos")
+    parser.add_argument("--registros", type=int, default=20000)
+    parser.add_argument("--limite", type=int, default=2000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--database-url", default=None, help="Padrão: SQLite temporário")
+    args = parser.parse_args()
+
+    if args.modo != "todos":
+        print(json.dumps(executar_modo(args.modo, args)))
+        return
+
+    # Cada modo roda em um processo separado, pois o modo 'antes' altera classes do app
+    resultados = []
+    for modo in MODOS:
+        comando = [sys.executable, "-m", "benchmarks.bench_listagem", "--modo", modo,
+                   f"--registros={args.registros}", f"--limite={args.limite}",
+                   f"--repeticoes={args.repeticoes}"]
+        if args.database_url:
+            comando.append(f"--database-url={args.database_url}")
+        saida = subprocess.run(comando, check=True, capture_output=True, text=True, env=os.environ.copy())
+        resultados.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark de latência durante uma rajada de logins.
+
+Dispara logins concorrentes e, ao mesmo tempo, requisições a uma rota leve
+(GET /metricas/cache), medindo a latência dessa rota em dois modos:
+  bloqueante  - bcrypt.checkpw executado direto no event loop (comportamento anterior)
+  pool        - bcrypt no pool limitado de app.senhas
+
+Uso:
+    python -m benchmarks.bench_login --logins 200 --concorrencia 20 --rounds 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks import comum
+
+MODOS = ("bloqueante", "pool")
+
+
+async def executar_modo(modo: str, args) -> dict:
+    comum.configurar_ambiente(args.database_url, BCRYPT_ROUNDS=str(args.rounds))
+
+    import main
+    from app import senhas
+    from app.database import SessionLocal
+    from app.models.user import UserDB, hash_password
+
+    if modo == "bloqueante":
+        async def verificar_no_loop(senha, hash_senha):
+            return senhas.verificar(senha, hash_senha)
+        senhas.verificar_async = verificar_no_loop
+
+    comum.preparar_banco(0)
+    with SessionLocal() as db:
+        db.add(UserDB(name="mesario", password=hash_password("segredo")))
+        db.commit()
+
+    async with comum.cliente_asgi(main.app) as cliente:
+        async def logins():
+            fila = list(range(args.logins))
+
+            async def worker():
+                while fila:
+                    fila.pop()
+                    resposta = await cliente.post("/login", data={"username": "mesario", "password": "segredo"})
+                    resposta.raise_for_status()
+
+            inicio = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concorrencia)))
+            return time.perf_counter() - inicio
+
+        async def sondas(parar: asyncio.Event):
+            latencias = []
+            while not parar.is_set():
+                inicio = time.perf_counter()
+                await cliente.get("/metricas/cache")
+                latencias.append(time.perf_counter() - inicio)
+                await asyncio.sleep(0.005)
+            return latencias
+
+        # Latência da rota leve sem carga, para referência
+        ociosa = comum.estatisticas(*(await _medir_ociosa(cliente)))
+
+        parar = asyncio.Event()
+        tarefa_sondas = asyncio.create_task(sondas(parar))
+        duracao_logins = await logins()
+        parar.set()
+        latencias = await tarefa_sondas
+
+    return {
+        "modo": modo,
+        "logins_por_segundo": round(args.logins / duracao_logins, 1),
+        "rota_leve_ociosa": ociosa,
+        "rota_leve_durante_logins": comum.estatisticas(latencias, duracao_logins),
+    }
+
+
+async def _medir_ociosa(cliente, total: int = 200):
+    latencias = []
+    inicio = time.perf_counter()
+    for _ in range(total):
+        t0 = time.perf_counter()
+        await cliente.get("/metricas/cache")
+        latencias.append(time.perf_counter() - t0)
+    return latencias, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modo", choices=MODOS + ("todos",), default="todos")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concorrencia", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--database-url", default=None, help="Padrão: SQLite temporário")
+    args = parser.parse_args()
+
+    if args.modo != "todos":
+        print(json.dumps(asyncio.run(executar_modo(args.modo, args))))
+        return
+
+    # Cada modo roda em um processo separado, pois o modo 'bloqueante' altera app.senhas
+    resultados = []
+    for modo in MODOS:
+        comando = [sys.executable, "-m", "benchmarks.bench_login", "--modo", modo,
+                   f"--logins={args.logins}", f"--concorrencia={args.concorrencia}",
+                   f"--rounds={args.rounds}"]
+        if args.database_url:
+            comando.append(f"--database-url={args.database_url}")
+        saida = subprocess.run(comando, check=True, capture_output=True, text=True, env=os.environ.copy())
+        resultados.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+
+    print(f"{'modo':<12}{'logins/s':>10}{'p50 ociosa':>12}{'p50 carga':>12}{'p95 carga':>12}{'p99 carga':>12}")
+    for r in resultados:
+        carga = r["rota_leve_durante_logins"]
+        print(f"{r['modo']:<12}{r['logins_por_segundo']:>10}{r['rota_leve_ociosa']['p50_ms']:>12}"
+              f"{carga['p50_ms']:>12}{carga['p95_ms']:>12}{carga['p99_ms']:>12}")
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark da serialização das listagens de cidadãos.
+
+Compara páginas de GET /cidadaos/ e GET /cidadaos/elegiveis/{elegivel} nos modos:
+  validado  - entidades ORM validadas linha a linha pelo response_model (padrão)
+  rapido    - `rapido=true`: tuplas de colunas codificadas com orjson
+
+Mede latência por requisição e tempo de CPU do processo (cliente e app rodam
+no mesmo processo, sem rede), em requisições sequenciais.
+
+Uso:
+    python -m benchmarks.bench_serializacao --registros 20000 --limite 2000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks import comum
+
+MODOS = ("validado", "rapido")
+
+
+async def medir(cliente, caminhos, repeticoes: int) -> dict:
+    latencias = []
+    cpu_inicio = time.process_time()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for caminho in caminhos:
+            t0 = time.perf_counter()
+            resposta = await cliente.get(caminho)
+            latencias.append(time.perf_counter() - t0)
+            resposta.raise_for_status()
+    duracao = time.perf_counter() - inicio
+    resultado = comum.estatisticas(latencias, duracao)
+    resultado["cpu_ms_por_requisicao"] = round((time.process_time() - cpu_inicio) / len(latencias) * 1000, 3)
+    resultado["bytes_por_resposta"] = len(resposta.content)
+    return resultado
+
+
+async def executar(args) -> list:
+    comum.configurar_ambiente(args.database_url)
+
+    import main
+
+    comum.preparar_banco(args.registros)
+
+    rotas = {
+        "listar_cidadaos": f"/cidadaos/?limit={args.limite}",
+        "por_elegibilidade": f"/cidadaos/elegiveis/true?limit={args.limite}",
+    }
+    resultados = []
+    async with comum.cliente_asgi(main.app) as cliente:
+        for nome, caminho in rotas.items():
+            for modo in MODOS:
+                caminhos = [caminho + ("&rapido=true" if modo == "rapido" else "")]
+                # Aquecimento
+                await medir(cliente, caminhos, 2)
+                resultados.append({"rota": nome, "modo": modo, **await medir(cliente, caminhos, args.repeticoes)})
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--registros", type=int, default=20000)
+    parser.add_argument("--limite", type=int, default=2000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--database-url", default=None, help="Padrão: SQLite temporário")
+    args = parser.parse_args()
+
+    resultados = asyncio.run(executar(args))
+
+    print(f"{'rota':<20}{'modo':<10}{'p50 ms':>10}{'p95 ms':>10}{'CPU ms':>10}{'req/s':>10}")
+    for r in resultados:
+        print(f"{r['rota']:<20}{r['modo']:<10}{r['p50_ms']:>10}{r['p95_ms']:>10}"
+              f"{r['cpu_ms_por_requisicao']:>10}{r['req_por_segundo']:>10}")
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main()
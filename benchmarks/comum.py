@@ -0,0 +1,182 @@
+"""
+Utilitários compartilhados pelos benchmarks: banco de teste, massa de dados,
+cliente ASGI em processo e estatísticas de latência.
+
+Os módulos do app leem a configuração do ambiente na importação, então
+`configurar_ambiente` deve ser chamado antes de importar `main` ou `app.*`.
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+BAIRROS = [
+    "Centro", "Casa Grande", "Piraporinha", "Serraria", "Campanário", "Vila Nogueira",
+    "Eldorado", "Conceição", "Canhema", "Taboão", "Inamar", "Vila Popular",
+]
+NOMES = [
+    "José", "Maria", "Ana", "João", "Antônio", "Francisco", "Carlos", "Paulo", "Pedro",
+    "Lucas", "Luiz", "Marcos", "Luís", "Gabriel", "Rafael", "Márcia", "Juliana", "Fernanda",
+]
+SOBRENOMES = [
+    "da Silva", "dos Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves",
+    "Pereira", "Lima", "Gomes", "Conceição", "Ribeiro", "Simplício", "Adame",
+]
+
+
+def configurar_ambiente(database_url: Optional[str] = None, **variaveis: str) -> str:
+    """
+    Define DATABASE_URL (SQLite temporário por padrão) e demais variáveis do app.
+    """
+    if database_url is None:
+        database_url = os.getenv("BENCH_DATABASE_URL") or "sqlite:///" + os.path.join(
+            tempfile.mkdtemp(prefix="fumapis-bench-"), "bench.db"
+        )
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.update(variaveis)
+    return database_url
+
+
+def gerar_cidadaos(total: int, semente: int = 42) -> List[Dict[str, Any]]:
+    """
+    Gera cidadãos sintéticos com CPFs únicos de 11 dígitos.
+    """
+    rng = random.Random(semente)
+    return [
+        {
+            "nome_completo": f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}",
+            "cpf": f"{10_000_000_000 + i:011d}",
+            "bairro": rng.choice(BAIRROS),
+            "zona": str(rng.randint(1, 400)),
+            "telefone": None if rng.random() < 0.3 else f"119{rng.randint(10_000_000, 99_999_999)}",
+            "email": None,
+            "endereco_completo": f"Rua {rng.choice(SOBRENOMES)}, {rng.randint(1, 3000)}",
+            "status_cadastro": "Ativo",
+            "ativo": rng.random() > 0.05,
+            "votou": rng.random() < 0.4,
+            "elegivel": rng.random() > 0.1,
+        }
+        for i in range(total)
+    ]
+
+
+def preparar_banco(total: int, semente: int = 42) -> List[Dict[str, Any]]:
+    """
+    Recria as tabelas do app no banco configurado e insere `total` cidadãos.
+    """
+    from datetime import date
+    from app.database import engine
+    from app.models.base import Base
+    from app.models import Cidadao, user
+
+    Base.metadata.drop_all(engine)
+    user.Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    user.Base.metadata.create_all(engine)
+
+    cidadaos = gerar_cidadaos(total, semente)
+    hoje = date.today()
+    with engine.begin() as conn:
+        for inicio in range(0, total, 5000):
+            conn.execute(
+                Cidadao.__table__.insert(),
+                [dict(c, data_cadastro=hoje) for c in cidadaos[inicio:inicio + 5000]]
+            )
+    return cidadaos
+
+
+def simular_latencia(engine, latencia_ms: float) -> None:
+    """
+    Acrescenta `latencia_ms` a cada comando SQL no SQLite, dormindo na thread que
+    executa o comando, como faria a ida e volta de rede até um PostgreSQL remoto.
+    Funciona com o engine síncrono e com o assíncrono (aiosqlite).
+    """
+    from sqlalchemy import event
+    from sqlalchemy.util import await_only
+
+    if latencia_ms <= 0:
+        return
+    alvo = getattr(engine, "sync_engine", engine)
+    segundos = latencia_ms / 1000
+
+    def dormir(_sql):
+        time.sleep(segundos)
+
+    @event.listens_for(alvo, "connect")
+    def registrar(dbapi_connection, _registro):
+        conexao = getattr(dbapi_connection, "driver_connection", dbapi_connection)
+        resultado = conexao.set_trace_callback(dormir)
+        if resultado is not None:
+            # aiosqlite: o callback é registrado na thread do driver
+            await_only(resultado)
+
+    if alvo is engine:
+        # Descarta as conexões já abertas, que não têm o callback registrado
+        engine.dispose()
+
+
+def cliente_asgi(app):
+    """
+    Cliente HTTP que chama o app ASGI em processo, sem rede.
+    """
+    import httpx
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+def estatisticas(latencias: List[float], duracao: float, erros: int = 0) -> Dict[str, Any]:
+    """
+    Resume latências (em segundos) em p50/p95/p99 (ms) e vazão (req/s).
+    """
+    ordenadas = sorted(latencias)
+
+    def percentil(p: float) -> Optional[float]:
+        if not ordenadas:
+            return None
+        indice = min(int(round(p / 100 * (len(ordenadas) - 1))), len(ordenadas) - 1)
+        return round(ordenadas[indice] * 1000, 3)
+
+    return {
+        "requisicoes": len(latencias),
+        "erros": erros,
+        "p50_ms": percentil(50),
+        "p95_ms": percentil(95),
+        "p99_ms": percentil(99),
+        "media_ms": round(statistics.fmean(latencias) * 1000, 3) if latencias else None,
+        "req_por_segundo": round(len(latencias) / duracao, 1) if duracao > 0 else None,
+    }
+
+
+async def carga(cliente, caminhos: List[str], concorrencia: int) -> Dict[str, Any]:
+    """
+    Dispara GETs para `caminhos` com até `concorrencia` requisições simultâneas.
+    """
+    return await carga_pedidos(cliente, [("GET", caminho, {}) for caminho in caminhos], concorrencia)
+
+
+async def carga_pedidos(cliente, pedidos: List[tuple], concorrencia: int) -> Dict[str, Any]:
+    """
+    Dispara os `pedidos` (método, caminho, argumentos do httpx) com até `concorrencia`
+    requisições simultâneas. Respostas com status >= 400 contam como erro.
+    """
+    import asyncio
+
+    fila = list(reversed(pedidos))
+    latencias: List[float] = []
+    erros = 0
+
+    async def worker():
+        nonlocal erros
+        while fila:
+            metodo, caminho, argumentos = fila.pop()
+            inicio = time.perf_counter()
+            resposta = await cliente.request(metodo, caminho, **argumentos)
+            latencias.append(time.perf_counter() - inicio)
+            if resposta.status_code >= 400:
+                erros += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concorrencia)))
+    return estatisticas(latencias, time.perf_counter() - inicio, erros)
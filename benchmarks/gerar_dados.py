@@ -0,0 +1,358 @@
+"""
+Gerador de massa de dados sintética para cidadãos e eleitores, em escala de produção.
+
+Toda a geração é vetorizada com NumPy/pandas (1 milhão de linhas em poucos segundos):
+  - CPFs únicos com dígitos verificadores válidos;
+  - títulos de eleitor únicos e válidos (UF SP), ligados aos mesmos CPFs;
+  - bairros com distribuição desigual (poucos bairros concentram mais moradores),
+    cada bairro pertencente a uma zona, e seções de ~350 eleitores preenchidas
+    por bairro dentro de cada zona.
+
+Destinos:
+  banco  - grava direto no DATABASE_URL: COPY no PostgreSQL, inserts em lote nos demais
+  csv    - um CSV por tabela
+  xlsx   - planilhas no formato do POST /upload-xlsx (cidadãos), em partes
+
+Uso:
+    python -m benchmarks.gerar_dados --cidadaos 1000000 --eleitores 800000 --limpar
+    python -m benchmarks.gerar_dados --cidadaos 200000 --formato csv --saida dados/
+    python -m benchmarks.gerar_dados --cidadaos 50000 --formato xlsx --saida dados/ --linhas-por-arquivo 10000
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import unicodedata
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from benchmarks.comum import BAIRROS, NOMES, SOBRENOMES
+
+ZONAS = ("101", "102", "103", "104")
+ELEITORES_POR_SECAO = 350
+CIDADE, ESTADO, CODIGO_UF = "Diadema", "SP", 1
+RUAS = [
+    "Rua das Flores", "Avenida Brasil", "Rua São José", "Rua Sete de Setembro", "Avenida Alda",
+    "Rua Manoel da Nóbrega", "Avenida Fábio Eduardo Ramos Esquível", "Rua Graciosa",
+    "Avenida Piraporinha", "Rua Antônio Dias Adorno", "Rua Oriente Monti", "Avenida Casa Grande",
+]
+PROGRAMAS_SOCIAIS = ["Bolsa Família", "BPC", "Tarifa Social", "Renda Cidadã"]
+STATUS_CADASTRO = (["Ativo", "Pendente", "Inativo"], [0.95, 0.03, 0.02])
+TAMANHO_LOTE = 100_000
+
+# Colunas da planilha de upload (as que CidadaoCreate aceita)
+COLUNAS_PLANILHA = [
+    "nome_completo", "cpf", "nome_conjuge", "cpf_conjuge", "bairro", "zona", "telefone", "email",
+    "endereco_completo", "programa_social", "status_cadastro",
+]
+
+
+def _digitos(numeros: np.ndarray, largura: int) -> np.ndarray:
+    """
+    Matriz (n, largura) com os dígitos decimais de cada número, do mais significativo ao menos.
+    """
+    potencias = 10 ** np.arange(largura - 1, -1, -1, dtype=np.int64)
+    return (numeros[:, None] // potencias) % 10
+
+
+# As colunas de texto são montadas como arrays do Arrow, sem objetos Python por linha
+def _serie(array: pa.Array) -> pd.Series:
+    return pd.Series(pd.arrays.ArrowStringArray(array))
+
+
+def _texto(numeros: np.ndarray, largura: int = 0) -> pd.Series:
+    texto = pa.array(numeros).cast(pa.string())
+    return _serie(pc.utf8_lpad(texto, largura, "0") if largura else texto)
+
+
+def _escolher(valores: List[str], indices: np.ndarray) -> pd.Series:
+    return _serie(pa.array(valores, pa.string()).take(pa.array(indices)))
+
+
+def _sem_acento(texto: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+
+
+def gerar_cpfs(total: int, rng: np.random.Generator) -> pd.Series:
+    """
+    CPFs únicos de 11 dígitos com os dois dígitos verificadores corretos.
+    """
+    # Bases de 9 dígitos sem repetição; descarta as de dígitos todos iguais (CPFs inválidos)
+    bases = rng.choice(1_000_000_000, size=total + 16, replace=False)
+    bases = bases[bases % 111_111_111 != 0][:total]
+    digitos = _digitos(bases, 9)
+
+    resto = (digitos * np.arange(10, 1, -1)).sum(axis=1) % 11
+    dv1 = np.where(resto < 2, 0, 11 - resto)
+    resto = ((digitos * np.arange(11, 2, -1)).sum(axis=1) + dv1 * 2) % 11
+    dv2 = np.where(resto < 2, 0, 11 - resto)
+    return _texto(bases * 100 + dv1 * 10 + dv2, 11)
+
+
+def gerar_titulos(total: int, rng: np.random.Generator, codigo_uf: int = CODIGO_UF) -> pd.Series:
+    """
+    Títulos de eleitor únicos de 12 dígitos: sequencial (8), UF (2) e dois verificadores.
+    """
+    sequenciais = rng.choice(100_000_000, size=total, replace=False)
+    digitos = _digitos(sequenciais, 8)
+    # SP (01) e MG (02) usam 1 quando o resto é 0
+    sp_mg = codigo_uf in (1, 2)
+
+    resto = (digitos * np.arange(2, 10)).sum(axis=1) % 11
+    dv1 = np.where(resto == 10, 0, np.where((resto == 0) & sp_mg, 1, resto))
+    resto = ((codigo_uf // 10) * 7 + (codigo_uf % 10) * 8 + dv1 * 9) % 11
+    dv2 = np.where(resto == 10, 0, np.where((resto == 0) & sp_mg, 1, resto))
+    return _texto(sequenciais * 10_000 + codigo_uf * 100 + dv1 * 10 + dv2, 12)
+
+
+def cpf_valido(cpf: str) -> bool:
+    """
+    Confere os dígitos verificadores de um CPF (versão escalar, para conferência).
+    """
+    if len(cpf) != 11 or not cpf.isdigit() or len(set(cpf)) == 1:
+        return False
+    numeros = [int(c) for c in cpf]
+    for posicao in (9, 10):
+        resto = sum(n * p for n, p in zip(numeros[:posicao], range(posicao + 1, 1, -1))) % 11
+        if numeros[posicao] != (0 if resto < 2 else 11 - resto):
+            return False
+    return True
+
+
+def _pesos_bairros(rng: np.random.Generator) -> np.ndarray:
+    # Distribuição de Zipf suave: o bairro mais populoso tem ~6x o menor
+    pesos = 1 / np.arange(1, len(BAIRROS) + 1) ** 0.8
+    rng.shuffle(pesos)
+    return pesos / pesos.sum()
+
+
+def _datas(total: int, rng: np.random.Generator, inicio: str, fim: str) -> pd.Series:
+    dias = (np.datetime64(fim) - np.datetime64(inicio)).astype(int)
+    return pd.Series(np.datetime64(inicio, "s") + rng.integers(0, dias, total).astype("timedelta64[D]"))
+
+
+def gerar_pessoas(total: int, semente: int = 42) -> pd.DataFrame:
+    """
+    Moradores com nome, CPF, bairro, zona, endereço e contatos; base das duas tabelas.
+    """
+    rng = np.random.default_rng(semente)
+    bairro_idx = rng.choice(len(BAIRROS), size=total, p=_pesos_bairros(rng))
+    # Cada bairro pertence a uma zona eleitoral
+    zona_do_bairro = [ZONAS[i % len(ZONAS)] for i in range(len(BAIRROS))]
+
+    # Todas as combinações nome + dois sobrenomes, sorteadas por índice
+    combinacoes = [
+        f"{nome} {sobrenome1} {sobrenome2}"
+        for nome in NOMES for sobrenome1 in SOBRENOMES for sobrenome2 in SOBRENOMES
+    ]
+    nome_idx = rng.integers(0, len(combinacoes), total)
+    usuarios_email = _escolher([_sem_acento(nome).lower().replace(" ", ".") for nome in combinacoes], nome_idx)
+    enderecos = _escolher(RUAS, rng.integers(0, len(RUAS), total)) + ", " + _texto(rng.integers(1, 3000, total))
+    return pd.DataFrame({
+        "nome": _escolher(combinacoes, nome_idx),
+        "cpf": gerar_cpfs(total, rng),
+        "bairro": _escolher(BAIRROS, bairro_idx),
+        "zona": _escolher(zona_do_bairro, bairro_idx),
+        "endereco": enderecos,
+        "telefone": _texto(11_900_000_000 + rng.integers(10_000_000, 100_000_000, total)).where(
+            rng.random(total) < 0.7
+        ),
+        "email": (usuarios_email + _texto(np.arange(total)) + "@exemplo.com.br").where(rng.random(total) < 0.2),
+    })
+
+
+def gerar_cidadaos(pessoas: pd.DataFrame, semente: int = 42, votaram: float = 0.0) -> pd.DataFrame:
+    """
+    Linhas da tabela cidadaos a partir das pessoas geradas.
+    """
+    rng = np.random.default_rng(semente + 1)
+    total = len(pessoas)
+    casado = rng.random(total) < 0.3
+    conjuge = rng.permutation(total)
+    status_idx = rng.choice(len(STATUS_CADASTRO[0]), size=total, p=STATUS_CADASTRO[1])
+    ativo = status_idx != STATUS_CADASTRO[0].index("Inativo")
+    return pd.DataFrame({
+        "nome_completo": pessoas["nome"],
+        "cpf": pessoas["cpf"],
+        "nome_conjuge": pessoas["nome"].take(conjuge).reset_index(drop=True).where(casado),
+        "cpf_conjuge": pessoas["cpf"].take(conjuge).reset_index(drop=True).where(casado),
+        "bairro": pessoas["bairro"],
+        "zona": pessoas["zona"],
+        "telefone": pessoas["telefone"],
+        "email": pessoas["email"],
+        "endereco_completo": pessoas["endereco"],
+        "programa_social": _escolher(PROGRAMAS_SOCIAIS, rng.integers(0, len(PROGRAMAS_SOCIAIS), total)).where(
+            rng.random(total) < 0.15
+        ),
+        "status_cadastro": _escolher(STATUS_CADASTRO[0], status_idx),
+        "data_cadastro": _datas(total, rng, "2021-01-01", "2025-08-01"),
+        "ativo": ativo,
+        "votou": ativo & (rng.random(total) < votaram),
+        "elegivel": rng.random(total) < 0.9,
+    })
+
+
+def gerar_eleitores(pessoas: pd.DataFrame, semente: int = 42) -> pd.DataFrame:
+    """
+    Linhas da tabela eleitores para as pessoas informadas, com zona e seção coerentes com o bairro.
+    """
+    rng = np.random.default_rng(semente + 2)
+    total = len(pessoas)
+    # Seções preenchidas em ordem de bairro dentro de cada zona
+    zona_idx = pd.factorize(pessoas["zona"], sort=True)[0]
+    ordem = np.lexsort((pd.factorize(pessoas["bairro"])[0], zona_idx))
+    inicio_zona = np.searchsorted(zona_idx[ordem], zona_idx[ordem], side="left")
+    secoes = np.empty(total, dtype=np.int64)
+    secoes[ordem] = (np.arange(total) - inicio_zona) // ELEITORES_POR_SECAO + 1
+
+    return pd.DataFrame({
+        "nome": pessoas["nome"],
+        "cpf": pessoas["cpf"],
+        "titulo_eleitor": gerar_titulos(total, rng),
+        "zona_eleitoral": pessoas["zona"],
+        "secao_eleitoral": _texto(secoes, 4),
+        "endereco": pessoas["endereco"],
+        "bairro": pessoas["bairro"],
+        "cidade": CIDADE,
+        "estado": ESTADO,
+        "telefone": pessoas["telefone"],
+        "email": pessoas["email"],
+        "data_nascimento": _datas(total, rng, "1935-01-01", "2008-01-01"),
+        "data_cadastro": _datas(total, rng, "2021-01-01", "2025-08-01"),
+        "ativo": rng.random(total) < 0.97,
+    })
+
+
+def _copiar_postgresql(conexao, tabela: str, dados: pd.DataFrame) -> None:
+    """
+    COPY FROM STDIN em CSV, com psycopg2 (copy_expert) ou psycopg 3 (cursor.copy).
+    """
+    buffer = io.StringIO()
+    dados.to_csv(buffer, index=False, header=False)
+    comando = f"COPY {tabela} ({', '.join(dados.columns)}) FROM STDIN WITH (FORMAT csv)"
+    cursor = conexao.driver_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            buffer.seek(0)
+            cursor.copy_expert(comando, buffer)
+        else:
+            with cursor.copy(comando) as copia:
+                copia.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+
+def _registros(lote: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte o lote para valores Python: datas como date e ausentes como None.
+    """
+    lote = lote.copy()
+    for coluna in lote.select_dtypes("datetime").columns:
+        lote[coluna] = lote[coluna].dt.date
+    return lote.astype(object).where(lote.notna(), None)
+
+
+def gravar_banco(engine, tabela, dados: pd.DataFrame, tamanho_lote: int = TAMANHO_LOTE) -> None:
+    """
+    Grava as linhas em lotes: COPY no PostgreSQL, insert em lote nos demais bancos.
+    """
+    for inicio in range(0, len(dados), tamanho_lote):
+        lote = dados.iloc[inicio:inicio + tamanho_lote]
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                _copiar_postgresql(conn.connection, tabela.name, lote)
+            else:
+                conn.execute(tabela.insert(), _registros(lote).to_dict("records"))
+
+
+def gravar_xlsx(dados: pd.DataFrame, pasta: str, prefixo: str, linhas_por_arquivo: int) -> List[str]:
+    """
+    Planilhas no formato do upload, divididas em partes (o openpyxl grava linha a linha).
+    """
+    from openpyxl import Workbook
+
+    caminhos = []
+    for parte, inicio in enumerate(range(0, len(dados), linhas_por_arquivo), start=1):
+        livro = Workbook(write_only=True)
+        folha = livro.create_sheet()
+        folha.append(COLUNAS_PLANILHA)
+        lote = _registros(dados.iloc[inicio:inicio + linhas_por_arquivo][COLUNAS_PLANILHA])
+        for linha in lote.itertuples(index=False, name=None):
+            folha.append(linha)
+        caminho = os.path.join(pasta, f"{prefixo}_{parte:03d}.xlsx")
+        livro.save(caminho)
+        caminhos.append(caminho)
+    return caminhos
+
+
+def _limpar_tabelas(engine, tabelas) -> None:
+    with engine.begin() as conn:
+        for tabela in tabelas:
+            conn.execute(tabela.delete())
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cidadaos", type=int, default=100_000)
+    parser.add_argument("--eleitores", type=int, default=0,
+                        help="Eleitores gerados a partir dos primeiros cidadãos (mesmo nome e CPF)")
+    parser.add_argument("--votaram", type=float, default=0.0, help="Fração dos cidadãos ativos marcados como votou")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--formato", choices=("banco", "csv", "xlsx"), default="banco")
+    parser.add_argument("--saida", default=".", help="Pasta dos arquivos nos formatos csv e xlsx")
+    parser.add_argument("--linhas-por-arquivo", type=int, default=100_000, help="Linhas por planilha no formato xlsx")
+    parser.add_argument("--limpar", action="store_true", help="Apaga cidadãos e eleitores antes de gravar no banco")
+    args = parser.parse_args(argv)
+
+    total_pessoas = max(args.cidadaos, args.eleitores)
+    inicio = time.perf_counter()
+    pessoas = gerar_pessoas(total_pessoas, args.semente)
+    tabelas: Dict[str, pd.DataFrame] = {}
+    if args.cidadaos:
+        tabelas["cidadaos"] = gerar_cidadaos(pessoas.iloc[:args.cidadaos], args.semente, args.votaram)
+    if args.eleitores:
+        tabelas["eleitores"] = gerar_eleitores(pessoas.iloc[:args.eleitores], args.semente)
+    print(f"{total_pessoas} pessoas geradas em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+
+    inicio = time.perf_counter()
+    if args.formato == "csv":
+        os.makedirs(args.saida, exist_ok=True)
+        for nome, dados in tabelas.items():
+            caminho = os.path.join(args.saida, f"{nome}.csv")
+            dados.to_csv(caminho, index=False)
+            print(caminho)
+    elif args.formato == "xlsx":
+        os.makedirs(args.saida, exist_ok=True)
+        if "cidadaos" not in tabelas:
+            parser.error("o formato xlsx gera planilhas de cidadãos; informe --cidadaos")
+        for caminho in gravar_xlsx(tabelas["cidadaos"], args.saida, "cidadaos", args.linhas_por_arquivo):
+            print(caminho)
+    else:
+        from app.crud.apuracao import reconciliar_contadores
+        from app.database import SessionLocal, engine
+        from app.models import Cidadao, ContadorApuracao
+        from app.models.eleitor import Eleitor
+
+        destinos = {"cidadaos": Cidadao.__table__, "eleitores": Eleitor.__table__}
+        for nome in tabelas:
+            destinos[nome].create(bind=engine, checkfirst=True)
+        ContadorApuracao.__table__.create(bind=engine, checkfirst=True)
+        if args.limpar:
+            _limpar_tabelas(engine, [destinos[nome] for nome in tabelas])
+        for nome, dados in tabelas.items():
+            gravar_banco(engine, destinos[nome], dados)
+            print(f"{len(dados)} linhas gravadas em {nome}", file=sys.stderr)
+        if "cidadaos" in tabelas:
+            # A carga direta não passa pelo CRUD, então os contadores são recalculados
+            with SessionLocal() as db:
+                reconciliar_contadores(db)
+    print(f"Gravação concluída em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Verificação dos planos de consulta da listagem de cidadãos e de eleitores.
+
+Popula o banco, executa as funções reais do CRUD capturando o SQL emitido e
+roda EXPLAIN (PostgreSQL) / EXPLAIN QUERY PLAN (SQLite) em cada comando,
+conferindo se o índice esperado é usado. Termina com código 1 se algum plano
+voltar a varrer a tabela inteira. Os mesmos planos são conferidos no SQLite pela
+suíte de testes (tests/test_plano_consultas.py).
+
+Uso:
+    python -m benchmarks.plano_consultas --registros 50000
+    python -m benchmarks.plano_consultas --database-url postgresql://.../fumapis_bench
+"""
+import argparse
+import json
+import re
+import sys
+from typing import Any, Dict, List, Optional
+
+from benchmarks import comum
+
+
+def capturar_sql(engine, funcao) -> List[tuple]:
+    """
+    Executa `funcao` e retorna os comandos SELECT emitidos, com seus parâmetros.
+    """
+    from sqlalchemy import event
+
+    comandos = []
+
+    def antes(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            comandos.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", antes)
+    try:
+        funcao()
+    finally:
+        event.remove(engine, "before_cursor_execute", antes)
+    return comandos
+
+
+def indices_do_plano(conn, statement: str, parameters) -> Dict[str, Any]:
+    """
+    Retorna os índices usados no plano e se houve varredura completa de alguma tabela.
+    """
+    if conn.dialect.name == "postgresql":
+        plano = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        if isinstance(plano, str):
+            plano = json.loads(plano)
+        indices, varreduras = [], []
+
+        def percorrer(no):
+            if "Index Name" in no:
+                indices.append(no["Index Name"])
+            if no.get("Node Type") == "Seq Scan":
+                varreduras.append(no.get("Relation Name"))
+            for filho in no.get("Plans", []):
+                percorrer(filho)
+
+        percorrer(plano[0]["Plan"])
+        return {"indices": indices, "varreduras": varreduras}
+
+    linhas = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    detalhes = [linha[-1] for linha in linhas]
+    return {
+        "indices": [m.group(1) for d in detalhes for m in [re.search(r"USING (?:COVERING )?INDEX (\w+)", d)] if m],
+        "varreduras": [re.match(r"SCAN (\w+)", d).group(1) for d in detalhes if re.match(r"SCAN \w+$", d)],
+    }
+
+
+def consultas(db, engine) -> List[Dict[str, Any]]:
+    """
+    Formas de consulta conferidas: nome, chamada ao CRUD e índices aceitos.
+    """
+    from sqlalchemy import select
+    from app import exportacao
+    from app.crud import cidadao as crud
+    from app.models.eleitor import Eleitor
+
+    formas = [
+        {
+            "nome": "listagem por status (cursor)",
+            "chamada": lambda: crud.get_cidadaos(db, status_cadastro="Pendente", after_id=0, limit=50),
+            "indices": {"ix_cidadaos_status_cadastro_id"},
+        },
+        {
+            "nome": "contagem por status",
+            "chamada": lambda: crud.count_cidadaos(db, status_cadastro="Pendente"),
+            "indices": {"ix_cidadaos_status_cadastro_id"},
+        },
+        {
+            "nome": "elegibilidade (cursor)",
+            "chamada": lambda: crud.get_cidadaos_por_elegibilidade(db, False, after_id=0, limit=50),
+            "indices": {"ix_cidadaos_elegivel_id", "ix_cidadaos_ativos_elegivel_id"},
+        },
+        {
+            "nome": "ativos não elegíveis (cursor)",
+            "chamada": lambda: crud.get_cidadaos(db, ativo=True, elegivel=False, after_id=0, limit=50),
+            "indices": {"ix_cidadaos_ativos_elegivel_id", "ix_cidadaos_elegivel_id"},
+        },
+        {
+            "nome": "exportação de ativos não elegíveis",
+            "chamada": lambda: next(exportacao.ler_lotes(
+                engine, crud.filtros_cidadaos(ativo=True, elegivel=False)
+            ), None),
+            "indices": {"ix_cidadaos_ativos_elegivel_id", "ix_cidadaos_elegivel_id"},
+        },
+        {
+            "nome": "eleitores por zona e seção",
+            "chamada": lambda: db.execute(select(Eleitor.id).where(
+                Eleitor.zona_eleitoral == "101", Eleitor.secao_eleitoral == "0042"
+            )).all(),
+            "indices": {"ix_eleitores_zona_secao"},
+        },
+    ]
+    if engine.dialect.name == "postgresql":
+        # LIKE '%termo%' só tem índice no PostgreSQL (trigram sobre lower(bairro))
+        formas.append({
+            "nome": "listagem por bairro",
+            "chamada": lambda: crud.get_cidadaos(db, bairro="nogueira", limit=50),
+            "indices": {"ix_cidadaos_bairro_lower_trgm"},
+        })
+    return formas
+
+
+def preparar(total: int) -> None:
+    """
+    Popula cidadãos e eleitores com alguns valores raros, para que os filtros sejam seletivos.
+    """
+    from sqlalchemy import text
+    from app.busca import criar_indices_busca
+    from app.database import engine
+    from app.models.eleitor import Eleitor
+
+    comum.preparar_banco(total)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE cidadaos SET status_cadastro = 'Pendente' WHERE id % 50 = 0"))
+        conn.execute(Eleitor.__table__.insert(), [
+            {
+                "nome": f"Eleitor {i}",
+                "cpf": f"{20_000_000_000 + i:011d}",
+                "titulo_eleitor": f"{i:012d}",
+                "zona_eleitoral": str(100 + i % 40),
+                "secao_eleitoral": f"{i % 300:04d}",
+            }
+            for i in range(total)
+        ])
+        if engine.dialect.name == "postgresql":
+            criar_indices_busca(conn)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def conferir_planos() -> List[Dict[str, Any]]:
+    """
+    Confere o plano de cada forma de consulta no banco já populado.
+    """
+    from app.database import SessionLocal, engine
+
+    resultados = []
+    with SessionLocal() as db, engine.connect() as conn:
+        for forma in consultas(db, engine):
+            comandos = capturar_sql(engine, forma["chamada"])
+            planos = [indices_do_plano(conn, sql, parametros) for sql, parametros in comandos]
+            usados = {indice for plano in planos for indice in plano["indices"]}
+            varreduras = sorted({tabela for plano in planos for tabela in plano["varreduras"]})
+            resultados.append({
+                "consulta": forma["nome"],
+                "indices_usados": sorted(usados),
+                "indices_esperados": sorted(forma["indices"]),
+                "varreduras": varreduras,
+                "ok": bool(usados & forma["indices"]) and not varreduras,
+            })
+    return resultados
+
+
+def verificar(total: int) -> List[Dict[str, Any]]:
+    preparar(total)
+    return conferir_planos()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--registros", type=int, default=50000)
+    parser.add_argument("--database-url", default=None, help="Padrão: SQLite temporário")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args(argv)
+
+    comum.configurar_ambiente(args.database_url)
+    resultados = verificar(args.registros)
+
+    if args.json:
+        print(json.dumps(resultados, indent=2, ensure_ascii=False))
+    else:
+        for r in resultados:
+            situacao = "ok   " if r["ok"] else "FALHA"
+            detalhe = ", ".join(r["indices_usados"]) or "nenhum índice"
+            if r["varreduras"]:
+                detalhe += f" | varredura completa: {', '.join(r['varreduras'])}"
+            print(f"{situacao} {r['consulta']:<40} {detalhe}")
+    return 0 if all(r["ok"] for r in resultados) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+Suíte de benchmarks das rotas principais, para comparar resultados entre commits.
+
+Popula o banco com cidadãos sintéticos (semente fixa), chama o `main:app` real em
+processo por um cliente ASGI e mede p50/p95/p99 e vazão de cada cenário:
+  listar_cidadaos   - GET /cidadaos/ com offset e filtro por bairro
+  buscar_por_nome   - GET /cidadaos/nome/{nome} (search_cidadaos)
+  obter_por_cpf     - GET /cidadaos/cpf/{cpf}
+  login             - POST /login
+  upload_xlsx       - POST /upload-xlsx com planilhas distintas
+
+Uso:
+    python -m benchmarks.suite --saida resultados/atual.json
+    python -m benchmarks.suite --comparar resultados/base.json
+    python -m benchmarks.suite --database-url postgresql://.../fumapis_bench --cenarios listar_cidadaos login
+
+Os uploads são gravados em uma pasta temporária, não na pasta uploads/ do projeto.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks import comum
+
+USUARIO = "bench"
+SENHA = "bench-senha"
+
+
+def _listar_cidadaos(contexto, rng: random.Random, total: int) -> List[tuple]:
+    pedidos = []
+    for _ in range(total):
+        if rng.random() < 0.5:
+            caminho = f"/cidadaos/?skip={rng.randrange(0, max(contexto['registros'] - 50, 1))}&limit=50"
+        else:
+            caminho = f"/cidadaos/?bairro={rng.choice(comum.BAIRROS)}&limit=50"
+        pedidos.append(("GET", caminho, {}))
+    return pedidos
+
+
+def _buscar_por_nome(contexto, rng: random.Random, total: int) -> List[tuple]:
+    return [("GET", f"/cidadaos/nome/{rng.choice(comum.NOMES)}?limit=20", {}) for _ in range(total)]
+
+
+def _obter_por_cpf(contexto, rng: random.Random, total: int) -> List[tuple]:
+    return [("GET", f"/cidadaos/cpf/{rng.choice(contexto['cidadaos'])['cpf']}", {}) for _ in range(total)]
+
+
+def _login(contexto, rng: random.Random, total: int) -> List[tuple]:
+    return [("POST", "/login", {"data": {"username": USUARIO, "password": SENHA}}) for _ in range(total)]
+
+
+def _upload_xlsx(contexto, rng: random.Random, total: int) -> List[tuple]:
+    planilhas = contexto["planilhas"]
+    return [
+        ("POST", "/upload-xlsx", {"files": {"file": (f"bench_{i}.xlsx", planilhas[i % len(planilhas)], TIPO_XLSX)}})
+        for i in range(total)
+    ]
+
+
+TIPO_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Cenário -> gerador dos pedidos
+CENARIOS: Dict[str, Callable] = {
+    "listar_cidadaos": _listar_cidadaos,
+    "buscar_por_nome": _buscar_por_nome,
+    "obter_por_cpf": _obter_por_cpf,
+    "login": _login,
+    "upload_xlsx": _upload_xlsx,
+}
+# Cenários caros, medidos com menos requisições
+REQUISICOES_REDUZIDAS = {"login", "upload_xlsx"}
+
+
+def gerar_planilha(linhas: int, semente: int) -> bytes:
+    """
+    Planilha no formato aceito pelo upload, com conteúdo distinto por semente.
+    """
+    from openpyxl import Workbook
+
+    colunas = ["nome_completo", "cpf", "bairro", "zona", "telefone", "endereco_completo", "status_cadastro"]
+    livro = Workbook(write_only=True)
+    folha = livro.create_sheet()
+    folha.append(colunas)
+    for i, cidadao in enumerate(comum.gerar_cidadaos(linhas, semente)):
+        cidadao["cpf"] = f"{30_000_000_000 + semente * linhas + i:011d}"
+        folha.append([cidadao[coluna] for coluna in colunas])
+    saida = io.BytesIO()
+    livro.save(saida)
+    return saida.getvalue()
+
+
+def metadados(database_url: str) -> Dict[str, Any]:
+    """
+    Identifica o ambiente da execução, para que resultados de commits diferentes sejam comparáveis.
+    """
+    def git(*argumentos: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *argumentos], check=True, capture_output=True, text=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    import sqlalchemy
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "alteracoes_locais": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "banco": database_url.split("://", 1)[0],
+    }
+
+
+async def executar(args) -> Dict[str, Any]:
+    # Logs do app em WARNING: a escrita vai direto para stdout, fora do redirect_stdout abaixo
+    database_url = comum.configurar_ambiente(
+        args.database_url, BCRYPT_ROUNDS=str(args.bcrypt_rounds), LOG_LEVEL="WARNING"
+    )
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+        from app.database import SessionLocal
+        from app import uploads
+        from app.models.user import UserDB, hash_password
+
+        cidadaos = comum.preparar_banco(args.registros, args.semente)
+        with SessionLocal() as db:
+            db.add(UserDB(name=USUARIO, password=hash_password(SENHA)))
+            db.commit()
+
+    pasta_uploads = tempfile.mkdtemp(prefix="fumapis-bench-uploads-")
+    uploads.UPLOAD_FOLDER = pasta_uploads
+
+    contexto = {"registros": args.registros, "cidadaos": cidadaos, "planilhas": []}
+    if "upload_xlsx" in args.cenarios:
+        contexto["planilhas"] = [
+            gerar_planilha(args.linhas_upload, args.semente + i) for i in range(args.requisicoes_reduzidas)
+        ]
+
+    resultados = {}
+    async with comum.cliente_asgi(main.app) as cliente:
+        for nome in args.cenarios:
+            total = args.requisicoes_reduzidas if nome in REQUISICOES_REDUZIDAS else args.requisicoes
+            # Semente por cenário: a sequência de pedidos não depende dos cenários escolhidos
+            rng = random.Random(f"{args.semente}-{nome}")
+            pedidos = CENARIOS[nome](contexto, rng, total)
+            print(f"{nome}: {len(pedidos)} requisições...", file=sys.stderr)
+            with contextlib.redirect_stdout(io.StringIO()):
+                if nome not in REQUISICOES_REDUZIDAS and args.aquecimento:
+                    await comum.carga_pedidos(cliente, pedidos[:args.aquecimento], args.concorrencia)
+                resultados[nome] = await comum.carga_pedidos(cliente, pedidos, args.concorrencia)
+
+    return {
+        "metadados": metadados(database_url),
+        "parametros": {
+            "registros": args.registros,
+            "requisicoes": args.requisicoes,
+            "requisicoes_reduzidas": args.requisicoes_reduzidas,
+            "concorrencia": args.concorrencia,
+            "aquecimento": args.aquecimento,
+            "linhas_upload": args.linhas_upload,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "semente": args.semente,
+        },
+        "resultados": resultados,
+    }
+
+
+def _variacao(atual: Optional[float], base: Optional[float]) -> str:
+    if not atual or not base:
+        return "-"
+    return f"{(atual - base) / base * 100:+.1f}%"
+
+
+def imprimir(relatorio: Dict[str, Any], base: Optional[Dict[str, Any]] = None) -> None:
+    print(f"commit {relatorio['metadados']['commit']} ({relatorio['metadados']['banco']})"
+          + (f" vs {base['metadados']['commit']}" if base else ""))
+    cabecalho = f"{'cenário':<18}{'req':>6}{'erros':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}"
+    if base:
+        cabecalho += f"{'Δ p50':>10}{'Δ p95':>10}{'Δ req/s':>10}"
+    print(cabecalho)
+    for nome, r in relatorio["resultados"].items():
+        linha = (f"{nome:<18}{r['requisicoes']:>6}{r['erros']:>6}{r['p50_ms']:>10}"
+                 f"{r['p95_ms']:>10}{r['p99_ms']:>10}{r['req_por_segundo']:>10}")
+        anterior = (base or {}).get("resultados", {}).get(nome)
+        if base:
+            if anterior:
+                linha += (f"{_variacao(r['p50_ms'], anterior['p50_ms']):>10}"
+                          f"{_variacao(r['p95_ms'], anterior['p95_ms']):>10}"
+                          f"{_variacao(r['req_por_segundo'], anterior['req_por_segundo']):>10}")
+            else:
+                linha += f"{'novo':>10}"
+        print(linha)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cenarios", nargs="+", choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument("--registros", type=int, default=20000, help="Cidadãos inseridos antes da medição")
+    parser.add_argument("--requisicoes", type=int, default=500, help="Requisições por cenário")
+    parser.add_argument("--requisicoes-reduzidas", type=int, default=40, help="Requisições de login e upload")
+    parser.add_argument("--concorrencia", type=int, default=10)
+    parser.add_argument("--aquecimento", type=int, default=20, help="Requisições descartadas antes de medir")
+    parser.add_argument("--linhas-upload", type=int, default=500, help="Linhas de cada planilha enviada")
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--database-url", default=None, help="Padrão: SQLite temporário")
+    parser.add_argument("--saida", default=None, help="Grava o relatório em JSON neste arquivo")
+    parser.add_argument("--comparar", default=None, help="Relatório JSON anterior para comparação")
+    args = parser.parse_args(argv)
+
+    relatorio = asyncio.run(executar(args))
+
+    if args.saida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+    imprimir(relatorio, base)
+    if not args.saida:
+        print(json.dumps(relatorio, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
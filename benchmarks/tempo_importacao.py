@@ -0,0 +1,127 @@
+"""
+Tempo de importação do app (`import main`), medido com `python -X importtime`.
+
+Cada repetição roda em um processo novo, como um worker subindo. O relatório traz
+a mediana do tempo total, os módulos mais caros (tempo próprio) e confere se
+módulos pesados que só as rotas de planilha usam (pandas, numpy, pyarrow,
+openpyxl) ficaram fora do startup. Termina com código 1 se algum deles for
+importado ou se a mediana passar de --limite-ms, para ser usado como verificação
+de regressão do tempo de subida.
+
+Uso:
+    python -m benchmarks.tempo_importacao
+    python -m benchmarks.tempo_importacao --repeticoes 10 --limite-ms 1500
+    python -m benchmarks.tempo_importacao --sem-arquivos   # worker com ROTAS_ARQUIVOS=false
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from benchmarks import comum
+
+# Módulos que não devem ser carregados só por importar o app
+MODULOS_PROIBIDOS = ("pandas", "numpy", "pyarrow", "openpyxl")
+
+_LINHA = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def medir(modulo: str, ambiente: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Importa `modulo` em um processo novo e retorna o tempo total, o tempo próprio de cada módulo
+    e os módulos carregados, em microssegundos.
+    """
+    codigo = f"import json, sys; import {modulo}; print(json.dumps(sorted(sys.modules)))"
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        capture_output=True, text=True, env=ambiente, check=False,
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {modulo}:\n{processo.stderr[-2000:]}")
+
+    proprio: Dict[str, int] = {}
+    total = 0
+    for linha in processo.stderr.splitlines():
+        m = _LINHA.match(linha)
+        if not m:
+            continue
+        proprio[m.group(4)] = int(m.group(1))
+        # Só a linha de nível mais alto do módulo pedido traz o tempo acumulado do import inteiro
+        if m.group(4) == modulo and len(m.group(3)) == 1:
+            total = int(m.group(2))
+    carregados = json.loads(processo.stdout.strip().splitlines()[-1])
+    return {"total_us": total, "proprio_us": proprio, "modulos": carregados}
+
+
+def verificar(repeticoes: int, modulo: str, ambiente: Dict[str, str], top: int) -> Dict[str, Any]:
+    medicoes = [medir(modulo, ambiente) for _ in range(repeticoes)]
+
+    por_modulo: Dict[str, List[int]] = defaultdict(list)
+    for medicao in medicoes:
+        for nome, tempo in medicao["proprio_us"].items():
+            por_modulo[nome].append(tempo)
+    mais_caros = sorted(
+        ((nome, statistics.median(tempos)) for nome, tempos in por_modulo.items()),
+        key=lambda item: item[1], reverse=True,
+    )[:top]
+
+    carregados = set(medicoes[-1]["modulos"])
+    totais = [medicao["total_us"] / 1000 for medicao in medicoes]
+    return {
+        "modulo": modulo,
+        "repeticoes": repeticoes,
+        "mediana_ms": round(statistics.median(totais), 1),
+        "minimo_ms": round(min(totais), 1),
+        "maximo_ms": round(max(totais), 1),
+        "modulos_carregados": len(carregados),
+        "proibidos_carregados": [nome for nome in MODULOS_PROIBIDOS if nome in carregados],
+        "mais_caros": [{"modulo": nome, "proprio_ms": round(tempo / 1000, 1)} for nome, tempo in mais_caros],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--modulo", default="main", help="Módulo importado (padrão: main)")
+    parser.add_argument("--limite-ms", type=float, default=None, help="Falha se a mediana passar deste tempo")
+    parser.add_argument("--sem-arquivos", action="store_true", help="Mede com ROTAS_ARQUIVOS=false")
+    parser.add_argument("--top", type=int, default=15, help="Módulos mais caros listados")
+    parser.add_argument("--database-url", default=None, help="Padrão: SQLite temporário")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args(argv)
+
+    comum.configurar_ambiente(args.database_url)
+    ambiente = dict(os.environ)
+    ambiente["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), ambiente.get("PYTHONPATH")]))
+    if args.sem_arquivos:
+        ambiente["ROTAS_ARQUIVOS"] = "false"
+
+    resultado = verificar(args.repeticoes, args.modulo, ambiente, args.top)
+    falhas = []
+    if resultado["proibidos_carregados"]:
+        falhas.append(f"módulos pesados importados no startup: {', '.join(resultado['proibidos_carregados'])}")
+    if args.limite_ms is not None and resultado["mediana_ms"] > args.limite_ms:
+        falhas.append(f"mediana de {resultado['mediana_ms']} ms acima do limite de {args.limite_ms} ms")
+    resultado["falhas"] = falhas
+
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    else:
+        print(f"import {resultado['modulo']}: mediana {resultado['mediana_ms']} ms "
+              f"(mín {resultado['minimo_ms']}, máx {resultado['maximo_ms']}, {resultado['repeticoes']} processos), "
+              f"{resultado['modulos_carregados']} módulos carregados")
+        print(f"{'módulo':<50}{'próprio ms':>12}")
+        for item in resultado["mais_caros"]:
+            print(f"{item['modulo']:<50}{item['proprio_ms']:>12}")
+        for falha in falhas:
+            print(f"FALHA {falha}")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
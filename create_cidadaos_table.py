@@ -1,12 +1,20 @@
 from app.database import engine
 from app.models.base import Base
 from app.models.cidadao import Cidadao
+from app.models.contador import ContadorApuracao
+from app.busca import criar_indices_busca
 
 def create_tables():
     print("Criando tabela de cidadãos...")
     # Cria apenas a tabela de cidadãos
     Cidadao.__table__.create(bind=engine, checkfirst=True)
     print("Tabela 'cidadaos' criada com sucesso!")
+    ContadorApuracao.__table__.create(bind=engine, checkfirst=True)
+    print("Tabela 'contadores_apuracao' criada com sucesso!")
+    print("Criando índices de busca textual...")
+    with engine.begin() as conn:
+        criar_indices_busca(conn)
+    print("Índices de busca criados com sucesso!")
 
 if __name__ == "__main__":
     create_tables()
@@ -1,8 +1,24 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.routes import router
+from app.jobs import reconciliacao_contadores
+from app import logs, metricas, perfil_sql
 
-app = FastAPI()
+# Com ROTAS_ARQUIVOS=false o worker não registra as rotas de upload, planilhas e importação
+ROTAS_ARQUIVOS = os.getenv("ROTAS_ARQUIVOS", "true").lower() in ("1", "true", "yes", "on")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if ROTAS_ARQUIVOS:
+        from app.uploads import preparar_pasta_uploads
+        preparar_pasta_uploads()
+    reconciliacao_contadores.iniciar()
+    yield
+    reconciliacao_contadores.parar()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,3 +30,20 @@ app.add_middleware(
 
 app.include_router(router)
 
+if ROTAS_ARQUIVOS:
+    from app import uploads
+    from app.routes.arquivos import router as router_arquivos
+    app.include_router(router_arquivos)
+    # Recusa uploads acima de UPLOAD_MAX_BYTES antes de o corpo ser recebido
+    app.add_middleware(uploads.LimiteUploadMiddleware)
+
+# Métricas no formato do Prometheus (GET /metrics)
+if metricas.METRICAS:
+    metricas.instalar(app)
+
+# Perfil das consultas SQL por requisição (Server-Timing e GET /debug/sql)
+if perfil_sql.SQL_PERFIL:
+    perfil_sql.instalar(app)
+
+# Logs em JSON com o id da requisição; adicionado por último para envolver os demais middlewares
+logs.instalar(app)
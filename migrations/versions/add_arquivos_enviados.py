@@ -0,0 +1,49 @@
+"""Add arquivos_enviados upload catalog
+
+Revision ID: add_arquivos_enviados
+Revises: add_contadores_apuracao
+Create Date: 2025-08-27 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_arquivos_enviados'
+down_revision = 'add_contadores_apuracao'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'arquivos_enviados',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nome', sa.String(length=255), nullable=False),
+        sa.Column('tamanho', sa.BigInteger(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('total_linhas', sa.Integer(), nullable=True),
+        sa.Column('enviado_por', sa.String(length=100), nullable=True),
+        sa.Column('criado_em', sa.DateTime(), nullable=False),
+        sa.Column('modificado_em', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_arquivos_enviados_id'), 'arquivos_enviados', ['id'], unique=False)
+    op.create_index(op.f('ix_arquivos_enviados_nome'), 'arquivos_enviados', ['nome'], unique=True)
+    op.create_index(op.f('ix_arquivos_enviados_tamanho'), 'arquivos_enviados', ['tamanho'], unique=False)
+    op.create_index(op.f('ix_arquivos_enviados_sha256'), 'arquivos_enviados', ['sha256'], unique=False)
+    op.create_index(op.f('ix_arquivos_enviados_enviado_por'), 'arquivos_enviados', ['enviado_por'], unique=False)
+    op.create_index(op.f('ix_arquivos_enviados_criado_em'), 'arquivos_enviados', ['criado_em'], unique=False)
+    op.create_index(op.f('ix_arquivos_enviados_modificado_em'), 'arquivos_enviados', ['modificado_em'], unique=False)
+    # O catálogo é preenchido a partir da pasta de uploads com: python reconciliar_uploads.py
+
+
+def downgrade():
+    op.drop_index(op.f('ix_arquivos_enviados_modificado_em'), table_name='arquivos_enviados')
+    op.drop_index(op.f('ix_arquivos_enviados_criado_em'), table_name='arquivos_enviados')
+    op.drop_index(op.f('ix_arquivos_enviados_enviado_por'), table_name='arquivos_enviados')
+    op.drop_index(op.f('ix_arquivos_enviados_sha256'), table_name='arquivos_enviados')
+    op.drop_index(op.f('ix_arquivos_enviados_tamanho'), table_name='arquivos_enviados')
+    op.drop_index(op.f('ix_arquivos_enviados_nome'), table_name='arquivos_enviados')
+    op.drop_index(op.f('ix_arquivos_enviados_id'), table_name='arquivos_enviados')
+    op.drop_table('arquivos_enviados')
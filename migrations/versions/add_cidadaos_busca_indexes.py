@@ -0,0 +1,74 @@
+"""Add text search indexes to cidadaos
+
+Revision ID: add_cidadaos_busca_indexes
+Revises: add_eleitores_table
+Create Date: 2025-08-20 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_cidadaos_busca_indexes'
+down_revision = 'add_eleitores_table'
+branch_labels = None
+depends_on = None
+
+FTS_COLUNAS = "nome_completo, cpf, bairro, endereco_completo"
+
+def upgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        # SQLite: tabela FTS5 externa, sem acentos, mantida por triggers
+        op.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS cidadaos_fts USING fts5(
+                {FTS_COLUNAS},
+                content='cidadaos', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        op.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS cidadaos_fts_ai AFTER INSERT ON cidadaos BEGIN
+                INSERT INTO cidadaos_fts(rowid, {FTS_COLUNAS})
+                VALUES (new.id, new.nome_completo, new.cpf, new.bairro, new.endereco_completo);
+            END
+        """)
+        op.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS cidadaos_fts_ad AFTER DELETE ON cidadaos BEGIN
+                INSERT INTO cidadaos_fts(cidadaos_fts, rowid, {FTS_COLUNAS})
+                VALUES ('delete', old.id, old.nome_completo, old.cpf, old.bairro, old.endereco_completo);
+            END
+        """)
+        op.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS cidadaos_fts_au AFTER UPDATE ON cidadaos BEGIN
+                INSERT INTO cidadaos_fts(cidadaos_fts, rowid, {FTS_COLUNAS})
+                VALUES ('delete', old.id, old.nome_completo, old.cpf, old.bairro, old.endereco_completo);
+                INSERT INTO cidadaos_fts(rowid, {FTS_COLUNAS})
+                VALUES (new.id, new.nome_completo, new.cpf, new.bairro, new.endereco_completo);
+            END
+        """)
+        op.execute("INSERT INTO cidadaos_fts(cidadaos_fts) VALUES ('rebuild')")
+        return
+
+    # PostgreSQL: índices GIN trigram sobre o texto sem acento
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() não é IMMUTABLE, então não pode ser usada diretamente em um índice
+    op.execute("""
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS
+        $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_cidadaos_nome_trgm ON cidadaos USING gin (f_unaccent(nome_completo) gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_cidadaos_bairro_trgm ON cidadaos USING gin (f_unaccent(bairro) gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_cidadaos_endereco_trgm ON cidadaos USING gin (f_unaccent(endereco_completo) gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_cidadaos_cpf_trgm ON cidadaos USING gin (cpf gin_trgm_ops)")
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for trigger in ('cidadaos_fts_ai', 'cidadaos_fts_ad', 'cidadaos_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS cidadaos_fts")
+        return
+
+    for indice in ('ix_cidadaos_nome_trgm', 'ix_cidadaos_bairro_trgm', 'ix_cidadaos_endereco_trgm', 'ix_cidadaos_cpf_trgm'):
+        op.execute(f"DROP INDEX IF EXISTS {indice}")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
@@ -0,0 +1,56 @@
+"""Add composite and partial indexes for the cidadaos listing filters
+
+Revision ID: add_cidadaos_filtro_indexes
+Revises: add_arquivos_enviados
+Create Date: 2025-08-28 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_cidadaos_filtro_indexes'
+down_revision = 'add_arquivos_enviados'
+branch_labels = None
+depends_on = None
+
+# Índices (filtro, id): atendem o filtro e a ordenação por id da paginação por cursor
+INDICES = [
+    ('ix_cidadaos_elegivel_id', ['elegivel', 'id'], {}),
+    ('ix_cidadaos_status_cadastro_id', ['status_cadastro', 'id'], {}),
+    # Parcial: cidadãos ativos, o conjunto consultado na apuração e na exportação
+    ('ix_cidadaos_ativos_elegivel_id', ['elegivel', 'id'], {
+        'postgresql_where': sa.text('ativo'),
+        'sqlite_where': sa.text('ativo = 1'),
+    }),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # CONCURRENTLY não bloqueia escritas na tabela, mas não roda dentro de transação
+        with op.get_context().autocommit_block():
+            for nome, colunas, opcoes in INDICES:
+                op.create_index(nome, 'cidadaos', colunas, postgresql_concurrently=True, if_not_exists=True, **opcoes)
+            # Chave normalizada do filtro por bairro (lower(bairro) LIKE '%termo%')
+            op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cidadaos_bairro_lower_trgm "
+                "ON cidadaos USING gin (lower(bairro) gin_trgm_ops)"
+            )
+        return
+
+    for nome, colunas, opcoes in INDICES:
+        op.create_index(nome, 'cidadaos', colunas, if_not_exists=True, **opcoes)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_cidadaos_bairro_lower_trgm")
+            for nome, _, _ in reversed(INDICES):
+                op.drop_index(nome, table_name='cidadaos', postgresql_concurrently=True, if_exists=True)
+        return
+
+    for nome, _, _ in reversed(INDICES):
+        op.drop_index(nome, table_name='cidadaos', if_exists=True)
@@ -0,0 +1,47 @@
+"""Add contadores_apuracao table with turnout counters per bairro and zona
+
+Revision ID: add_contadores_apuracao
+Revises: clean_cidadaos_null_strings
+Create Date: 2025-08-26 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_contadores_apuracao'
+down_revision = 'clean_cidadaos_null_strings'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'contadores_apuracao',
+        sa.Column('bairro', sa.String(length=100), nullable=False),
+        sa.Column('zona', sa.String(length=50), nullable=False, server_default=''),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('ativos', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('elegiveis', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('votaram', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('bairro', 'zona')
+    )
+
+    # Carga inicial a partir dos cidadãos existentes
+    op.execute("""
+        INSERT INTO contadores_apuracao (bairro, zona, total, ativos, elegiveis, votaram, atualizado_em)
+        SELECT bairro,
+               COALESCE(zona, ''),
+               COUNT(*),
+               SUM(CASE WHEN COALESCE(ativo, TRUE) THEN 1 ELSE 0 END),
+               SUM(CASE WHEN COALESCE(elegivel, TRUE) THEN 1 ELSE 0 END),
+               SUM(CASE WHEN COALESCE(votou, FALSE) THEN 1 ELSE 0 END),
+               CURRENT_TIMESTAMP
+        FROM cidadaos
+        GROUP BY bairro, COALESCE(zona, '')
+    """)
+
+
+def downgrade():
+    op.drop_table('contadores_apuracao')
@@ -0,0 +1,25 @@
+"""Add zona/secao index to eleitores
+
+Revision ID: add_eleitores_zona_secao_index
+Revises: add_cidadaos_filtro_indexes
+Create Date: 2025-08-28 09:30:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_eleitores_zona_secao_index'
+down_revision = 'add_cidadaos_filtro_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Atende consultas por zona e por zona + seção
+    op.create_index(
+        'ix_eleitores_zona_secao', 'eleitores', ['zona_eleitoral', 'secao_eleitoral'], if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_index('ix_eleitores_zona_secao', table_name='eleitores', if_exists=True)
@@ -0,0 +1,30 @@
+"""Make arquivos_enviados.sha256 unique
+
+Revision ID: arquivos_enviados_sha256_unico
+Revises: add_eleitores_zona_secao_index
+Create Date: 2025-08-29 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'arquivos_enviados_sha256_unico'
+down_revision = 'add_eleitores_zona_secao_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Cópias idênticas enviadas antes da deduplicação saem do catálogo; fica a mais antiga.
+    # Os arquivos continuam na pasta de uploads.
+    op.execute(
+        "DELETE FROM arquivos_enviados WHERE id NOT IN "
+        "(SELECT MIN(id) FROM arquivos_enviados GROUP BY sha256)"
+    )
+    op.drop_index('ix_arquivos_enviados_sha256', table_name='arquivos_enviados')
+    op.create_index('ix_arquivos_enviados_sha256', 'arquivos_enviados', ['sha256'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_arquivos_enviados_sha256', table_name='arquivos_enviados')
+    op.create_index('ix_arquivos_enviados_sha256', 'arquivos_enviados', ['sha256'], unique=False)
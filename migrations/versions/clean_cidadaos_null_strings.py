@@ -0,0 +1,51 @@
+"""Clean 'NULL' and blank strings stored in cidadaos and eleitores
+
+Revision ID: clean_cidadaos_null_strings
+Revises: add_cidadaos_busca_indexes
+Create Date: 2025-08-25 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'clean_cidadaos_null_strings'
+down_revision = 'add_cidadaos_busca_indexes'
+branch_labels = None
+depends_on = None
+
+# Colunas que aceitam NULL: '', 'NULL' e espaços viram NULL
+COLUNAS_NULAS = {
+    'cidadaos': [
+        'nome_conjuge', 'cpf_conjuge', 'zona', 'telefone', 'email', 'programa_social',
+    ],
+    'eleitores': ['telefone', 'email'],
+}
+
+# Colunas NOT NULL: apenas remove espaços das pontas
+COLUNAS_OBRIGATORIAS = {
+    'cidadaos': ['nome_completo', 'cpf', 'bairro', 'endereco_completo', 'status_cadastro'],
+    'eleitores': [
+        'nome', 'cpf', 'titulo_eleitor', 'zona_eleitoral', 'secao_eleitoral',
+        'endereco', 'bairro', 'cidade', 'estado',
+    ],
+}
+
+def upgrade():
+    # Normaliza os dados uma única vez, no banco, para que a leitura não precise limpá-los
+    for tabela, colunas in COLUNAS_NULAS.items():
+        for coluna in colunas:
+            op.execute(f"""
+                UPDATE {tabela}
+                SET {coluna} = CASE
+                    WHEN UPPER(TRIM({coluna})) IN ('', 'NULL') THEN NULL
+                    ELSE TRIM({coluna})
+                END
+                WHERE {coluna} <> TRIM({coluna}) OR UPPER(TRIM({coluna})) IN ('', 'NULL')
+            """)
+    for tabela, colunas in COLUNAS_OBRIGATORIAS.items():
+        for coluna in colunas:
+            op.execute(f"UPDATE {tabela} SET {coluna} = TRIM({coluna}) WHERE {coluna} <> TRIM({coluna})")
+
+def downgrade():
+    # Limpeza de dados irreversível: os valores originais não são preservados
+    pass
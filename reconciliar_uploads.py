@@ -0,0 +1,23 @@
+from app.database import engine, SessionLocal
+from app.models.arquivo import ArquivoEnviado
+from app.crud.arquivo import reconciliar_arquivos
+from app.uploads import UPLOAD_FOLDER
+
+def reconciliar():
+    print("Verificando tabela do catálogo de uploads...")
+    ArquivoEnviado.__table__.create(bind=engine, checkfirst=True)
+    print(f"Reconciliando catálogo com a pasta {UPLOAD_FOLDER}...")
+    db = SessionLocal()
+    try:
+        resultado = reconciliar_arquivos(db, UPLOAD_FOLDER)
+    finally:
+        db.close()
+    print(
+        f"Catálogo atualizado: {resultado['adicionados']} adicionados, "
+        f"{resultado['atualizados']} atualizados, {resultado['removidos']} removidos, "
+        f"{resultado['duplicados']} cópias idênticas fora do catálogo "
+        f"({resultado['total']} arquivos na pasta)"
+    )
+
+if __name__ == "__main__":
+    reconciliar()
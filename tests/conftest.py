@@ -0,0 +1,67 @@
+"""
+Configuração dos testes: SQLite temporário, com as tabelas recriadas a cada teste.
+
+Os módulos do app leem o ambiente na importação, então as variáveis são
+definidas aqui, antes de qualquer `import app`.
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(
+    tempfile.mkdtemp(prefix="fumapis-testes-"), "testes.db"
+)
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("CONTADORES_RECONCILIAR_SEGUNDOS", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pytest
+from sqlalchemy import text
+
+
+@pytest.fixture
+def engine():
+    from app import busca, cache
+    from app.database import engine
+    from app.models import Base, user
+
+    Base.metadata.create_all(engine)
+    user.Base.metadata.create_all(engine)
+    yield engine
+    with engine.begin() as conn:
+        # A tabela FTS5 não faz parte dos metadados; os triggers caem com a tabela cidadaos
+        conn.execute(text("DROP TABLE IF EXISTS cidadaos_fts"))
+    Base.metadata.drop_all(engine)
+    user.Base.metadata.drop_all(engine)
+    busca.invalidar_disponibilidade()
+    cache.cache_cidadaos.limpar()
+    cache.cache_usuarios.limpar()
+
+
+@pytest.fixture
+def db(engine):
+    from app.database import SessionLocal
+
+    sessao = SessionLocal()
+    yield sessao
+    sessao.close()
+
+
+def novo_cidadao(**campos):
+    """
+    Dados válidos de um cidadão, com os campos informados sobrescritos.
+    """
+    return {
+        "nome_completo": "Maria da Silva",
+        "cpf": "52998224725",
+        "bairro": "Centro",
+        "endereco_completo": "Rua das Flores, 10",
+        **campos,
+    }
+
+
+@pytest.fixture
+def cliente(engine):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    return TestClient(app)
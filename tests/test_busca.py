@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import text
+
+from app import busca, models
+from app.crud import cidadao as crud
+from tests.conftest import novo_cidadao
+
+
+@pytest.fixture
+def cidadaos(db):
+    for dados in (
+        novo_cidadao(nome_completo="Maria da Silva", cpf="52998224725", bairro="Centro"),
+        novo_cidadao(nome_completo="José Pereira", cpf="11144477735", bairro="Vila Nogueira"),
+        novo_cidadao(nome_completo="Ana Souza", cpf="12345678909", bairro="Serraria"),
+    ):
+        db.add(models.Cidadao(**dados))
+    db.commit()
+
+
+@pytest.fixture
+def com_fts(engine, cidadaos):
+    with engine.begin() as conn:
+        busca.criar_indices_busca(conn)
+
+
+def nomes(resultado):
+    return sorted(cidadao.nome_completo for cidadao in resultado)
+
+
+@pytest.mark.parametrize("indexada", [False, True], ids=["sem_fts5", "com_fts5"])
+@pytest.mark.parametrize("termo, esperados", [
+    ("Silva", ["Maria da Silva"]),
+    ("ilva", ["Maria da Silva"]),            # meio de palavra
+    ("Pere", ["José Pereira"]),              # prefixo
+    ("Nogueira", ["José Pereira"]),          # bairro
+    ("998224", ["Maria da Silva"]),          # trecho de CPF
+    ("5678", ["Ana Souza"]),
+    ("za", ["Ana Souza"]),                   # termo curto
+])
+def test_busca_por_substring(db, engine, cidadaos, indexada, termo, esperados):
+    if indexada:
+        with engine.begin() as conn:
+            busca.criar_indices_busca(conn)
+    assert busca.busca_indexada_disponivel(db) is indexada
+    assert nomes(crud.search_cidadaos(db, termo)) == esperados
+
+
+def test_busca_indexada_ignora_acentos(db, com_fts):
+    assert nomes(crud.search_cidadaos(db, "jose")) == ["José Pereira"]
+
+
+def test_complemento_do_like_nao_repete_resultados_do_fts(db, com_fts):
+    db.add(models.Cidadao(**novo_cidadao(nome_completo="Silvana Costa", cpf="98765432100", bairro="Silveira")))
+    db.commit()
+    # O FTS5 acha os dois por prefixo; o LIKE que completa o limite acharia os mesmos de novo
+    resultado = crud.search_cidadaos(db, "Silv")
+    ids = [cidadao.id for cidadao in resultado]
+    assert len(ids) == len(set(ids))
+    assert nomes(resultado) == ["Maria da Silva", "Silvana Costa"]
+    assert len(crud.search_cidadaos(db, "Silv", limit=1)) == 1
+
+
+def test_disponibilidade_e_reverificada_apos_o_ttl(db, engine, cidadaos, monkeypatch):
+    assert busca.busca_indexada_disponivel(db) is False
+
+    # Índice criado por outro processo (migração), sem passar por criar_indices_busca
+    with engine.begin() as conn:
+        for comando in busca.DDL_SQLITE:
+            conn.execute(text(comando))
+    assert busca.busca_indexada_disponivel(db) is False
+
+    monkeypatch.setattr(busca, "BUSCA_VERIFICAR_SEGUNDOS", 0)
+    assert busca.busca_indexada_disponivel(db) is True
+
+
+def test_indice_removido_recorre_ao_like(db, engine, com_fts):
+    assert busca.busca_indexada_disponivel(db) is True
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE cidadaos_fts"))
+
+    assert nomes(crud.search_cidadaos(db, "Silva")) == ["Maria da Silva"]
+    assert busca.busca_indexada_disponivel(db) is False
@@ -0,0 +1,145 @@
+"""
+Cache de leitura: backend Redis com um cliente falso em memória, remoções concorrentes
+com leituras, operações fora do event loop e marcas de alteração de usuário.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import cache, crud
+from app.crud import cidadao as crud_cidadao
+from app.crud import cidadao_async
+from app.schemas.cidadao import CidadaoCreate, CidadaoUpdate
+from tests.conftest import novo_cidadao
+
+
+class RedisFalso:
+    """
+    Cliente com a parte da API do redis.Redis usada pelo CacheRedis. Guarda o thread de cada chamada.
+    """
+
+    def __init__(self):
+        self.dados = {}
+        self.threads = set()
+
+    def _vivo(self, chave):
+        item = self.dados.get(chave)
+        if item is not None and item[1] is not None and item[1] <= time.monotonic():
+            del self.dados[chave]
+            return None
+        return item
+
+    def get(self, chave):
+        self.threads.add(threading.get_ident())
+        item = self._vivo(chave)
+        return item[0] if item is not None else None
+
+    def set(self, chave, valor, ex=None, px=None, nx=False):
+        self.threads.add(threading.get_ident())
+        if nx and self._vivo(chave) is not None:
+            return None
+        validade = ex if ex is not None else (px / 1000 if px is not None else None)
+        valor = valor if isinstance(valor, bytes) else str(valor).encode()
+        self.dados[chave] = (valor, time.monotonic() + validade if validade is not None else None)
+        return True
+
+    def pipeline(self, transaction=True):
+        return PipelineFalso(self)
+
+
+class PipelineFalso:
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.comandos = []
+
+    def set(self, *args, **kwargs):
+        self.comandos.append((args, kwargs))
+
+    def execute(self):
+        return [self.cliente.set(*args, **kwargs) for args, kwargs in self.comandos]
+
+
+@pytest.fixture(params=["memoria", "redis"])
+def cache_teste(request, monkeypatch):
+    if request.param == "redis":
+        novo = cache.CacheRedis(cliente=RedisFalso(), ttl=30, ttl_remocao=0.2)
+    else:
+        novo = cache.CacheMemoria(ttl=30, ttl_remocao=0.2)
+    monkeypatch.setattr(cache, "cache_cidadaos", novo)
+    return novo
+
+
+def test_leitura_passa_pelo_cache_e_alteracao_remove(db, cache_teste):
+    cidadao = crud.create_cidadao(db, CidadaoCreate(**novo_cidadao()))
+
+    assert crud_cidadao.get_cidadao_dados(db, cidadao.id)["bairro"] == "Centro"
+    assert cache_teste.obter(cache.chave_cpf(cidadao.cpf))["bairro"] == "Centro"
+
+    crud.update_cidadao(db, cidadao, CidadaoUpdate(bairro="Vila Nova"))
+
+    assert cache_teste.obter(cache.chave_id(cidadao.id)) is None
+    assert crud_cidadao.get_cidadao_dados_by_cpf(db, cidadao.cpf)["bairro"] == "Vila Nova"
+
+
+def test_leitura_antiga_nao_volta_ao_cache_depois_da_remocao(cache_teste):
+    chave = cache.chave_id(1)
+    antigo = {"id": 1, "bairro": "Centro"}
+
+    # A leitura consultou o banco antes da alteração e só grava depois da remoção
+    cache_teste.remover(chave)
+    cache_teste.definir(chave, antigo)
+    assert cache_teste.obter(chave) is None
+
+    # Passado CACHE_TTL_REMOCAO, o preenchimento volta a valer
+    time.sleep(0.25)
+    cache_teste.definir(chave, {"id": 1, "bairro": "Vila Nova"})
+    assert cache_teste.obter(chave) == {"id": 1, "bairro": "Vila Nova"}
+
+
+class SessaoNoLoop:
+    """
+    Como a AsyncSession: `run_sync` executa a função no próprio thread do event loop.
+    """
+
+    def __init__(self, sessao):
+        self.sessao = sessao
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sessao, *args, **kwargs)
+
+
+def test_rotas_assincronas_nao_chamam_o_redis_no_event_loop(db, monkeypatch):
+    cliente = RedisFalso()
+    monkeypatch.setattr(cache, "cache_cidadaos", cache.CacheRedis(cliente=cliente, ttl=30))
+    cidadao = crud.create_cidadao(db, CidadaoCreate(**novo_cidadao()))
+    sessao = SessaoNoLoop(db)
+
+    async def cenario():
+        primeira = await cidadao_async.get_cidadao_dados_by_cpf(sessao, cidadao.cpf)
+        segunda = await cidadao_async.get_cidadao_dados_by_cpf(sessao, cidadao.cpf)
+        await cidadao_async.atualizar_votou(sessao, cidadao.id, True)
+        return threading.get_ident(), primeira, segunda
+
+    thread_do_loop, primeira, segunda = asyncio.run(cenario())
+
+    assert cliente.threads and thread_do_loop not in cliente.threads
+    assert primeira == segunda
+    assert cache.cache_cidadaos.hits == 1
+    assert cliente.get("fumapis:" + cache.chave_id(cidadao.id)) == cache._LAPIDE
+
+
+def test_marca_de_alteracao_do_usuario_sobrevive_ao_limite_de_itens(monkeypatch):
+    usuarios = cache.CacheMemoria(ttl=60, max_itens=2)
+    monkeypatch.setattr(cache, "cache_usuarios", usuarios)
+
+    cache.guardar_principal("ana", 1, 7)
+    guardado = usuarios.obter(cache.chave_usuario("ana", 1))
+    cache.invalidar_principal("ana")
+    for i in range(5):
+        usuarios.definir(f"outra:{i}", i)
+
+    # Uma leitura lenta, anterior à alteração, grava o principal de novo
+    usuarios.definir(cache.chave_usuario("ana", 1), guardado)
+    assert cache.obter_principal("ana", 1) is None
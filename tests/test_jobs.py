@@ -0,0 +1,49 @@
+"""
+Jobs de importação: cancelamento de um job ainda na fila.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from openpyxl import Workbook
+
+from app import jobs, models
+from tests.conftest import novo_cidadao
+
+
+@pytest.fixture
+def worker_unico(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="importacao-teste")
+    monkeypatch.setattr(jobs, "_executor", executor)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def _planilha(caminho, total):
+    workbook = Workbook()
+    aba = workbook.active
+    campos = list(novo_cidadao())
+    aba.append(campos)
+    for i in range(total):
+        dados = novo_cidadao(nome_completo=f"Cidadão {i}", cpf=f"{10_000_000_000 + i:011d}")
+        aba.append([dados[campo] for campo in campos])
+    workbook.save(caminho)
+    return str(caminho)
+
+
+def test_job_cancelado_na_fila_nao_grava_linhas(db, tmp_path, worker_unico):
+    caminho = _planilha(tmp_path / "cidadaos.xlsx", 20)
+    liberar = threading.Event()
+    # Ocupa o único worker: o job fica pendente na fila
+    worker_unico.submit(liberar.wait, 10)
+
+    job = jobs.enfileirar_importacao("cidadaos.xlsx", caminho, tamanho_lote=5)
+    assert jobs.cancelar_job(job.id).status == jobs.CANCELADO
+    finalizado_em = job.finalizado_em
+
+    liberar.set()
+    worker_unico.shutdown(wait=True)
+
+    assert job.status == jobs.CANCELADO
+    assert job.iniciado_em is None and job.finalizado_em == finalizado_em
+    assert db.query(models.Cidadao).count() == 0
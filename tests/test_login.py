@@ -0,0 +1,110 @@
+"""
+Logins concorrentes com o bcrypt no pool limitado de app.senhas.
+"""
+import asyncio
+import threading
+
+import httpx
+import pytest
+from jose import jwt
+
+from app import senhas
+from app.models.user import UserDB
+from app.routes.routes import ALGORITHM, SECRET_KEY
+
+CONCORRENCIA = 24
+# Custo diferente do configurado nos testes (BCRYPT_ROUNDS=4), para forçar o rehash
+ROUNDS_ANTIGO = 5
+
+
+@pytest.fixture
+def usuarios(db):
+    db.add_all([
+        UserDB(name="mesario", password=senhas.gerar_hash("segredo", rounds=ROUNDS_ANTIGO)),
+        UserDB(name="fiscal", password=senhas.gerar_hash("outro", rounds=senhas.BCRYPT_ROUNDS)),
+    ])
+    db.commit()
+
+
+@pytest.fixture
+def chamadas_bcrypt(monkeypatch):
+    """
+    Conta as chamadas ao bcrypt, o maior número simultâneo e os threads em que rodaram.
+    """
+    registro = {"verificar": 0, "gerar_hash": 0, "simultaneas": 0, "maximo": 0, "threads": set()}
+    trava = threading.Lock()
+
+    def contar(nome, funcao):
+        def chamada(*args, **kwargs):
+            with trava:
+                registro[nome] += 1
+                registro["simultaneas"] += 1
+                registro["maximo"] = max(registro["maximo"], registro["simultaneas"])
+                registro["threads"].add(threading.current_thread().name)
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                with trava:
+                    registro["simultaneas"] -= 1
+        return chamada
+
+    monkeypatch.setattr(senhas, "verificar", contar("verificar", senhas.verificar))
+    monkeypatch.setattr(senhas, "gerar_hash", contar("gerar_hash", senhas.gerar_hash))
+    return registro
+
+
+async def _rajada(tentativas):
+    from main import app
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as cliente:
+        return await asyncio.gather(*(
+            cliente.post("/login", data={"username": usuario, "password": senha})
+            for usuario, senha in tentativas
+        ))
+
+
+def _hash_gravado(db, nome):
+    db.expire_all()
+    return db.query(UserDB).filter(UserDB.name == nome).one().password
+
+
+def test_logins_concorrentes(engine, db, usuarios, chamadas_bcrypt):
+    tentativas = [
+        [("mesario", "segredo"), ("mesario", "errada"), ("fiscal", "outro"), ("ninguem", "segredo")][i % 4]
+        for i in range(CONCORRENCIA)
+    ]
+
+    respostas = asyncio.run(_rajada(tentativas))
+
+    for (usuario, senha), resposta in zip(tentativas, respostas):
+        if (usuario, senha) in (("mesario", "segredo"), ("fiscal", "outro")):
+            assert resposta.status_code == 200
+            token = jwt.decode(resposta.json()["access_token"], SECRET_KEY, algorithms=[ALGORITHM])
+            assert token["sub"] == usuario
+        else:
+            assert resposta.status_code == 400
+
+    # Usuário inexistente não chega ao bcrypt; os demais são verificados no pool, nunca no event loop
+    assert chamadas_bcrypt["verificar"] == CONCORRENCIA * 3 // 4
+    assert chamadas_bcrypt["maximo"] <= senhas.BCRYPT_WORKERS
+    assert all(nome.startswith("bcrypt") for nome in chamadas_bcrypt["threads"])
+
+
+def test_rehash_no_login_concorrente(engine, db, usuarios, chamadas_bcrypt):
+    respostas = asyncio.run(_rajada([("mesario", "segredo")] * CONCORRENCIA))
+
+    assert all(resposta.status_code == 200 for resposta in respostas)
+    novo_hash = _hash_gravado(db, "mesario")
+    assert senhas.custo(novo_hash) == senhas.BCRYPT_ROUNDS
+    assert senhas.verificar("segredo", novo_hash)
+    assert 1 <= chamadas_bcrypt["gerar_hash"] <= CONCORRENCIA
+
+    # Com o hash no custo atual não há novo rehash, e senha errada não altera o hash
+    chamadas_bcrypt["gerar_hash"] = 0
+    respostas = asyncio.run(_rajada([("mesario", "segredo"), ("mesario", "errada")] * 4))
+
+    assert [resposta.status_code for resposta in respostas] == [200, 400] * 4
+    assert chamadas_bcrypt["gerar_hash"] == 0
+    assert _hash_gravado(db, "mesario") == novo_hash
+    assert _hash_gravado(db, "fiscal") != novo_hash
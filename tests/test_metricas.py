@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import metricas, perfil_sql
+
+
+def test_limites_sao_inclusivos_e_acumulados():
+    histograma = metricas.Histograma(limites=(0.5, 0.1, 1.0))
+    for valor in (0.05, 0.1, 0.3, 1.0, 2.0):
+        histograma.observar(valor)
+
+    # Limites ordenados; o valor igual ao limite entra no próprio bucket (le = "menor ou igual")
+    assert histograma.limites == (0.1, 0.5, 1.0)
+    assert histograma.buckets() == {"0.1": 2, "0.5": 3, "1.0": 4, "+Inf": 5}
+    assert histograma.total == 5
+    assert histograma.soma == pytest.approx(3.45)
+
+
+def test_histograma_vazio_tem_todos_os_buckets_zerados():
+    histograma = metricas.Histograma(limites=(1.0, 5.0))
+    assert histograma.buckets() == {"1.0": 0, "5.0": 0, "+Inf": 0}
+
+
+def test_exposicao_do_histograma_rotulado():
+    nome = "fumapis_requisicoes_http_duracao_segundos"
+    rotulos = ("GET", "/teste/metricas")
+    for valor in (0.003, 0.005, 0.2, 30.0):
+        metricas.duracao_requisicoes.observar(rotulos, valor)
+
+    linhas = metricas.expor().splitlines()
+    assert f"# TYPE {nome} histogram" in linhas
+
+    serie = '{metodo="GET",rota="/teste/metricas"'
+    buckets = {
+        linha.split('le="')[1].split('"')[0]: int(linha.rsplit(" ", 1)[1])
+        for linha in linhas if linha.startswith(f"{nome}_bucket{serie},le=")
+    }
+    esperado = {repr(limite): 0 for limite in metricas.LIMITES_LATENCIA}
+    esperado.update({"0.005": 2, "0.01": 2, "0.025": 2, "0.05": 2, "0.1": 2})
+    esperado.update({"0.25": 3, "0.5": 3, "1.0": 3, "2.5": 3, "5.0": 3, "10.0": 3, "+Inf": 4})
+    assert buckets == esperado
+    # Os buckets saem em ordem crescente de limite, terminando em +Inf
+    assert list(buckets) == [repr(limite) for limite in metricas.LIMITES_LATENCIA] + ["+Inf"]
+
+    assert f"{nome}_sum{serie}}} 30.208" in linhas
+    assert f"{nome}_count{serie}}} 4" in linhas
+
+
+def test_exposicao_de_histograma_sem_rotulos():
+    histograma = metricas.Histograma(limites=(1.0,))
+    histograma.observar(0.5)
+    assert metricas.amostras_histograma("x_segundos", (), (), histograma) == [
+        'x_segundos_bucket{le="1.0"} 1',
+        'x_segundos_bucket{le="+Inf"} 1',
+        "x_segundos_sum 0.5",
+        "x_segundos_count 1",
+    ]
+
+
+def test_metricas_e_perfil_medem_cada_comando_uma_vez(monkeypatch):
+    monkeypatch.setattr(metricas, "OBSERVADORES_SQL", [])
+    engine_teste = create_engine("sqlite://")
+    metricas.monitorar_engine(engine_teste)
+    perfil_sql.monitorar_engine(engine_teste)
+
+    # Um único par de eventos alimenta o histograma e o perfil da requisição
+    assert len(engine_teste.dispatch.before_cursor_execute) == 1
+    assert len(engine_teste.dispatch.after_cursor_execute) == 1
+
+    antes = metricas.consultas_sql.valor(("SELECT",))
+    perfil = perfil_sql.PerfilRequisicao("GET", "/teste")
+    token = perfil_sql._perfil_atual.set(perfil)
+    try:
+        with engine_teste.connect() as conexao:
+            conexao.execute(text("SELECT 1"))
+    finally:
+        perfil_sql._perfil_atual.reset(token)
+
+    assert metricas.consultas_sql.valor(("SELECT",)) == antes + 1
+    assert [sql for sql, _ in perfil.consultas] == ["SELECT 1"]
+
+
+def test_rota_metrics_desativada_sem_metricas(cliente, monkeypatch):
+    monkeypatch.setattr(metricas, "METRICAS", False)
+    assert cliente.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(metricas, "METRICAS", True)
+    assert cliente.get("/metrics").status_code == 200
@@ -0,0 +1,68 @@
+import pytest
+
+from app import models
+from app.paginacao import decodificar_cursor, montar_pagina
+from tests.conftest import novo_cidadao
+
+
+class Item:
+    def __init__(self, id):
+        self.id = id
+
+
+def test_pagina_com_excedente_aponta_para_o_ultimo_item():
+    pagina = montar_pagina([Item(1), Item(2), Item(3)], 2)
+    assert [item.id for item in pagina["items"]] == [1, 2]
+    assert decodificar_cursor(pagina["next_cursor"]) == 2
+
+
+@pytest.mark.parametrize("itens", [[], [{"id": 1}]])
+@pytest.mark.parametrize("limit", [0, -1])
+def test_pagina_vazia_nao_quebra(itens, limit):
+    assert montar_pagina(itens, limit) == {"items": [], "next_cursor": None}
+
+
+@pytest.fixture
+def cidadaos(db):
+    for i in range(3):
+        db.add(models.Cidadao(**novo_cidadao(cpf=f"{10_000_000_000 + i:011d}")))
+    db.commit()
+
+
+@pytest.mark.parametrize("caminho", ["/cidadaos/", "/cidadaos/elegiveis/true"])
+@pytest.mark.parametrize("parametros", [
+    "paginacao=cursor&limit=0",
+    "paginacao=cursor&limit=-5",
+    "limit=0",
+    "limit=100000",
+    "skip=-1",
+])
+def test_limit_invalido_retorna_422(cliente, cidadaos, caminho, parametros):
+    assert cliente.get(f"{caminho}?{parametros}").status_code == 422
+
+
+@pytest.mark.parametrize("caminho", ["/cidadaos/", "/cidadaos/elegiveis/true"])
+def test_paginacao_por_cursor(cliente, cidadaos, caminho):
+    primeira = cliente.get(f"{caminho}?paginacao=cursor&limit=2").json()
+    assert len(primeira["items"]) == 2
+    segunda = cliente.get(f"{caminho}?cursor={primeira['next_cursor']}&limit=2").json()
+    assert len(segunda["items"]) == 1 and segunda["next_cursor"] is None
+
+
+@pytest.mark.parametrize("caminho", ["/cidadaos/", "/cidadaos/elegiveis/true"])
+@pytest.mark.parametrize("parametros", ["", "paginacao=cursor&"])
+def test_caminho_rapido_normaliza_como_o_schema(cliente, db, caminho, parametros):
+    # Valores gravados sem passar pelo schema, como em importações antigas
+    db.add(models.Cidadao(**novo_cidadao(
+        cpf="529.982.247-25", cpf_conjuge="123.456", telefone="(11) 98888-7777", email=""
+    )))
+    db.commit()
+
+    validada = cliente.get(f"{caminho}?{parametros}rapido=false").json()
+    rapida = cliente.get(f"{caminho}?{parametros}rapido=true").json()
+
+    assert rapida == validada
+    item = (rapida["items"] if parametros else rapida)[0]
+    assert (item["cpf"], item["cpf_conjuge"], item["telefone"], item["email"]) == (
+        "52998224725", None, "11988887777", None
+    )
@@ -0,0 +1,39 @@
+"""
+Regressão dos planos de consulta: as listagens devem usar os índices, sem varrer a tabela.
+Reaproveita as formas de consulta de benchmarks/plano_consultas.py (EXPLAIN QUERY PLAN).
+"""
+import pytest
+from sqlalchemy import text
+
+from benchmarks import plano_consultas
+
+# Volume suficiente para o planejador do SQLite preferir os índices após o ANALYZE
+REGISTROS = 3000
+
+
+@pytest.fixture
+def banco_populado(engine):
+    plano_consultas.preparar(REGISTROS)
+    # Descarta comandos preparados em testes anteriores, antes do ANALYZE
+    engine.dispose()
+    return engine
+
+
+def test_consultas_usam_os_indices_esperados(banco_populado):
+    resultados = plano_consultas.conferir_planos()
+
+    assert len(resultados) >= 6
+    falhas = [r for r in resultados if not r["ok"]]
+    assert not falhas, falhas
+
+
+def test_plano_sem_o_indice_e_acusado(banco_populado):
+    with banco_populado.begin() as conn:
+        conn.execute(text("DROP INDEX ix_cidadaos_status_cadastro_id"))
+    # As conexões do pool guardam comandos já preparados com o plano antigo
+    banco_populado.dispose()
+
+    resultados = {r["consulta"]: r for r in plano_consultas.conferir_planos()}
+
+    assert not resultados["listagem por status (cursor)"]["ok"]
+    assert resultados["eleitores por zona e seção"]["ok"]
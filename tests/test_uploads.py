@@ -0,0 +1,128 @@
+"""
+Gravação de uploads: limite de tamanho antes da leitura do corpo e deduplicação pelo hash.
+"""
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app import models, uploads
+from app.crud import arquivo as crud_arquivo
+
+LIMITE = 1024
+
+
+@pytest.fixture
+def app_limitado():
+    lidos = []
+    app = FastAPI()
+
+    @app.post("/upload-xlsx")
+    async def receber(file: UploadFile = File(...)):
+        lidos.append(len(await file.read()))
+        return {"bytes": lidos[-1]}
+
+    app.add_middleware(uploads.LimiteUploadMiddleware, max_bytes=LIMITE)
+    return TestClient(app), lidos
+
+
+def test_content_length_acima_do_limite_recusado_antes_da_leitura(app_limitado):
+    cliente, lidos = app_limitado
+    grande = b"x" * (LIMITE + uploads._FOLGA_MULTIPART + 1)
+
+    resposta = cliente.post("/upload-xlsx", files={"file": ("a.xlsx", grande)})
+
+    assert resposta.status_code == 413
+    assert "tamanho máximo" in resposta.json()["message"]
+    assert lidos == []
+
+
+def test_corpo_em_chunks_recusado_ao_passar_do_limite(app_limitado):
+    cliente, _ = app_limitado
+    aplicacao = cliente.app
+    entregues = []
+    respostas = []
+
+    inicio = b'--limite\r\nContent-Disposition: form-data; name="file"; filename="a.xlsx"\r\n\r\n'
+
+    async def receive():
+        # Sem Content-Length: o limite só é percebido enquanto o corpo chega
+        entregues.append(1)
+        corpo = b"x" * 8192 if len(entregues) > 1 else inicio
+        return {"type": "http.request", "body": corpo, "more_body": len(entregues) < 100}
+
+    async def send(mensagem):
+        respostas.append(mensagem)
+
+    escopo = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/upload-xlsx", "raw_path": b"/upload-xlsx", "root_path": "",
+        "query_string": b"", "client": ("teste", 1), "server": ("teste", 80),
+        "headers": [(b"content-type", b"multipart/form-data; boundary=limite")],
+    }
+    asyncio.run(aplicacao(escopo, receive, send))
+
+    assert [m["status"] for m in respostas if m["type"] == "http.response.start"] == [413]
+    # A leitura para logo depois de passar do limite, sem consumir o resto do corpo
+    assert len(entregues) == (LIMITE + uploads._FOLGA_MULTIPART - len(inicio)) // 8192 + 2
+
+
+def test_upload_dentro_do_limite_passa(app_limitado):
+    cliente, lidos = app_limitado
+
+    resposta = cliente.post("/upload-xlsx", files={"file": ("a.xlsx", b"x" * LIMITE)})
+
+    assert resposta.status_code == 200
+    assert lidos == [LIMITE]
+
+
+def _salvar(db, pasta, conteudo, nome="planilha.xlsx"):
+    arquivo = UploadFile(io.BytesIO(conteudo), filename=nome)
+    return asyncio.run(uploads.salvar_upload(arquivo, str(pasta), db))
+
+
+def _arquivos_na_pasta(pasta):
+    return sorted(nome for nome in os.listdir(pasta) if not nome.startswith("."))
+
+
+def test_conteudo_repetido_reaproveita_o_arquivo(db, tmp_path):
+    primeiro = _salvar(db, tmp_path, b"conteudo")
+    segundo = _salvar(db, tmp_path, b"conteudo", nome="outro.xlsx")
+    terceiro = _salvar(db, tmp_path, b"outro conteudo")
+
+    assert not primeiro.duplicado
+    assert segundo.duplicado and segundo.caminho == primeiro.caminho
+    assert not terceiro.duplicado and terceiro.nome == "planilha_1.xlsx"
+    assert _arquivos_na_pasta(tmp_path) == ["planilha.xlsx", "planilha_1.xlsx"]
+    assert db.query(models.ArquivoEnviado).count() == 2
+
+
+def test_upload_simultaneo_do_mesmo_conteudo_resolvido_pelo_indice_unico(db, tmp_path, monkeypatch):
+    primeiro = _salvar(db, tmp_path, b"conteudo")
+
+    # Simula outro processo que consultou o hash antes do primeiro gravar no catálogo
+    consultar = crud_arquivo.get_arquivo_por_hash
+    respostas = iter([None])
+    monkeypatch.setattr(
+        crud_arquivo, "get_arquivo_por_hash", lambda db, sha256: next(respostas, None) or consultar(db, sha256)
+    )
+    segundo = _salvar(db, tmp_path, b"conteudo", nome="outro.xlsx")
+
+    assert segundo.duplicado and segundo.caminho == primeiro.caminho
+    assert _arquivos_na_pasta(tmp_path) == ["planilha.xlsx"]
+    assert os.listdir(tmp_path) == ["planilha.xlsx"]
+    assert db.query(models.ArquivoEnviado).count() == 1
+
+
+def test_reconciliar_mantem_uma_entrada_por_conteudo(db, tmp_path):
+    for nome, conteudo in (("a.txt", b"igual"), ("b.txt", b"igual"), ("c.txt", b"diferente")):
+        (tmp_path / nome).write_bytes(conteudo)
+
+    resultado = crud_arquivo.reconciliar_arquivos(db, str(tmp_path))
+
+    assert resultado["adicionados"] == 2
+    assert resultado["duplicados"] == 1
+    assert db.query(models.ArquivoEnviado).count() == 2
@@ -0,0 +1,96 @@
+"""
+Check-in de votação em lote: resultado por item, contadores e ordem dos bloqueios.
+"""
+from sqlalchemy import event
+
+from app import crud
+from app.crud import apuracao
+from app.schemas.cidadao import CheckInVoto, CidadaoCreate
+from tests.conftest import novo_cidadao
+
+CPFS = ["52998224725", "11144477735", "39053344705", "86288366757", "71428793860"]
+
+
+def _cadastrar(db):
+    bairros = ["Vila Nova", "Centro", "Vila Nova", "Alto", "Centro"]
+    return [
+        crud.create_cidadao(db, CidadaoCreate(**novo_cidadao(
+            nome_completo=f"Cidadão {indice}", cpf=cpf, bairro=bairro, zona="10"
+        )))
+        for indice, (cpf, bairro) in enumerate(zip(CPFS, bairros))
+    ]
+
+
+def _capturar(engine, trecho):
+    capturados = []
+
+    def antes(conn, cursor, sql, parametros, contexto, executemany):
+        if trecho in sql:
+            capturados.append((sql, parametros))
+
+    event.listen(engine, "before_cursor_execute", antes)
+    return capturados, lambda: event.remove(engine, "before_cursor_execute", antes)
+
+
+def test_registrar_votos_resultado_e_contadores(db):
+    cidadaos = _cadastrar(db)
+    itens = [
+        CheckInVoto(cpf=CPFS[3]),
+        CheckInVoto(id=cidadaos[0].id),
+        CheckInVoto(cpf="12345678909"),
+        CheckInVoto(id=cidadaos[3].id, votou=False),
+        CheckInVoto(id=cidadaos[4].id),
+    ]
+
+    resultados = crud.registrar_votos(db, itens, tamanho_lote=2)
+
+    assert [r["status"] for r in resultados] == [
+        "substituido", "atualizado", "nao_encontrado", "inalterado", "atualizado"
+    ]
+    assert apuracao.get_totais(db)["votaram"] == 2
+    votaram = {linha["bairro"]: linha["votaram"] for linha in apuracao.get_contadores(db)}
+    assert votaram == {"Alto": 0, "Centro": 1, "Vila Nova": 1}
+
+
+def test_registrar_votos_bloqueia_em_ordem_de_id(db, engine):
+    cidadaos = _cadastrar(db)
+    ids = [cidadao.id for cidadao in cidadaos]
+    # Mistura ids e CPFs fora de ordem: os bloqueios devem seguir a ordem dos ids mesmo assim
+    itens = [
+        CheckInVoto(cpf=CPFS[4]),
+        CheckInVoto(id=ids[2]),
+        CheckInVoto(cpf=CPFS[0]),
+        CheckInVoto(id=ids[3]),
+        CheckInVoto(cpf=CPFS[1]),
+    ]
+    consultas, remover = _capturar(engine, "cidadaos.elegivel")
+    try:
+        crud.registrar_votos(db, itens, tamanho_lote=2)
+    finally:
+        remover()
+
+    bloqueados = []
+    for sql, parametros in consultas:
+        assert "ORDER BY cidadaos.id" in sql
+        bloqueados.extend(parametros)
+    assert bloqueados == sorted(ids)
+
+
+def test_ajustar_contadores_em_ordem_de_chave(db, engine):
+    transicoes = [
+        (None, ("Vila Nova", "10", True, True, False)),
+        (None, ("Centro", "20", True, True, False)),
+        (None, ("Alto", "", True, True, False)),
+        (None, ("Centro", "10", True, True, False)),
+    ]
+    execucoes, remover = _capturar(engine, "contadores")
+    try:
+        apuracao.ajustar_contadores(db, transicoes)
+        db.commit()
+    finally:
+        remover()
+
+    (sql, parametros), = [(sql, p) for sql, p in execucoes if sql.lstrip().upper().startswith("INSERT")]
+    linhas = parametros if isinstance(parametros, list) else [parametros]
+    chaves = [(linha[0], linha[1]) for linha in linhas]
+    assert chaves == [("Alto", ""), ("Centro", "10"), ("Centro", "20"), ("Vila Nova", "10")]